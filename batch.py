@@ -0,0 +1,152 @@
+import os
+import re
+import time
+
+from export_cache import open_export_cache
+from pipeline import DOCUMENT_KINDS, DOCUMENT_TITLES, REQUIRED_FIELDS, load_inputs, run_jobs
+from split_output import UNSAFE_FILE_CHARS
+
+# Имена файлов документов кафедры в каталоге --output-dir
+DOCUMENT_FILE_NAMES = {
+    "program": "Программа_конференции_{number}_кафедра_{department}.docx",
+    "report": "Отчет_конференции_{number}_кафедра_{department}.docx",
+    "papers_list": "Список_публикаций_{number}_кафедра_{department}.docx",
+}
+
+# Код заседания вида «43.2», «43-2» или «Заседание 43.2»: кафедра — часть перед точкой или дефисом
+SESSION_PREFIX = re.compile(r"(\w+)[.\-]\w")
+
+
+def session_prefix(code):
+    """Префикс кода заседания, обозначающий кафедру"""
+    match = SESSION_PREFIX.search(code)
+    return match.group(1) if match else ""
+
+
+def department_key(contribution, split_by):
+    """Кафедра доклада: по треку Indico или по префиксу кода заседания"""
+    if split_by == "track":
+        return contribution.track
+    return session_prefix(contribution.session_code)
+
+
+def split_contributions(contributions, split_by):
+    """Раскладывает доклады по кафедрам; возвращает (кафедра -> доклады, число нераспределённых)"""
+    departments = {}
+    unassigned = 0
+    for contribution in contributions:
+        key = department_key(contribution, split_by)
+        if key:
+            departments.setdefault(key, []).append(contribution)
+        else:
+            unassigned += 1
+    return departments, unassigned
+
+
+def split_papers(papers, departments, split_by):
+    """Раскладывает принятые работы по кафедрам.
+
+    Если трек указан в самой выгрузке публикаций, используется он,
+    иначе кафедра берётся у доклада, к которому относится работа.
+    """
+    by_contribution = {contribution.id: key for key, talks in departments.items()
+                       for contribution in talks if contribution.id is not None}
+    result = {}
+    unassigned = 0
+    for paper in papers:
+        key = paper.track if split_by == "track" and paper.track else by_contribution.get(paper.contribution_id)
+        if key:
+            result.setdefault(key, []).append(paper)
+        else:
+            unassigned += 1
+    return result, unassigned
+
+
+def department_options(options, key):
+    """Параметры кафедры: общие параметры, дополненные разделом departments конфигурации"""
+    result = dict(options)
+    result["department"] = key
+    result.update(options.get("departments", {}).get(key, {}))
+    return result
+
+
+def output_file_name(kind, options):
+    name = DOCUMENT_FILE_NAMES[kind].format(number=options.get("number", ""), department=options["department"])
+    if options.get("split_output") and kind != "papers_list":
+        # Программа и отчёт по частям записываются zip-архивом
+        name = os.path.splitext(name)[0] + ".zip"
+    return UNSAFE_FILE_CHARS.sub("_", name)
+
+
+def plan_jobs(options, documents, contributions, papers):
+    """Составляет задания (кафедра, документ) и список пропущенных с причиной"""
+    split_by = options["split_by"]
+    departments, unassigned_talks = split_contributions(contributions, split_by)
+    papers_by_department, unassigned_papers = split_papers(papers, departments, split_by)
+
+    jobs = []
+    skipped = []
+    for key in sorted(set(departments) | set(papers_by_department)):
+        department = department_options(options, key)
+        for kind in documents:
+            items = papers_by_department.get(key, []) if kind == "papers_list" else departments.get(key, [])
+            missing = [field for field in REQUIRED_FIELDS[kind] + ["section"]
+                       if not str(department.get(field, "")).strip()]
+            if not items:
+                continue
+            if missing:
+                names = ", ".join(missing)
+                skipped.append({"department": key, "document": kind, "status": "skipped",
+                                "message": f"не заданы параметры: {names}"})
+                continue
+            output_path = os.path.join(options["output_dir"], output_file_name(kind, department))
+            jobs.append((kind, department, items, output_path))
+
+    # Крупные задания — первыми, чтобы процессы загружались равномерно
+    jobs.sort(key=lambda job: len(job[2]), reverse=True)
+    return jobs, skipped, {"contributions": unassigned_talks, "papers": unassigned_papers}
+
+
+def run_batch(options, documents, jobs=None):
+    """Создаёт документы всех кафедр в пуле процессов; возвращает сводку"""
+    started = time.perf_counter()
+    contributions, papers = load_inputs(options, documents, open_export_cache(options.get("export_cache")))
+    planned, skipped, unassigned = plan_jobs(options, documents, contributions, papers)
+    os.makedirs(options["output_dir"], exist_ok=True)
+
+    results = run_jobs(planned, jobs)
+
+    if options.get("cache_dir"):
+        from fragment_cache import FragmentCache
+        FragmentCache(options["cache_dir"]).prune()
+
+    documents = sorted(results + skipped,
+                       key=lambda result: (result["department"], DOCUMENT_KINDS.index(result["document"])))
+    return {
+        "split_by": options["split_by"],
+        "departments": sorted({result["department"] for result in documents}),
+        "documents": documents,
+        "unassigned": unassigned,
+        "seconds": round(time.perf_counter() - started, 3),
+    }
+
+
+def format_summary(summary):
+    """Текстовая сводка пакетного запуска"""
+    lines = []
+    for result in summary["documents"]:
+        title = f"Кафедра {result['department']}, {DOCUMENT_TITLES[result['document']]}"
+        if result["status"] == "created":
+            lines.append(f"{title}: {result['path']} ({result['items']} зап., {result['seconds']} с)")
+        elif result["status"] == "skipped":
+            lines.append(f"{title}: пропущено — {result['message']}")
+        else:
+            lines.append(f"{title}: ошибка — {result['message']}")
+
+    created = sum(result["status"] == "created" for result in summary["documents"])
+    lines.append(f"Кафедр: {len(summary['departments'])}, создано документов: {created} "
+                 f"из {len(summary['documents'])} за {summary['seconds']} с")
+    unassigned = summary["unassigned"]
+    if unassigned["contributions"] or unassigned["papers"]:
+        lines.append(f"Без кафедры: докладов {unassigned['contributions']}, публикаций {unassigned['papers']}")
+    return "\n".join(lines)
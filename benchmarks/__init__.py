@@ -0,0 +1 @@
+"""Замеры производительности генераторов документов конференции"""
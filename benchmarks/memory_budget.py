@@ -0,0 +1,244 @@
+"""Проверка бюджета пиковой памяти генераторов на синтетических выгрузках.
+
+Каждый генератор (программа, отчёт, список публикаций) запускается целиком —
+от чтения JSON до сохранения документа — в отдельном процессе на выгрузках
+1 000, 10 000 и 100 000 элементов. Измеряется прирост пикового размера
+процесса (RSS): в нём и объекты Python, и разметка документа, которую
+python-docx хранит в lxml. С --trace-memory дополнительно измеряется пик
+памяти объектов Python (tracemalloc) по этапам — загрузка, нормализация,
+группировка, формирование, сохранение, — но запуск становится в разы медленнее.
+
+Бюджет генератора — постоянная часть и расход на элемент выгрузки:
+пик не должен превышать fixed_mb + size * per_item_kb. При превышении
+код возврата 1, поэтому скрипт можно запускать перед выпуском.
+
+Замеры выполняются с разборщиком JSON по умолчанию (выгрузка читается
+потоково) независимо от INDOX_JSON_BACKEND в окружении; другой разборщик
+задаётся ключом --json-backend.
+
+    python -m benchmarks.memory_budget
+    python -m benchmarks.memory_budget --streaming --trace-memory --budgets budgets.json
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import tracemalloc
+
+import generate_file1
+import generate_file2
+import generate_file3
+from benchmarks import synthetic
+from benchmarks.run_benchmarks import CONFERENCE_DATA, GENERATORS, LEADER, PROJECT_DIR, peak_rss_mb
+from data_loader import BACKEND_ENV, parses_arrays_whole
+from instrumentation import recording
+from pipeline import load_inputs
+
+DEFAULT_SIZES = (1000, 10000, 100000)
+
+# Бюджеты по генераторам (с суффиксом _streaming — для потоковой записи): rss — прирост
+# пикового RSS, traced — пик tracemalloc (с --trace-memory). Значения подобраны по замерам
+# с потоковым чтением выгрузок (разборщик по умолчанию) с запасом около 25%; переопределяются
+# файлом --budgets той же структуры (можно задать часть)
+DEFAULT_BUDGETS = {
+    "program": {
+        "rss": {"fixed_mb": 24, "per_item_kb": 16},
+        "traced": {"fixed_mb": 8, "per_item_kb": 6},
+    },
+    "program_streaming": {
+        "rss": {"fixed_mb": 24, "per_item_kb": 10},
+        "traced": {"fixed_mb": 8, "per_item_kb": 6},
+    },
+    "report": {
+        "rss": {"fixed_mb": 24, "per_item_kb": 26},
+        "traced": {"fixed_mb": 8, "per_item_kb": 6},
+    },
+    "report_streaming": {
+        "rss": {"fixed_mb": 24, "per_item_kb": 10},
+        "traced": {"fixed_mb": 8, "per_item_kb": 6},
+    },
+    "papers_list": {
+        "rss": {"fixed_mb": 24, "per_item_kb": 8},
+        "traced": {"fixed_mb": 8, "per_item_kb": 4},
+    },
+}
+
+METRIC_TITLES = {"rss": "RSS", "traced": "Python"}
+
+
+def run_generator(generator, data_path, output_path, streaming):
+    """Полный путь генератора, как в cli.py: чтение, проверка и нормализация выгрузки и создание документа"""
+    source = "papers" if generator == "papers_list" else "contributions"
+    contributions, papers = load_inputs({source: data_path}, [generator])
+    if generator == "papers_list":
+        generate_file3.generate_accepted_papers_list(papers, output_path, *LEADER, "78-й")
+        return
+
+    generate = (generate_file1.generate_conference_program if generator == "program"
+                else generate_file2.generate_conference_report)
+    generate(CONFERENCE_DATA, contributions, output_path, streaming=streaming)
+
+
+def measure_case(generator, size, data_path, streaming=False, trace_memory=False):
+    """Выполняет генератор в текущем процессе и возвращает пики памяти в МБ"""
+    rss_before = peak_rss_mb()
+    traced_peak = None
+    if trace_memory:
+        tracemalloc.start()
+    try:
+        with tempfile.TemporaryDirectory() as tmp, recording(trace_memory) as recorder:
+            run_generator(generator, data_path, os.path.join(tmp, f"{generator}.docx"), streaming)
+            if trace_memory:
+                traced_peak = tracemalloc.get_traced_memory()[1] / 2 ** 20
+    finally:
+        if trace_memory:
+            tracemalloc.stop()
+    rss_after = peak_rss_mb()
+
+    timings = recorder.as_dict()
+    stages = {name: entry["peak_mb"] for name, entry in timings["stages"].items() if "peak_mb" in entry}
+    if trace_memory:
+        # Пик этапа отсчитывается от сброса в его начале, поэтому общий пик — наибольший из них
+        traced_peak = round(max([traced_peak, *stages.values()]), 2)
+    return {
+        "generator": generator,
+        "size": size,
+        "streaming": streaming and generator != "papers_list",
+        "whole_file_json": parses_arrays_whole(),
+        "rss": round(rss_after - rss_before, 1) if rss_after is not None else None,
+        "traced": traced_peak,
+        "stages": stages,
+        "seconds": timings["total_seconds"],
+    }
+
+
+def measure_in_subprocess(generator, size, data_path, streaming, trace_memory, json_backend=None):
+    """Замер в отдельном процессе: пиковый RSS не зависит от предыдущих замеров.
+
+    json_backend — значение INDOX_JSON_BACKEND для замера; None — разборщик по умолчанию.
+    """
+    command = [sys.executable, "-m", "benchmarks.memory_budget", "--case", generator, str(size), data_path]
+    if streaming:
+        command.append("--streaming")
+    if trace_memory:
+        command.append("--trace-memory")
+    env = dict(os.environ)
+    env.pop(BACKEND_ENV, None)
+    if json_backend:
+        env[BACKEND_ENV] = json_backend
+    return json.loads(subprocess.check_output(command, cwd=PROJECT_DIR, env=env, text=True))
+
+
+def load_budgets(path=None):
+    """Бюджеты по умолчанию, дополненные файлом path"""
+    budgets = {generator: {metric: dict(limits) for metric, limits in metrics.items()}
+               for generator, metrics in DEFAULT_BUDGETS.items()}
+    if path:
+        with open(path, encoding="utf-8") as f:
+            for generator, metrics in json.load(f).items():
+                for metric, limits in metrics.items():
+                    budgets.setdefault(generator, {}).setdefault(metric, {}).update(limits)
+    return budgets
+
+
+def budget_mb(limits, size):
+    return limits["fixed_mb"] + size * limits["per_item_kb"] / 1024
+
+
+def budget_name(case):
+    return f"{case['generator']}_streaming" if case["streaming"] else case["generator"]
+
+
+def check_case(case, budgets):
+    """Сравнивает замер с бюджетом; возвращает список превышений"""
+    exceeded = []
+    for metric, limits in budgets.get(budget_name(case), {}).items():
+        value = case[metric]
+        # Под tracemalloc его собственные структуры раздувают RSS, поэтому проверяется только пик Python
+        if value is None or (metric == "rss" and case["traced"] is not None):
+            continue
+        limit = budget_mb(limits, case["size"])
+        if value > limit:
+            per_item = value * 1024 / case["size"]
+            exceeded.append(f"{METRIC_TITLES[metric]} {value:.1f} МБ > {limit:.1f} МБ ({per_item:.2f} КБ на элемент, "
+                            f"бюджет {limits['fixed_mb']} МБ + {limits['per_item_kb']} КБ на элемент)")
+    return exceeded
+
+
+def print_case(case, exceeded):
+    details = [f"RSS +{case['rss']} МБ" if case["rss"] is not None else "RSS недоступен"]
+    if case["whole_file_json"]:
+        details.append("выгрузка разобрана orjson целиком")
+    if case["traced"] is not None:
+        stages = ", ".join(f"{name} {peak:.1f}" for name, peak in case["stages"].items())
+        details.append(f"Python {case['traced']:.1f} МБ ({stages})")
+    mark = "  <-- превышение: " + "; ".join(exceeded) if exceeded else ""
+    print(f"{case['generator']:12} {case['size']:>8}: {', '.join(details)}, {case['seconds']:.1f} с{mark}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Проверка бюджета пиковой памяти генераторов документов")
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(DEFAULT_SIZES),
+                        help=f"размеры выгрузок ({synthetic.MIN_ITEMS}–{synthetic.MAX_ITEMS})")
+    parser.add_argument("--generators", nargs="+", choices=GENERATORS, default=list(GENERATORS))
+    parser.add_argument("--streaming", action="store_true", help="потоковая запись программы и отчёта")
+    parser.add_argument("--trace-memory", action="store_true",
+                        help="пик памяти объектов Python по этапам через tracemalloc (замедляет замер)")
+    parser.add_argument("--json-backend", choices=["json", "orjson"],
+                        help="разборщик JSON (INDOX_JSON_BACKEND) для замеров; по умолчанию потоковое чтение")
+    parser.add_argument("--budgets", help="JSON-файл с бюджетами (см. DEFAULT_BUDGETS)")
+    parser.add_argument("--data-dir", help="каталог для синтетических выгрузок (по умолчанию временный)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="файл для результатов в JSON")
+    parser.add_argument("--case", nargs=3, metavar=("GENERATOR", "SIZE", "DATA"), help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.case:
+        generator, size, data_path = args.case
+        print(json.dumps(measure_case(generator, int(size), data_path, args.streaming, args.trace_memory)))
+        return 0
+
+    for size in args.sizes:
+        try:
+            synthetic.check_count(size)
+        except ValueError as e:
+            parser.error(str(e))
+    try:
+        budgets = load_budgets(args.budgets)
+    except (OSError, ValueError) as e:
+        parser.error(f"Не удалось прочитать бюджеты: {e}")
+
+    cases = []
+    failures = 0
+    with tempfile.TemporaryDirectory() as tmp:
+        data_dir = args.data_dir or tmp
+        os.makedirs(data_dir, exist_ok=True)
+        for size in args.sizes:
+            contributions_path = os.path.join(data_dir, f"contributions_{size}.json")
+            papers_path = os.path.join(data_dir, f"papers_{size}.json")
+            if not os.path.exists(contributions_path):
+                synthetic.write_contributions(contributions_path, size, args.seed)
+            if not os.path.exists(papers_path):
+                synthetic.write_papers(papers_path, size, args.seed)
+
+            for generator in args.generators:
+                data_path = papers_path if generator == "papers_list" else contributions_path
+                case = measure_in_subprocess(generator, size, data_path, args.streaming, args.trace_memory,
+                                             args.json_backend)
+                exceeded = check_case(case, budgets)
+                failures += bool(exceeded)
+                cases.append(dict(case, exceeded=exceeded))
+                print_case(case, exceeded)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"budgets": budgets, "cases": cases}, f, ensure_ascii=False, indent=2)
+
+    print(f"Превышений бюджета: {failures} из {len(cases)}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,220 @@
+"""Замеры генераторов программы, отчёта и списка публикаций на синтетических выгрузках.
+
+Для каждого генератора и размера выгрузки засекаются этапы (см. instrumentation):
+загрузка JSON, нормализация, группировка по заседаниям, формирование документа
+и сохранение.
+Каждый замер выполняется в отдельном процессе, чтобы пиковая память не
+зависела от предыдущих. Результаты сохраняются в JSON; с --compare
+сравниваются с прошлым запуском, и замедления выводятся как регрессии.
+
+    python -m benchmarks.run_benchmarks --sizes 100 1000 10000 --output results.json
+    python -m benchmarks.run_benchmarks --compare results.json --output new.json
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+from datetime import datetime
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+import generate_file1
+import generate_file2
+import generate_file3
+from benchmarks import synthetic
+from data_loader import iter_json_array
+from instrumentation import recording, stage
+from models import iter_contributions
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+GENERATORS = ("program", "report", "papers_list")
+DEFAULT_SIZES = (100, 1000, 10000)
+# Во сколько раз должен вырасти результат, чтобы считать его регрессией
+DEFAULT_THRESHOLD = 1.25
+
+CONFERENCE_DATA = {
+    "number": "78-й",
+    "head": "Иванов Иван Иванович, д.т.н., профессор",
+    "deputy": "Петров Пётр Петрович, к.т.н., доцент",
+    "secretary": "Сидорова Анна Сергеевна, ассистент",
+}
+LEADER = ("Смирнов Алексей Викторович", "unids@guap.ru", "+7 (812) 000-00-00")
+
+
+def peak_rss_mb():
+    """Пиковый размер процесса в МБ (None, если недоступно на этой платформе)"""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # В Linux значение в КБ, в macOS — в байтах
+    return round(peak / (2 ** 20 if sys.platform == "darwin" else 2 ** 10), 1)
+
+
+def run_contributions_case(generator, data_path, output_path, streaming):
+    """Замер программы или отчёта по выгрузке докладов"""
+    generate = (generate_file1.generate_conference_program if generator == "program"
+                else generate_file2.generate_conference_report)
+
+    with stage("load") as load_stage:
+        items = list(iter_json_array(data_path))
+        load_stage.count = len(items)
+    with stage("normalize", len(items)):
+        contributions = list(iter_contributions(items))
+    del items
+
+    # Группировка, формирование и сохранение засекаются внутри генератора
+    generate(CONFERENCE_DATA, contributions, output_path, streaming=streaming)
+
+
+def run_papers_case(data_path, output_path):
+    """Замер списка публикаций по выгрузке публикаций"""
+    with stage("load"), open(data_path, encoding="utf-8") as f:
+        papers = json.load(f)["papers"]
+    generate_file3.generate_accepted_papers_list(papers, output_path, *LEADER, "78-й")
+
+
+def run_case(generator, size, data_path, streaming=False, trace_memory=False):
+    """Выполняет один замер в текущем процессе и возвращает его результат"""
+    with tempfile.TemporaryDirectory() as tmp:
+        output_path = os.path.join(tmp, f"{generator}.docx")
+        with recording(trace_memory) as recorder:
+            if generator == "papers_list":
+                run_papers_case(data_path, output_path)
+            else:
+                run_contributions_case(generator, data_path, output_path, streaming)
+        output_size = os.path.getsize(output_path)
+
+    timings = recorder.as_dict()
+    return {
+        "generator": generator,
+        "size": size,
+        "streaming": streaming and generator != "papers_list",
+        "stages": timings["stages"],
+        "total_seconds": timings["total_seconds"],
+        "peak_rss_mb": peak_rss_mb(),
+        "output_bytes": output_size,
+    }
+
+
+def run_case_in_subprocess(generator, size, data_path, streaming, trace_memory):
+    """Выполняет замер в отдельном процессе"""
+    command = [sys.executable, "-m", "benchmarks.run_benchmarks", "--case", generator, str(size), data_path]
+    if streaming:
+        command.append("--streaming")
+    if trace_memory:
+        command.append("--trace-memory")
+    output = subprocess.check_output(command, cwd=PROJECT_DIR, text=True)
+    return json.loads(output)
+
+
+def git_revision():
+    """Текущая ревизия репозитория, если она доступна"""
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], cwd=PROJECT_DIR, text=True,
+                                       stderr=subprocess.DEVNULL).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def case_key(case):
+    return case["generator"], case["size"], case["streaming"]
+
+
+def compare_results(previous, current, threshold):
+    """Сравнивает время с прошлым запуском; возвращает число регрессий"""
+    old_cases = {case_key(case): case for case in previous["cases"]}
+    regressions = 0
+    for case in current["cases"]:
+        old = old_cases.get(case_key(case))
+        if not old:
+            continue
+        ratio = case["total_seconds"] / old["total_seconds"] if old["total_seconds"] else 1.0
+        mark = ""
+        if ratio > threshold:
+            regressions += 1
+            mark = "  <-- регрессия"
+        print(f"{case['generator']:12} {case['size']:>8}: {old['total_seconds']:.3f} -> "
+              f"{case['total_seconds']:.3f} с (x{ratio:.2f}){mark}")
+    return regressions
+
+
+def print_case(case):
+    stages = ", ".join(f"{name} {stage['seconds']:.3f}" for name, stage in case["stages"].items())
+    memory = f", пик {case['peak_rss_mb']} МБ" if case["peak_rss_mb"] is not None else ""
+    print(f"{case['generator']:12} {case['size']:>8}: {case['total_seconds']:.3f} с ({stages}){memory}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Замеры генераторов документов на синтетических выгрузках")
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(DEFAULT_SIZES),
+                        help=f"размеры выгрузок ({synthetic.MIN_ITEMS}–{synthetic.MAX_ITEMS})")
+    parser.add_argument("--generators", nargs="+", choices=GENERATORS, default=list(GENERATORS))
+    parser.add_argument("--streaming", action="store_true", help="потоковая запись программы и отчёта")
+    parser.add_argument("--trace-memory", action="store_true",
+                        help="пик памяти по этапам через tracemalloc (замедляет замер)")
+    parser.add_argument("--data-dir", help="каталог для синтетических выгрузок (по умолчанию временный)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default="benchmark_results.json", help="файл результатов")
+    parser.add_argument("--compare", help="прошлый файл результатов для сравнения")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help=f"порог регрессии по отношению времени (по умолчанию {DEFAULT_THRESHOLD})")
+    parser.add_argument("--case", nargs=3, metavar=("GENERATOR", "SIZE", "DATA"), help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.case:
+        generator, size, data_path = args.case
+        print(json.dumps(run_case(generator, int(size), data_path, args.streaming, args.trace_memory)))
+        return 0
+
+    for size in args.sizes:
+        try:
+            synthetic.check_count(size)
+        except ValueError as e:
+            parser.error(str(e))
+
+    results = {
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "revision": git_revision(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cases": [],
+    }
+
+    with tempfile.TemporaryDirectory() as tmp:
+        data_dir = args.data_dir or tmp
+        os.makedirs(data_dir, exist_ok=True)
+        for size in args.sizes:
+            contributions_path = os.path.join(data_dir, f"contributions_{size}.json")
+            papers_path = os.path.join(data_dir, f"papers_{size}.json")
+            if not os.path.exists(contributions_path):
+                synthetic.write_contributions(contributions_path, size, args.seed)
+            if not os.path.exists(papers_path):
+                synthetic.write_papers(papers_path, size, args.seed)
+
+            for generator in args.generators:
+                data_path = papers_path if generator == "papers_list" else contributions_path
+                case = run_case_in_subprocess(generator, size, data_path, args.streaming, args.trace_memory)
+                results["cases"].append(case)
+                print_case(case)
+
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(results, f, ensure_ascii=False, indent=2)
+    print(f"Результаты сохранены: {args.output}")
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            previous = json.load(f)
+        if compare_results(previous, results, args.threshold):
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
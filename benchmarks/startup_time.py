@@ -0,0 +1,70 @@
+"""Замер времени запуска графического интерфейса до показа главного окна.
+
+Запускает main.py в режиме замера (переменная INDOX_STARTUP_PROBE) несколько
+раз и сравнивает медиану с целевым значением. Нужен дисплей (или Xvfb).
+
+    python benchmarks/startup_time.py --runs 5 --target 0.6
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MAIN_SCRIPT = os.path.join(PROJECT_DIR, "main.py")
+STARTUP_PROBE_ENV = "INDOX_STARTUP_PROBE"
+
+# Целевое время от запуска процесса до показа окна, сек
+DEFAULT_TARGET = 0.6
+
+GENERATORS_IMPORT = (
+    "import time; t = time.perf_counter(); "
+    "import generate_file1, generate_file2, generate_file3; "
+    "print(time.perf_counter() - t)"
+)
+
+
+def measure_once():
+    """Запускает интерфейс один раз и возвращает (время процесса, время внутри main.py)"""
+    env = dict(os.environ, **{STARTUP_PROBE_ENV: "1"})
+    started = time.perf_counter()
+    proc = subprocess.Popen([sys.executable, MAIN_SCRIPT], cwd=PROJECT_DIR, env=env,
+                            stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+    for line in proc.stdout:
+        if line.startswith(STARTUP_PROBE_ENV):
+            wall = time.perf_counter() - started
+            proc.wait()
+            return wall, float(line.split()[1])
+
+    proc.wait()
+    raise RuntimeError(f"main.py не сообщил время запуска:\n{proc.stderr.read().strip()}")
+
+
+def measure_generators_import():
+    """Возвращает время импорта модулей генераторов, которое вынесено из запуска"""
+    output = subprocess.check_output([sys.executable, "-c", GENERATORS_IMPORT], cwd=PROJECT_DIR, text=True)
+    return float(output)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Время запуска графического интерфейса до показа окна")
+    parser.add_argument("--runs", type=int, default=5, help="число запусков (по умолчанию 5)")
+    parser.add_argument("--target", type=float, default=DEFAULT_TARGET,
+                        help=f"целевое время до показа окна, сек (по умолчанию {DEFAULT_TARGET})")
+    args = parser.parse_args(argv)
+
+    results = [measure_once() for _ in range(args.runs)]
+    wall = statistics.median(r[0] for r in results)
+    inner = statistics.median(r[1] for r in results)
+
+    print(f"До показа окна (процесс целиком): {wall:.3f} с, медиана из {args.runs}")
+    print(f"До показа окна (внутри main.py):  {inner:.3f} с")
+    print(f"Отложенный импорт генераторов:    {measure_generators_import():.3f} с")
+    print(f"Цель: {args.target:.3f} с — {'выполнена' if wall <= args.target else 'НЕ выполнена'}")
+    return 0 if wall <= args.target else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,200 @@
+"""Синтетические выгрузки Indico для замеров: доклады и публикации.
+
+Структура записей повторяет экспорт Indico (persons, custom_fields, session,
+start_dt, состояния и ревизии публикаций), имена и темы — на кириллице.
+Записи пишутся в файл по одной, поэтому можно создавать выгрузки
+до миллиона элементов без заметного расхода памяти.
+
+    python -m benchmarks.synthetic 10000 contributions.json papers.json
+"""
+import argparse
+import json
+import random
+from datetime import datetime, timedelta, timezone
+
+from models import GROUP_FIELD_NAME
+
+MIN_ITEMS = 100
+MAX_ITEMS = 1_000_000
+
+# Докладов в одном заседании и длительность доклада, мин
+TALKS_PER_SESSION = 20
+TALK_MINUTES = 15
+
+CONFERENCE_START = datetime(2025, 4, 7, 10, 0, tzinfo=timezone(timedelta(hours=3)))
+CONFERENCE_DAYS = 10
+SESSION_HOURS = (10, 12, 14, 16)
+
+MALE_SURNAMES = ["Иванов", "Смирнов", "Кузнецов", "Попов", "Васильев", "Петров", "Соколов", "Михайлов",
+                 "Новиков", "Фёдоров", "Морозов", "Волков", "Алексеев", "Лебедев", "Семёнов", "Егоров"]
+MALE_NAMES = ["Александр", "Дмитрий", "Максим", "Сергей", "Андрей", "Алексей", "Артём", "Илья",
+              "Кирилл", "Михаил", "Никита", "Матвей", "Роман", "Егор", "Арсений", "Иван"]
+FEMALE_NAMES = ["Анастасия", "Мария", "Анна", "Виктория", "Екатерина", "Наталья", "Марина", "Полина",
+                "Дарья", "Алиса", "Ксения", "Елизавета", "Софья", "Юлия", "Вероника", "Ольга"]
+PATRONYMIC_STEMS = ["Александров", "Дмитриев", "Сергеев", "Андреев", "Алексеев", "Михайлов",
+                    "Николаев", "Владимиров", "Игорев", "Павлов", "Юрьев", "Олегов"]
+
+TOPIC_ACTIONS = ["Разработка", "Исследование", "Анализ", "Проектирование", "Моделирование",
+                 "Оптимизация", "Применение", "Сравнение", "Автоматизация", "Реализация"]
+TOPIC_OBJECTS = ["системы мониторинга", "алгоритмов маршрутизации", "нейросетевой модели",
+                 "веб-сервиса", "мобильного приложения", "базы данных", "методов кластеризации",
+                 "программного комплекса", "интерфейса пользователя", "протокола обмена данными"]
+TOPIC_DOMAINS = ["для учебного процесса", "в беспилотных системах", "на предприятии", "для медицинских данных",
+                 "в распределённых системах", "для обработки изображений", "в системах управления",
+                 "для анализа текстов на естественном языке", "в облачной инфраструктуре", "для интернета вещей"]
+
+# Пропуски и частичные данные встречаются и в настоящих выгрузках
+GROUPS = ["4231", "4232", "4236М", "4131K", "4331", "4936М", "Z4431", ""]
+PAPER_STATES = [("accepted", "Принята", 6), ("rejected", "Отклонена", 2),
+                ("to_be_corrected", "На доработке", 1), ("submitted", "Подана", 1)]
+
+
+def person_name(rng):
+    """Возвращает ФИО в именительном падеже"""
+    surname = rng.choice(MALE_SURNAMES)
+    stem = rng.choice(PATRONYMIC_STEMS)
+    if rng.random() < 0.5:
+        return f"{surname} {rng.choice(MALE_NAMES)} {stem}ич"
+    return f"{surname}а {rng.choice(FEMALE_NAMES)} {stem}на"
+
+
+def talk_title(rng):
+    """Возвращает правдоподобную тему доклада"""
+    return f"{rng.choice(TOPIC_ACTIONS)} {rng.choice(TOPIC_OBJECTS)} {rng.choice(TOPIC_DOMAINS)}"
+
+
+def session_start(session_num):
+    """Возвращает начало заседания: заседания распределены по дням и парам"""
+    slot = session_num - 1
+    day = (slot // len(SESSION_HOURS)) % CONFERENCE_DAYS
+    hour = SESSION_HOURS[slot % len(SESSION_HOURS)]
+    return CONFERENCE_START.replace(hour=hour) + timedelta(days=day)
+
+
+def make_person(person_id, full_name, is_speaker):
+    """Возвращает участника доклада"""
+    parts = full_name.split()
+    return {
+        "id": person_id,
+        "full_name": full_name,
+        "first_name": parts[1],
+        "last_name": parts[0],
+        "affiliation": "ГУАП",
+        "email": f"user{person_id}@guap.ru",
+        "author_type": "primary" if is_speaker else "secondary",
+        "is_speaker": is_speaker,
+    }
+
+
+def iter_contributions(count, seed=0):
+    """Порождает доклады в формате экспорта Indico"""
+    rng = random.Random(seed)
+    sessions = max(1, count // TALKS_PER_SESSION)
+    for i in range(count):
+        session_num = i * sessions // count + 1
+        start = session_start(session_num) + timedelta(minutes=TALK_MINUTES * (i % TALKS_PER_SESSION))
+        speaker = person_name(rng)
+        persons = [make_person(i * 2 + 1, speaker, True)]
+        if rng.random() < 0.3:
+            persons.append(make_person(i * 2 + 2, person_name(rng), False))
+
+        yield {
+            "id": i + 1,
+            "friendly_id": i + 1,
+            "title": talk_title(rng),
+            "description": "",
+            "start_dt": start.isoformat(),
+            "end_dt": (start + timedelta(minutes=TALK_MINUTES)).isoformat(),
+            "duration": TALK_MINUTES,
+            "room_name": f"{(session_num % 9) + 1}{rng.choice('0123')}{rng.randint(1, 9)}",
+            "location": "Б. Морская, 67",
+            "type": "Доклад",
+            "session": {
+                "friendly_id": str(session_num),
+                "code": f"43.{session_num}",
+                "title": f"Заседание 43.{session_num}",
+            },
+            "track": {"code": "43", "title": "Кафедра 43"},
+            "persons": persons,
+            "custom_fields": [
+                {"name": "Научный руководитель", "value": person_name(rng)},
+                {"name": GROUP_FIELD_NAME, "value": rng.choice(GROUPS)},
+                {"name": "Согласие на публикацию", "value": rng.choice(["Да", "Нет"])},
+            ],
+        }
+
+
+def iter_papers(count, seed=0):
+    """Порождает публикации в формате экспорта Indico"""
+    rng = random.Random(seed + 1)
+    states = [state for state in PAPER_STATES for _ in range(state[2])]
+    submitted = datetime(2025, 5, 1, 12, 0, tzinfo=timezone.utc)
+    for i in range(count):
+        name, title, _ = rng.choice(states)
+        revisions = []
+        for r in range(rng.randint(1, 3)):
+            revisions.append({
+                "id": i * 3 + r + 1,
+                "submitted_dt": (submitted + timedelta(days=r, minutes=i % 1440)).isoformat(),
+                "submitter": {"id": i + 1, "full_name": person_name(rng)},
+                "files": [{"id": i * 3 + r + 1, "filename": f"paper_{i + 1}_v{r + 1}.pdf",
+                           "content_type": "application/pdf"}],
+            })
+        yield {
+            "id": i + 1,
+            "state": {"name": name, "title": title},
+            "revisions": revisions,
+            "contribution": {"id": i + 1, "friendly_id": i + 1, "title": talk_title(rng)},
+        }
+
+
+def check_count(count):
+    """Проверяет, что размер выгрузки в допустимых пределах"""
+    if not MIN_ITEMS <= count <= MAX_ITEMS:
+        raise ValueError(f"Размер выгрузки должен быть от {MIN_ITEMS} до {MAX_ITEMS}")
+
+
+def write_json_array(items, f):
+    """Записывает элементы массивом JSON по одному"""
+    f.write("[")
+    for i, item in enumerate(items):
+        if i:
+            f.write(",\n")
+        f.write(json.dumps(item, ensure_ascii=False))
+    f.write("]")
+
+
+def write_contributions(path, count, seed=0):
+    """Создаёт выгрузку докладов (массив верхнего уровня)"""
+    check_count(count)
+    with open(path, "w", encoding="utf-8") as f:
+        write_json_array(iter_contributions(count, seed), f)
+
+
+def write_papers(path, count, seed=0):
+    """Создаёт выгрузку публикаций (объект с полем papers)"""
+    check_count(count)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write('{"papers": ')
+        write_json_array(iter_papers(count, seed), f)
+        f.write("}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Создание синтетических выгрузок Indico")
+    parser.add_argument("count", type=int, help=f"число элементов ({MIN_ITEMS}–{MAX_ITEMS})")
+    parser.add_argument("contributions", help="путь для выгрузки докладов")
+    parser.add_argument("papers", nargs="?", help="путь для выгрузки публикаций")
+    parser.add_argument("--seed", type=int, default=0, help="начальное значение генератора случайных чисел")
+    args = parser.parse_args(argv)
+
+    try:
+        write_contributions(args.contributions, args.count, args.seed)
+        if args.papers:
+            write_papers(args.papers, args.count, args.seed)
+    except ValueError as e:
+        parser.error(str(e))
+
+
+if __name__ == "__main__":
+    main()
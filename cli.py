@@ -0,0 +1,451 @@
+import argparse
+import hashlib
+import json
+import sys
+import time
+
+from data_loader import iter_json_array, iter_papers
+from export_cache import open_export_cache
+from field_mapping import contribution_mapping
+from fragment_cache import FragmentCache
+from instrumentation import current_recorder, recording, scope, stage
+from models import DEFAULT_DEPARTMENT, DEFAULT_SECTION, department_of, iter_accepted_papers, iter_contributions
+from pipeline import REQUIRED_FIELDS
+from split_output import SPLIT_OUTPUT_MODES
+from validation import ExportValidationError, validate_contributions, validate_papers
+
+HASH_BLOCK_SIZE = 1024 * 1024
+
+# Поля конфигурации: имя параметра -> описание для справки
+CONFERENCE_FIELDS = [
+    ("number", "номер конференции (например, 77-й)"),
+    ("department", f"номер кафедры (по умолчанию {DEFAULT_DEPARTMENT})"),
+    ("section", f"название секции кафедры (по умолчанию «{DEFAULT_SECTION}»)"),
+    ("head", "научный руководитель секции (ФИО, должность, звание)"),
+    ("deputy", "заместитель руководителя (ФИО, должность, звание)"),
+    ("secretary", "секретарь (ФИО, должность)"),
+    ("leader_name", "ФИО руководителя УНИДС"),
+    ("leader_email", "email руководителя УНИДС"),
+    ("leader_phone", "телефон руководителя УНИДС"),
+]
+
+# Загрузка выгрузок напрямую из Indico (токен можно задать переменной окружения INDICO_TOKEN)
+INDICO_FIELDS = [
+    ("indico_url", "адрес сервера Indico; выгрузки скачиваются в пути --contributions и --papers"),
+    ("event_id", "номер мероприятия в Indico"),
+    ("indico_cache", "каталог кеша ответов Indico для условных запросов (ETag/If-Modified-Since)"),
+    ("indico_papers_path", "путь API публикаций относительно адреса Indico, {event_id} — номер мероприятия "
+                           "(по умолчанию /export/event/{event_id}/papers.json)"),
+]
+
+PATH_FIELDS = [
+    ("contributions", "JSON-выгрузка докладов Indico"),
+    ("papers", "JSON-выгрузка публикаций Indico"),
+    ("program", "путь для сохранения программы конференции (.docx)"),
+    ("report", "путь для сохранения отчёта о конференции (.docx)"),
+    ("papers_list", "путь для сохранения списка публикуемых докладов (.docx)"),
+]
+
+# Признаки разделения общей выгрузки по кафедрам в пакетном режиме
+SPLIT_MODES = ("track", "session")
+
+# Входной файл, от которого зависит каждый документ
+SOURCES = {
+    "program": "contributions",
+    "report": "contributions",
+    "papers_list": "papers",
+}
+
+
+class ConfigError(Exception):
+    """Ошибка в параметрах запуска"""
+
+
+def build_parser():
+    """Создаёт разборщик аргументов командной строки"""
+    parser = argparse.ArgumentParser(
+        description="Создание документов конференции (программа, отчёт, список публикаций) без графического интерфейса"
+    )
+    parser.add_argument("-c", "--config", help="JSON-файл с параметрами; аргументы командной строки имеют приоритет")
+    for name, help_text in CONFERENCE_FIELDS + PATH_FIELDS + INDICO_FIELDS:
+        parser.add_argument(f"--{name.replace('_', '-')}", dest=name, help=help_text)
+    parser.add_argument("--field-mapping",
+                        help="JSON-файл соответствия полей записи доклада и выгрузки Indico "
+                             "(для изменённой формы; задаются только отличающиеся поля)")
+    parser.add_argument("--streaming", action="store_true",
+                        help="потоковая запись программы и отчёта (для очень больших выгрузок)")
+    parser.add_argument("--render-jobs", type=int,
+                        help="формировать заседания программы и отчёта в указанном числе процессов "
+                             "(для программ из сотен заседаний на многоядерных серверах)")
+    parser.add_argument("--split-output", choices=SPLIT_OUTPUT_MODES,
+                        help="записать программу и отчёт zip-архивами: отдельный документ на каждый день (day) "
+                             "или заседание (session) и оглавление")
+    parser.add_argument("--compact", action="store_true",
+                        help="компактный базовый шаблон: в документе только нужные части и стили (файлы меньше)")
+    parser.add_argument("--compress-level", type=int, choices=range(10), metavar="0-9",
+                        help="степень сжатия архива .docx: 0 — без сжатия, 9 — наибольшее")
+    parser.add_argument("--parallel", action="store_true",
+                        help="создавать несколько документов одновременно в отдельных процессах "
+                             "(выгрузки загружаются один раз)")
+    parser.add_argument("--check", action="store_true",
+                        help="только проверить выгрузки и вывести все ошибки с номером элемента и путём поля")
+    parser.add_argument("--watch", action="store_true",
+                        help="следить за файлами выгрузок и пересоздавать документы при изменении содержимого")
+    parser.add_argument("--interval", type=float, default=5.0,
+                        help="период опроса файлов в режиме наблюдения, сек (по умолчанию 5)")
+    parser.add_argument("--cache-dir",
+                        help="каталог кеша заседаний: при повторном создании формируются только изменившиеся")
+    parser.add_argument("--export-cache", nargs="?", const="",
+                        help="кеш разобранных выгрузок (файл SQLite; без значения — в каталоге пользователя): "
+                             "повторный запуск по той же выгрузке не разбирает JSON")
+    parser.add_argument("--timings", help="записать длительность этапов создания документов в JSON-файл")
+    parser.add_argument("--trace-memory", action="store_true",
+                        help="добавить в замеры этапов пик выделенной памяти (замедляет работу)")
+    parser.add_argument("--profile", help="записать профиль cProfile запуска в файл (для pstats/snakeviz)")
+    parser.add_argument("--split-by", choices=SPLIT_MODES,
+                        help="пакетный режим: разделить выгрузку по кафедрам (по треку или префиксу кода заседания) "
+                             "и создать документы каждой кафедры; параметры кафедр — в разделе departments "
+                             "конфигурации")
+    parser.add_argument("--output-dir", help="каталог для документов кафедр в пакетном режиме")
+    parser.add_argument("--jobs", type=int, help="число процессов в пакетном режиме (по умолчанию — число ядер)")
+    parser.add_argument("--summary", help="записать сводку пакетного запуска в JSON-файл")
+    return parser
+
+
+def resolve_options(args):
+    """Объединяет параметры из файла конфигурации и командной строки"""
+    options = {}
+    if args.config:
+        with open(args.config, encoding="utf-8") as f:
+            options.update(json.load(f))
+
+    for name, _ in CONFERENCE_FIELDS + PATH_FIELDS + INDICO_FIELDS:
+        value = getattr(args, name)
+        if value is not None:
+            options[name] = value
+    if args.streaming:
+        options["streaming"] = True
+    if args.trace_memory:
+        options["trace_memory"] = True
+    if args.parallel:
+        options["parallel"] = True
+    if args.compact:
+        options["compact"] = True
+    if args.compress_level is not None:
+        options["compress_level"] = args.compress_level
+    if args.export_cache is not None:
+        options["export_cache"] = args.export_cache
+    for name in ("cache_dir", "timings", "profile", "split_by", "output_dir", "summary", "render_jobs",
+                 "split_output", "field_mapping"):
+        if getattr(args, name):
+            options[name] = getattr(args, name)
+    return options
+
+
+def check_output_options(options):
+    """Проверяет параметры записи .docx, которые могли прийти из файла конфигурации"""
+    level = options.get("compress_level")
+    if level is not None and (isinstance(level, bool) or level not in range(10)):
+        raise ConfigError("Параметр compress_level должен быть целым числом от 0 до 9")
+    if options.get("split_output") and options["split_output"] not in SPLIT_OUTPUT_MODES:
+        raise ConfigError("Параметр split_output должен быть day или session")
+
+
+def requested_documents(options):
+    """Возвращает виды документов, для которых указан путь сохранения"""
+    documents = [kind for kind in REQUIRED_FIELDS if options.get(kind)]
+    if not documents:
+        raise ConfigError("Не указан ни один документ для создания (--program, --report, --papers-list)")
+
+    for kind in documents:
+        missing = [field for field in REQUIRED_FIELDS[kind] if not str(options.get(field, "")).strip()]
+        if missing:
+            names = ", ".join("--" + field.replace("_", "-") for field in missing)
+            raise ConfigError(f"Для документа {kind} не заданы параметры: {names}")
+
+    if options.get("indico_url") and not str(options.get("event_id", "")).strip():
+        raise ConfigError("Для загрузки из Indico не задан параметр --event-id")
+    return documents
+
+
+def batch_documents(options):
+    """Проверяет параметры пакетного режима и возвращает виды создаваемых документов"""
+    if options.get("split_by") not in SPLIT_MODES:
+        raise ConfigError("Параметр --split-by должен быть track или session")
+    if not options.get("output_dir"):
+        raise ConfigError("Для пакетного режима не задан каталог --output-dir")
+
+    documents = [kind for kind in REQUIRED_FIELDS if options.get(SOURCES[kind])]
+    if not documents:
+        raise ConfigError("Не указаны выгрузки для пакетного режима (--contributions, --papers)")
+    return documents
+
+
+def fetch_exports(options, documents):
+    """Скачивает из Indico выгрузки, нужные для документов; возвращает изменившиеся"""
+    from indico_client import IndicoClient
+
+    changed = []
+    with IndicoClient(options["indico_url"], token=options.get("indico_token"),
+                      cache_dir=options.get("indico_cache"), papers_path=options.get("indico_papers_path")) as client:
+        sources = {SOURCES[kind] for kind in documents}
+        if "contributions" in sources and client.download_contributions(options["event_id"],
+                                                                         options["contributions"]):
+            changed.append("contributions")
+        if "papers" in sources and client.download_papers(options["event_id"], options["papers"]):
+            changed.append("papers")
+    return changed
+
+
+def check_exports(options, documents):
+    """Проверяет выгрузки, нужные для документов, за один проход и печатает все ошибки; возвращает код завершения"""
+    status = 0
+    for source in sorted({SOURCES[kind] for kind in documents}):
+        path = options[source]
+        if source == "contributions":
+            # Доклады проверяются по тому же соответствию полей, что и при создании документов
+            items = validate_contributions(iter_json_array(path), path, contribution_mapping(options.get("field_mapping")))
+        else:
+            items = validate_papers(iter_papers(path), path)
+        try:
+            count = sum(1 for _ in items)
+        except ExportValidationError as e:
+            for _, field_path, message in e.problems:
+                print(f"{path}{field_path}: {message}", file=sys.stderr)
+            print(f"Ошибок в выгрузке {path}: {len(e.problems)}", file=sys.stderr)
+            status = 1
+        except (OSError, ValueError) as e:
+            print(e, file=sys.stderr)
+            status = 1
+        else:
+            print(f"Выгрузка {path} корректна, элементов: {count}")
+    return status
+
+
+def generate_documents(options, documents):
+    """Создаёт указанные документы и возвращает пути сохранённых файлов"""
+    from generate_file1 import generate_conference_program
+    from generate_file2 import generate_conference_report
+    from generate_file3 import generate_accepted_papers_list
+
+    conference_data = {
+        "number": options.get("number", ""),
+        "head": options.get("head", ""),
+        "deputy": options.get("deputy", ""),
+        "secretary": options.get("secretary", ""),
+        "department": options.get("department", ""),
+        "section": options.get("section", ""),
+    }
+    department, section = department_of(conference_data)
+
+    output = {"compact": options.get("compact", False), "compresslevel": options.get("compress_level")}
+    written = []
+    contributions = None
+    fragment_cache = FragmentCache(options["cache_dir"]) if options.get("cache_dir") else None
+    export_cache = open_export_cache(options.get("export_cache"))
+    if "program" in documents or "report" in documents:
+        # Выгрузка разбирается один раз на оба документа
+        with stage("load") as load_stage:
+            mapping = contribution_mapping(options.get("field_mapping"))
+            if export_cache is not None:
+                contributions = export_cache.load_contributions(options["contributions"], mapping=mapping)
+            else:
+                contributions = list(iter_contributions(
+                    validate_contributions(iter_json_array(options["contributions"]), options["contributions"], mapping),
+                    mapping.normalize
+                ))
+            load_stage.count = len(contributions)
+
+    if "program" in documents:
+        with scope("program"):
+            generate_conference_program(conference_data, contributions, options["program"],
+                                        streaming=options.get("streaming", False), fragment_cache=fragment_cache,
+                                        workers=options.get("render_jobs"), split_output=options.get("split_output"),
+                                        **output)
+        written.append(options["program"])
+
+    if "report" in documents:
+        with scope("report"):
+            generate_conference_report(conference_data, contributions, options["report"],
+                                       streaming=options.get("streaming", False), fragment_cache=fragment_cache,
+                                       workers=options.get("render_jobs"), split_output=options.get("split_output"),
+                                       **output)
+        written.append(options["report"])
+
+    if "papers_list" in documents:
+        with scope("papers_list"):
+            with stage("load"):
+                if export_cache is not None:
+                    papers = export_cache.load_papers(options["papers"])
+                else:
+                    papers = list(iter_accepted_papers(
+                        validate_papers(iter_papers(options["papers"]), options["papers"])
+                    ))
+            generate_accepted_papers_list(
+                papers,
+                options["papers_list"],
+                options["leader_name"],
+                options["leader_email"],
+                options["leader_phone"],
+                options["number"],
+                department=department,
+                section=section,
+                **output
+            )
+        written.append(options["papers_list"])
+
+    if fragment_cache is not None:
+        fragment_cache.prune()
+    return written
+
+
+def generate_parallel(options, documents):
+    """Создаёт документы одновременно в пуле процессов и возвращает пути сохранённых файлов"""
+    from pipeline import generate_all
+
+    department, section = department_of(options)
+    options = dict(options, department=department, section=section)
+    results = generate_all(options, documents, export_cache=open_export_cache(options.get("export_cache")))
+
+    recorder = current_recorder()
+    written = []
+    for result in results:
+        if recorder is not None:
+            # Этапы внутри рабочих процессов не замеряются — только общее время документа
+            recorder.add(f"{result['document']}.total", result["seconds"], result["items"])
+        if result["status"] == "error":
+            raise RuntimeError(f"{result['document']}: {result['message']}")
+        if result["status"] == "skipped":
+            print(f"Документ {result['document']} не создан: {result['message']}", file=sys.stderr)
+        else:
+            written.append(result["path"])
+    return written
+
+
+def generate_instrumented(options, documents):
+    """Создаёт документы, при необходимости записывая замеры этапов и профиль"""
+    generate = generate_parallel if options.get("parallel") and len(documents) > 1 else generate_documents
+    if not options.get("timings") and not options.get("profile"):
+        return generate(options, documents)
+
+    with recording(trace_memory=options.get("trace_memory", False),
+                   profile_path=options.get("profile")) as recorder:
+        written = generate(options, documents)
+
+    if options.get("timings"):
+        with open(options["timings"], "w", encoding="utf-8") as f:
+            f.write(recorder.to_json(indent=2))
+    return written
+
+
+def file_hash(path):
+    """Вычисляет хеш содержимого файла"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(HASH_BLOCK_SIZE), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def watch(options, documents, interval):
+    """Опрашивает файлы выгрузок и соответствия полей и пересоздаёт документы, чьи входные данные изменились"""
+    hashes = {}
+    while True:
+        if options.get("indico_url"):
+            try:
+                fetch_exports(options, documents)
+            except Exception as e:
+                print(f"Не удалось загрузить данные из Indico: {e}", file=sys.stderr)
+
+        changed = {}
+        watched = sorted({SOURCES[kind] for kind in documents})
+        if options.get("field_mapping") and "contributions" in watched:
+            watched.append("field_mapping")
+        for source in watched:
+            try:
+                current = file_hash(options[source])
+            except OSError as e:
+                print(f"Не удалось прочитать {options[source]}: {e}", file=sys.stderr)
+                continue
+            if hashes.get(source) != current:
+                changed[source] = current
+
+        # Правка соответствия полей меняет записи докладов: программа и отчёт пересоздаются
+        to_update = [kind for kind in documents
+                     if SOURCES[kind] in changed or SOURCES[kind] == "contributions" and "field_mapping" in changed]
+        if to_update:
+            try:
+                for path in generate_instrumented(options, to_update):
+                    print(f"Создан документ: {path}")
+            except Exception as e:
+                # Хеши не запоминаются: при следующем опросе попытка повторится
+                # (например, если документ был открыт в Word)
+                print(f"Не удалось создать документ: {e}", file=sys.stderr)
+            else:
+                hashes.update(changed)
+
+        time.sleep(interval)
+
+
+def run_batch_mode(options, documents, jobs):
+    """Создаёт документы всех кафедр и печатает сводку"""
+    from batch import format_summary, run_batch
+
+    try:
+        if options.get("indico_url"):
+            fetch_exports(options, documents)
+        summary = run_batch(options, documents, jobs)
+    except Exception as e:
+        print(f"Не удалось создать документы: {e}", file=sys.stderr)
+        return 1
+
+    print(format_summary(summary))
+    if options.get("summary"):
+        with open(options["summary"], "w", encoding="utf-8") as f:
+            json.dump(summary, f, ensure_ascii=False, indent=2)
+    return 1 if any(result["status"] == "error" for result in summary["documents"]) else 0
+
+
+def main(argv=None):
+    parser = build_parser()
+    args = parser.parse_args(argv)
+
+    try:
+        options = resolve_options(args)
+        check_output_options(options)
+        # Соответствие полей компилируется до разбора выгрузок, чтобы ошибки в файле были видны сразу
+        contribution_mapping(options.get("field_mapping"))
+        if options.get("split_by"):
+            if args.watch:
+                raise ConfigError("Пакетный режим (--split-by) не совмещается с --watch")
+            documents = batch_documents(options)
+        else:
+            documents = requested_documents(options)
+    except (ConfigError, OSError, ValueError) as e:
+        parser.error(str(e))
+
+    if args.check:
+        return check_exports(options, documents)
+
+    if options.get("split_by"):
+        return run_batch_mode(options, documents, args.jobs or options.get("jobs"))
+
+    if args.watch:
+        try:
+            watch(options, documents, args.interval)
+        except KeyboardInterrupt:
+            return 0
+
+    try:
+        if options.get("indico_url"):
+            fetch_exports(options, documents)
+        for path in generate_instrumented(options, documents):
+            print(f"Создан документ: {path}")
+    except Exception as e:
+        print(f"Не удалось создать документ: {e}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,20 @@
+"""Общие настройки тестов: медленные тесты запускаются только с ключом --run-slow"""
+import pytest
+
+
+def pytest_addoption(parser):
+    parser.addoption("--run-slow", action="store_true",
+                     help="запускать медленные тесты (выгрузки на 100 000 элементов)")
+
+
+def pytest_configure(config):
+    config.addinivalue_line("markers", "slow: медленный тест, запускается с --run-slow")
+
+
+def pytest_collection_modifyitems(config, items):
+    if config.getoption("--run-slow"):
+        return
+    skip_slow = pytest.mark.skip(reason="медленный тест: запустите pytest --run-slow")
+    for item in items:
+        if "slow" in item.keywords:
+            item.add_marker(skip_slow)
@@ -0,0 +1,197 @@
+import argparse
+import copy
+import io
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import generate_file1
+import generate_file2
+import generate_file3
+from field_mapping import contribution_mapping
+from generate_file3 import NoAcceptedPapersError
+from models import department_of, iter_contributions
+from validation import validate_contributions, validate_papers
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+
+DOCX_CONTENT_TYPE = "application/vnd.openxmlformats-officedocument.wordprocessingml.document"
+
+# Фабрики подготовленных базовых документов для каждого вида
+BASE_DOCUMENT_FACTORIES = {
+    "program": generate_file1.create_base_document,
+    "report": generate_file2.create_base_document,
+    "papers_list": generate_file3.create_base_document,
+}
+
+
+class JobError(Exception):
+    """Ошибка в параметрах задания"""
+
+
+class BaseDocumentCache:
+    """Хранит подготовленные базовые документы и выдаёт их копии"""
+
+    def __init__(self, compact=False):
+        self._lock = threading.Lock()
+        self._documents = {kind: factory(compact) for kind, factory in BASE_DOCUMENT_FACTORIES.items()}
+
+    def get(self, kind):
+        """Возвращает копию базового документа указанного вида"""
+        with self._lock:
+            return copy.deepcopy(self._documents[kind])
+
+
+def conference_data_from_job(job):
+    """Извлекает данные шапки из задания"""
+    conference = job.get("conference", {})
+    return {
+        "number": conference.get("number", ""),
+        "head": conference.get("head", ""),
+        "deputy": conference.get("deputy", ""),
+        "secretary": conference.get("secretary", ""),
+        "department": conference.get("department", ""),
+        "section": conference.get("section", ""),
+    }
+
+
+def run_job(kind, job, cache, compresslevel=None, mapping=None):
+    """Выполняет задание на создание документа и возвращает содержимое .docx.
+
+    mapping — соответствие полей докладов (см. field_mapping), по умолчанию — Indico.
+    """
+    if kind not in BASE_DOCUMENT_FACTORIES:
+        raise JobError(f"Неизвестный вид документа: {kind}")
+
+    # Задание проверяется и нормализуется целиком до копирования базового документа:
+    # при ошибках в выгрузке документ не формируется вовсе
+    if kind == "papers_list":
+        if "papers" not in job:
+            raise JobError("В задании отсутствует поле papers")
+        papers = list(validate_papers(job["papers"]))
+    else:
+        if "contributions" not in job:
+            raise JobError("В задании отсутствует поле contributions")
+        contributions = list(iter_contributions(validate_contributions(job["contributions"], mapping=mapping),
+                                                mapping.normalize if mapping is not None else None))
+
+    output = io.BytesIO()
+    doc = cache.get(kind)
+
+    if kind == "papers_list":
+        conference = job.get("conference", {})
+        department, section = department_of(conference)
+        generate_file3.generate_accepted_papers_list(
+            papers,
+            output,
+            conference.get("leader_name", ""),
+            conference.get("leader_email", ""),
+            conference.get("leader_phone", ""),
+            conference.get("number", ""),
+            doc=doc,
+            department=department,
+            section=section,
+            compresslevel=compresslevel
+        )
+    else:
+        generate = (generate_file1.generate_conference_program if kind == "program"
+                    else generate_file2.generate_conference_report)
+        generate(
+            conference_data_from_job(job),
+            contributions,
+            output,
+            streaming=bool(job.get("streaming", False)),
+            doc=doc,
+            compresslevel=compresslevel
+        )
+
+    return output.getvalue()
+
+
+class GenerationRequestHandler(BaseHTTPRequestHandler):
+    """Обработчик заданий: POST /program, /report или /papers_list с JSON в теле запроса"""
+
+    cache = None
+    compresslevel = None
+    field_mapping = None
+
+    def do_GET(self):
+        if self.path == "/health":
+            self._send(200, b"ok", "text/plain; charset=utf-8")
+        else:
+            self._send_error(404, "Не найдено")
+
+    def do_POST(self):
+        kind = self.path.strip("/")
+        try:
+            length = int(self.headers.get("Content-Length", 0))
+            job = json.loads(self.rfile.read(length) or b"{}")
+            if not isinstance(job, dict):
+                raise JobError("Задание должно быть объектом JSON")
+            try:
+                mapping = contribution_mapping(self.field_mapping)
+            except (OSError, ValueError) as e:
+                raise RuntimeError(f"соответствие полей {self.field_mapping}: {e}") from None
+            data = run_job(kind, job, self.cache, self.compresslevel, mapping)
+        except (JobError, NoAcceptedPapersError, ValueError, KeyError, TypeError) as e:
+            self._send_error(400, str(e))
+            return
+        except Exception as e:
+            self._send_error(500, f"Не удалось создать документ: {e}")
+            return
+
+        self._send(200, data, DOCX_CONTENT_TYPE)
+
+    def _send(self, status, body, content_type):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_error(self, status, message):
+        body = json.dumps({"error": message}, ensure_ascii=False).encode("utf-8")
+        self._send(status, body, "application/json; charset=utf-8")
+
+
+def create_server(host=DEFAULT_HOST, port=DEFAULT_PORT, compact=False, compresslevel=None, field_mapping=None):
+    """Создаёт HTTP-сервер с прогретым кешем базовых документов.
+
+    field_mapping — путь к JSON-файлу соответствия полей докладов; ошибки в нём сообщаются
+    при запуске, а изменённый файл перечитывается при следующем задании.
+    """
+    # Проверка файла до запуска сервиса
+    contribution_mapping(field_mapping)
+    handler = type("Handler", (GenerationRequestHandler,),
+                   {"cache": BaseDocumentCache(compact), "compresslevel": compresslevel,
+                    "field_mapping": field_mapping})
+    return ThreadingHTTPServer((host, port), handler)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Локальный сервис создания документов конференции")
+    parser.add_argument("--host", default=DEFAULT_HOST, help=f"адрес (по умолчанию {DEFAULT_HOST})")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT, help=f"порт (по умолчанию {DEFAULT_PORT})")
+    parser.add_argument("--compact", action="store_true",
+                        help="компактный базовый шаблон: в документах только нужные части и стили")
+    parser.add_argument("--compress-level", type=int, choices=range(10), metavar="0-9",
+                        help="степень сжатия архива .docx: 0 — без сжатия, 9 — наибольшее")
+    parser.add_argument("--field-mapping", help="JSON-файл соответствия полей записи доклада и выгрузки Indico")
+    args = parser.parse_args(argv)
+
+    try:
+        server = create_server(args.host, args.port, args.compact, args.compress_level, args.field_mapping)
+    except (OSError, ValueError) as e:
+        parser.error(str(e))
+    print(f"Сервис запущен: http://{args.host}:{args.port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,307 @@
+import codecs
+import gc
+import json
+import mmap
+import os
+from contextlib import contextmanager
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+CHUNK_SIZE = 64 * 1024
+PAPERS_KEY = "papers"
+
+# Переменная окружения для выбора разборщика: json — только стандартный json;
+# orjson — ещё и массивы выгрузок разбираются orjson целиком (быстрее, но на время
+# разбора в памяти весь документ). По умолчанию orjson разбирает только load_json,
+# а массивы читаются потоково
+BACKEND_ENV = "INDOX_JSON_BACKEND"
+
+_decoder = json.JSONDecoder()
+_WHITESPACE = " \t\n\r"
+
+
+class ExportFormatError(ValueError):
+    """Файл выгрузки не является корректным JSON в кодировке UTF-8"""
+
+
+def _skip_whitespace(buffer, pos):
+    """Пропускает пробельные символы начиная с позиции pos"""
+    while pos < len(buffer) and buffer[pos] in _WHITESPACE:
+        pos += 1
+    return pos
+
+
+def json_backend():
+    """Разборщик load_json: orjson, если он установлен, иначе стандартный json"""
+    if orjson is None or os.environ.get(BACKEND_ENV) == "json":
+        return "json"
+    return "orjson"
+
+
+def parses_arrays_whole():
+    """Разбирает ли iter_json_array файл orjson целиком: только если это выбрано явно"""
+    return orjson is not None and os.environ.get(BACKEND_ENV) == "orjson"
+
+
+@contextmanager
+def gc_paused():
+    """Отключает сборщик мусора на время разбора: разобранный JSON не содержит циклов,
+    а повторные обходы растущей кучи занимают заметную часть времени загрузки"""
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if enabled:
+            gc.enable()
+
+
+@contextmanager
+def _mapped(path):
+    """Отображает файл в память; пустой файл отдаётся как пустая строка байтов"""
+    with open(path, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            yield b""
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            yield data
+
+
+def _bom_length(data):
+    return len(codecs.BOM_UTF8) if data[:len(codecs.BOM_UTF8)] == codecs.BOM_UTF8 else 0
+
+
+def _truncated_error(path):
+    return ExportFormatError(f"Файл {path} не в кодировке UTF-8: оборванный символ в конце файла")
+
+
+def _encoding_error(path, error, position):
+    """Недопустимый байт error.object[error.start]; position — его позиция в файле"""
+    return ExportFormatError(
+        f"Файл {path} не в кодировке UTF-8: недопустимый байт 0x{error.object[error.start]:02x} (байт {position})"
+    )
+
+
+def _decode_error(path, start, error):
+    # Символ, оборванный концом файла, описывается так же, как при потоковом чтении
+    if error.end == len(error.object) and error.reason == "unexpected end of data":
+        return _truncated_error(path)
+    return _encoding_error(path, error, start + error.start)
+
+
+def _check_not_empty(path, size, start):
+    if size <= start:
+        raise ExportFormatError(f"Файл {path} пуст")
+
+
+def _syntax_error(path, message, position):
+    return ExportFormatError(f"Некорректный JSON в файле {path}: {message} (символ {position})")
+
+
+# Результат _orjson_load, если orjson не разобрал файл
+_INVALID = object()
+
+
+def _orjson_load(path):
+    """Разбирает файл orjson целиком (BOM пропускается); _INVALID, если файл не разобрался.
+
+    Сообщения orjson об ошибках и их позиции отличаются от стандартного json,
+    поэтому ошибку описывает повторный разбор стандартным json — так она
+    не зависит от установленного разборщика.
+    """
+    with _mapped(path) as data:
+        start = _bom_length(data)
+        try:
+            with gc_paused(), memoryview(data) as view:
+                return orjson.loads(view[start:])
+        except orjson.JSONDecodeError:
+            return _INVALID
+
+
+def load_json(path):
+    """Загружает JSON-файл целиком: файл отображается в память и разбирается orjson,
+    а если он не установлен — стандартным json. Метка порядка байтов (BOM) пропускается."""
+    if json_backend() == "orjson":
+        document = _orjson_load(path)
+        if document is not _INVALID:
+            return document
+    with _mapped(path) as data:
+        start = _bom_length(data)
+        _check_not_empty(path, len(data), start)
+        try:
+            text = str(data[start:], "utf-8")
+        except UnicodeDecodeError as e:
+            raise _decode_error(path, start, e) from None
+        try:
+            with gc_paused():
+                return json.loads(text)
+        except json.JSONDecodeError as e:
+            raise _syntax_error(path, e.msg, e.pos) from None
+
+
+def _array_items(path, data, key):
+    """Элементы разобранного массива; отданные элементы сразу освобождаются"""
+    if key is not None:
+        if not isinstance(data, dict):
+            raise ExportFormatError(f"Ожидался объект JSON верхнего уровня в файле {path}")
+        if key not in data:
+            raise ExportFormatError(f"В JSON нет поля {key}")
+        data = data[key]
+    if not isinstance(data, list):
+        raise ExportFormatError(f"Ожидался массив JSON в поле {key}" if key else "Ожидался массив JSON верхнего уровня")
+
+    data.reverse()
+    while data:
+        yield data.pop()
+
+
+def _stream_json_array(path, chunk_size, key):
+    """Потоковый разбор массива стандартным json: в памяти только текущий блок файла.
+
+    Файл читается обычными блоками, а не через отображение в память: прочитанные
+    страницы отображения остались бы в памяти процесса до конца разбора.
+    """
+    with open(path, "rb") as f:
+        text_decoder = codecs.getincrementaldecoder("utf-8")()
+        offset = _bom_length(f.read(len(codecs.BOM_UTF8)))
+        f.seek(offset)
+        _check_not_empty(path, os.fstat(f.fileno()).st_size, offset)
+        buffer = ""
+        pos = 0
+        consumed = 0  # Символов файла перед началом буфера
+        eof = False
+
+        def read_more():
+            nonlocal buffer, pos, consumed, offset, eof
+            chunk = b"" if eof else f.read(chunk_size)
+            if not chunk:
+                if not eof:
+                    eof = True
+                    try:
+                        text_decoder.decode(b"", final=True)
+                    except UnicodeDecodeError:
+                        raise _truncated_error(path) from None
+                return False
+
+            # Байты незавершённого символа с прошлого блока декодер держит у себя
+            pending = len(text_decoder.getstate()[0])
+            try:
+                text = text_decoder.decode(chunk)
+            except UnicodeDecodeError as e:
+                raise _encoding_error(path, e, offset - pending + e.start) from None
+            offset += len(chunk)
+            # Отбрасываем уже разобранную часть, чтобы буфер не рос
+            consumed += pos
+            buffer = buffer[pos:] + text
+            pos = 0
+            return True
+
+        def next_char():
+            nonlocal pos
+            while True:
+                pos = _skip_whitespace(buffer, pos)
+                if pos < len(buffer):
+                    return buffer[pos]
+                if not read_more():
+                    return ""
+
+        def next_value():
+            nonlocal pos
+            while True:
+                next_char()
+                try:
+                    value, end = _decoder.raw_decode(buffer, pos)
+                except json.JSONDecodeError as e:
+                    # Значение не поместилось в буфер — дочитываем файл
+                    if eof or not read_more():
+                        raise _syntax_error(path, e.msg, consumed + e.pos) from None
+                    continue
+                if end == len(buffer) and not eof and read_more():
+                    # Значение могло оборваться на границе блока (например, число)
+                    continue
+                pos = end
+                return value
+
+        def expect(char, message):
+            nonlocal pos
+            if next_char() != char:
+                raise ExportFormatError(message)
+            pos += 1
+
+        if key is not None:
+            # Ищем нужное поле, пропуская значения остальных
+            expect("{", f"Ожидался объект JSON верхнего уровня в файле {path}")
+            while True:
+                if next_char() == "}":
+                    raise ExportFormatError(f"В JSON нет поля {key}")
+                name = next_value()
+                expect(":", "Ожидалось двоеточие после имени поля JSON")
+                if name == key:
+                    break
+                next_value()
+                if next_char() == ",":
+                    pos += 1
+
+        expect("[", f"Ожидался массив JSON в поле {key}" if key else "Ожидался массив JSON верхнего уровня")
+
+        def finish():
+            nonlocal pos
+            # Остаток файла проверяется так же, как при разборе целиком
+            if key is not None:
+                while True:
+                    char = next_char()
+                    if char == "}":
+                        pos += 1
+                        break
+                    if char != ",":
+                        raise _syntax_error(path, f"некорректный разделитель полей {char!r}", consumed + pos)
+                    pos += 1
+                    next_value()
+                    expect(":", "Ожидалось двоеточие после имени поля JSON")
+                    next_value()
+            if next_char() != "":
+                raise _syntax_error(path, "лишние данные после JSON", consumed + pos)
+
+        if next_char() == "]":
+            pos += 1
+            finish()
+            return
+
+        while True:
+            yield next_value()
+
+            separator = next_char()
+            if separator == "]":
+                pos += 1
+                finish()
+                return
+            if separator != ",":
+                raise _syntax_error(path, f"некорректный разделитель элементов {separator!r}", consumed + pos)
+            pos += 1
+
+
+def iter_json_array(path, chunk_size=CHUNK_SIZE, key=None):
+    """Последовательно возвращает элементы массива верхнего уровня JSON-файла.
+
+    С key массив берётся из поля key объекта верхнего уровня (например,
+    {"papers": [...]}). Файл разбирается потоково стандартным json: в памяти
+    только текущий блок и элемент, значения остальных полей разбираются
+    и отбрасываются. С INDOX_JSON_BACKEND=orjson файл разбирается orjson
+    целиком (быстрее, но на время разбора в памяти весь документ).
+    Ошибки кодировки и формата в обоих случаях — ExportFormatError; если orjson
+    не разобрал файл, ошибку описывает потоковый разбор, поэтому сообщение
+    и позиция не зависят от разборщика.
+    """
+    if parses_arrays_whole():
+        document = _orjson_load(path)
+        if document is not _INVALID:
+            return _array_items(path, document, key)
+    return _stream_json_array(path, chunk_size, key)
+
+
+def iter_papers(path, chunk_size=CHUNK_SIZE):
+    """Последовательно возвращает публикации из выгрузки вида {"papers": [...]}"""
+    return iter_json_array(path, chunk_size, key=PAPERS_KEY)
@@ -0,0 +1,180 @@
+import hashlib
+import marshal
+import os
+import sqlite3
+import time
+import zlib
+
+from data_loader import iter_json_array, iter_papers
+from models import AcceptedPaper, Contribution, iter_accepted_papers, iter_contributions, parse_start_dt
+from validation import validate_contributions, validate_papers
+
+# Версия формата записей: увеличить при изменении полей Contribution или AcceptedPaper
+# либо того, как они заполняются из выгрузки
+RECORD_FORMAT = 3
+
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+CACHE_FILE_NAME = "exports.sqlite3"
+HASH_BLOCK_SIZE = 1024 * 1024
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS exports (
+    kind TEXT NOT NULL,
+    path TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    sha256 TEXT NOT NULL,
+    format INTEGER NOT NULL,
+    data BLOB NOT NULL,
+    last_used REAL NOT NULL,
+    PRIMARY KEY (kind, path)
+)
+"""
+
+
+def default_cache_path():
+    """Путь к кешу в каталоге пользователя (LOCALAPPDATA в Windows, ~/.cache в остальных системах)"""
+    base = os.environ.get("LOCALAPPDATA") or os.environ.get("XDG_CACHE_HOME") or os.path.expanduser("~/.cache")
+    return os.path.join(base, "Indox", CACHE_FILE_NAME)
+
+
+def file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(HASH_BLOCK_SIZE), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def pack_contributions(contributions):
+    """Упаковывает доклады: кортежи полей через marshal, сжатие zlib"""
+    rows = [(c.session, c.start.isoformat() if c.start else None, c.room, c.speaker, c.group, c.title, c.status,
+             c.id, c.track, c.session_code)
+            for c in contributions]
+    return zlib.compress(marshal.dumps(rows), 1)
+
+
+def unpack_contributions(data):
+    return [Contribution(session, parse_start_dt(start), *rest)
+            for session, start, *rest in marshal.loads(zlib.decompress(data))]
+
+
+def pack_papers(papers):
+    rows = [(p.submitter, p.title, p.contribution_id, p.track) for p in papers]
+    return zlib.compress(marshal.dumps(rows), 1)
+
+
+def unpack_papers(data):
+    return [AcceptedPaper(*row) for row in marshal.loads(zlib.decompress(data))]
+
+
+class ExportCache:
+    """Кеш нормализованных выгрузок в SQLite.
+
+    Запись ищется по пути, размеру и времени изменения файла, а если они
+    изменились — по SHA-256 содержимого. Поэтому второй документ по той же
+    выгрузке (и та же выгрузка, скачанная заново) не разбирает JSON повторно.
+    Общий объём ограничен max_bytes; давно не использованные записи удаляются.
+    """
+
+    def __init__(self, path=None, max_bytes=DEFAULT_MAX_BYTES):
+        self.path = path or default_cache_path()
+        self.max_bytes = max_bytes
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        with self._connect() as db:
+            db.execute(SCHEMA)
+
+    def _connect(self):
+        # Отдельное соединение на каждую операцию: кешем пользуются рабочие потоки GUI
+        db = sqlite3.connect(self.path, timeout=30)
+        db.execute("PRAGMA journal_mode=WAL")
+        return db
+
+    def _lookup(self, kind, path):
+        stat = os.stat(path)
+        with self._connect() as db:
+            row = db.execute(
+                "SELECT data FROM exports WHERE kind = ? AND path = ? AND size = ? AND mtime_ns = ? AND format = ?",
+                (kind, path, stat.st_size, stat.st_mtime_ns, RECORD_FORMAT)
+            ).fetchone()
+            if row:
+                db.execute("UPDATE exports SET last_used = ? WHERE kind = ? AND path = ?", (time.time(), kind, path))
+                return row[0], None
+
+            # Файл перезаписан или скачан заново — сверяем содержимое
+            sha256 = file_sha256(path)
+            row = db.execute("SELECT data FROM exports WHERE kind = ? AND sha256 = ? AND format = ?",
+                             (kind, sha256, RECORD_FORMAT)).fetchone()
+            if row:
+                self._store(db, kind, path, stat, sha256, row[0])
+                return row[0], None
+        return None, (stat, sha256)
+
+    def _store(self, db, kind, path, stat, sha256, data):
+        db.execute(
+            "INSERT OR REPLACE INTO exports (kind, path, size, mtime_ns, sha256, format, data, last_used) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            (kind, path, stat.st_size, stat.st_mtime_ns, sha256, RECORD_FORMAT, data, time.time())
+        )
+
+    def _load(self, kind, path, parse, pack, unpack):
+        path = os.path.abspath(path)
+        data, file_info = self._lookup(kind, path)
+        if data is not None:
+            return unpack(data)
+
+        records = parse()
+        with self._connect() as db:
+            self._store(db, kind, path, *file_info, pack(records))
+            self._evict(db)
+        return records
+
+    def _evict(self, db):
+        """Удаляет давно не использованные записи, пока объём кеша больше max_bytes"""
+        total = db.execute("SELECT COALESCE(SUM(LENGTH(data)), 0) FROM exports").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        for kind, path, size in db.execute(
+                "SELECT kind, path, LENGTH(data) FROM exports ORDER BY last_used").fetchall():
+            db.execute("DELETE FROM exports WHERE kind = ? AND path = ?", (kind, path))
+            total -= size
+            if total <= self.max_bytes:
+                break
+
+    def load_contributions(self, path, wrap=None, mapping=None):
+        """Нормализованные доклады выгрузки; wrap оборачивает поток элементов при разборе (например, для отмены).
+
+        mapping — соответствие полей (см. field_mapping.ContributionMapping);
+        записи по нестандартному соответствию хранятся отдельно.
+        """
+        kind = "contributions"
+        if mapping is not None and not mapping.is_default:
+            kind = f"contributions:{mapping.fingerprint[:16]}"
+
+        def parse():
+            items = iter_json_array(path)
+            # В кеш попадают только выгрузки, прошедшие проверку
+            return list(iter_contributions(validate_contributions(wrap(items) if wrap else items, path, mapping),
+                                           mapping.normalize if mapping is not None else None))
+
+        return self._load(kind, path, parse, pack_contributions, unpack_contributions)
+
+    def load_papers(self, path, wrap=None):
+        """Принятые к публикации работы из выгрузки публикаций"""
+        def parse():
+            papers = iter_papers(path)
+            return list(iter_accepted_papers(validate_papers(wrap(papers) if wrap else papers, path)))
+
+        return self._load("papers", path, parse, pack_papers, unpack_papers)
+
+    def clear(self):
+        with self._connect() as db:
+            db.execute("DELETE FROM exports")
+
+
+def open_export_cache(path):
+    """Открывает кеш по значению параметра export_cache: None или false — без кеша,
+    пустой путь или true — кеш в каталоге пользователя, иначе — файл path"""
+    if path is None or path is False:
+        return None
+    return ExportCache(path if isinstance(path, str) and path else None)
@@ -0,0 +1,403 @@
+import hashlib
+import json
+import os
+from functools import lru_cache
+
+from models import GROUP_FIELD_NAME, Contribution, parse_start_dt, track_code
+from validation import ID_RULE, SCALAR_RULE, START_RULE, TRACK_RULE, compile_rule, rule
+
+# Поля записи Contribution в порядке аргументов конструктора
+CONTRIBUTION_FIELDS = Contribution.__slots__
+
+# Соответствие полей записи доклада и выгрузки Indico. У каждого поля:
+# path — путь в элементе выгрузки через точку (номер — элемент массива) или список
+# путей, из которых берётся первое непустое значение; custom_field — название
+# (строка) или id (число) дополнительного поля формы из custom_fields; source —
+# другое поле записи; default — значение, если его нет в выгрузке; transform —
+# преобразование (имя или объект {"name": ..., параметры}, см. TRANSFORMS); без него
+# значение приводится к типу поля записи (см. FIELD_TYPES)
+DEFAULT_FIELD_MAPPING = {
+    "session": {"path": "session.friendly_id", "default": "1", "transform": "str"},
+    "start": {"path": "start_dt", "transform": "datetime"},
+    "room": {"path": "room_name", "default": ""},
+    "speaker": {"path": "persons.0.full_name", "default": ""},
+    "group": {"custom_field": GROUP_FIELD_NAME, "default": ""},
+    "title": {"path": "title", "default": ""},
+    # Группа магистрантов оканчивается на «М» (или латинскую M), остальные — студенты
+    "status": {"source": "group", "transform": {"name": "group_status", "suffixes": "MМ", "match": "магистр",
+                                                "otherwise": "студент"}},
+    "id": {"path": "id"},
+    "track": {"path": "track", "transform": "track_code"},
+    "session_code": {"path": ["session.code", "session.title"], "default": ""},
+}
+
+# Тип каждого поля записи: text — строка, datetime — дата и время начала (или None),
+# id — идентификатор как в выгрузке (число, строка или None)
+FIELD_TYPES = {
+    "session": "text",
+    "start": "datetime",
+    "room": "text",
+    "speaker": "text",
+    "group": "text",
+    "title": "text",
+    "status": "text",
+    "id": "id",
+    "track": "text",
+    "session_code": "text",
+}
+
+# Преобразование, которым поле без transform приводится к своему типу (id не меняется)
+IMPLICIT_TRANSFORMS = {"text": "str", "datetime": "datetime"}
+
+CUSTOM_FIELDS_KEY = "custom_fields"
+
+
+class FieldMappingError(ValueError):
+    """Некорректный файл соответствия полей"""
+
+
+def _text(value):
+    """Строка для поля записи: None — пустая строка, число — его запись"""
+    if value.__class__ is str:
+        return value
+    return "" if value is None else str(value)
+
+
+def _group_status(suffixes="MМ", match="магистр", otherwise="студент"):
+    """Статус докладчика по номеру группы: match, если группа оканчивается на один из suffixes"""
+    suffixes = frozenset(str(suffixes).upper())
+
+    def transform(group):
+        if not group:
+            return ""
+        # Номер группы может быть числом, если его взяли из числового поля формы
+        return match if _text(group)[-1].upper() in suffixes else otherwise
+
+    return transform
+
+
+# Преобразования значений: имя -> фабрика, которая по параметрам возвращает функцию
+TRANSFORMS = {
+    "str": lambda: _text,
+    "datetime": lambda: parse_start_dt,
+    "track_code": lambda: track_code,
+    "group_status": _group_status,
+}
+
+# Для каждого преобразования: тип результата (см. FIELD_TYPES) и правило проверки
+# исходного значения в выгрузке
+TRANSFORM_TYPES = {
+    "str": ("text", SCALAR_RULE),
+    "datetime": ("datetime", START_RULE),
+    "track_code": ("text", TRACK_RULE),
+    "group_status": ("text", SCALAR_RULE),
+}
+
+# Проверки контейнеров на пути к значению; сообщения — как в остальной проверке выгрузки
+_validate_object = compile_rule(rule(dict))
+_validate_array = compile_rule(rule(list))
+
+
+def _path_keys(path):
+    return tuple(int(key) if key.isdigit() else key for key in path.split("."))
+
+
+def _path_getter(path, default):
+    keys = _path_keys(path)
+    if len(keys) == 1 and isinstance(keys[0], str):
+        key = keys[0]
+        return lambda item: item.get(key, default)
+
+    def get(item):
+        value = item
+        for key in keys:
+            try:
+                value = value[key]
+            except (KeyError, IndexError, TypeError):
+                return default
+        return value
+
+    return get
+
+
+def _path_checker(path, validate_value):
+    """Проверка значения по пути path функцией validate_value.
+
+    Объекты и массивы на пути тоже проверяются; отсутствующее значение
+    (или null по дороге к нему) ошибкой не считается — берётся default.
+    """
+    steps = []
+    label = ""
+    for key in _path_keys(path):
+        if isinstance(key, int):
+            steps.append((key, label, list, _validate_array))
+            label += f"[{key}]"
+        else:
+            steps.append((key, label, dict, _validate_object))
+            label += f".{key}"
+
+    def check(item):
+        value = item
+        for key, prefix, container, validate_container in steps:
+            if value.__class__ is not container:
+                if value is None:
+                    return None
+                return [(prefix, message) for _, message in validate_container(value)]
+            if container is dict:
+                if key not in value:
+                    return None
+            elif key >= len(value):
+                return None
+            value = value[key]
+        found = validate_value(value)
+        return [(label + found_path, message) for found_path, message in found] if found else None
+
+    return check
+
+
+def _first_of_getter(paths, default):
+    getters = [_path_getter(path, None) for path in paths]
+
+    def get(item):
+        for getter in getters:
+            value = getter(item)
+            if value:
+                return value
+        return default
+
+    return get
+
+
+class CustomFieldIndex:
+    """Таблица «название или id дополнительного поля -> позиция в custom_fields».
+
+    Форма Indico одна на всё мероприятие, поэтому поля у всех докладов
+    обычно стоят на одних и тех же позициях: поиск поля — одно обращение
+    к таблице и одна сверка. Таблица перестраивается, только если у доклада
+    другой набор полей.
+    """
+
+    def __init__(self):
+        self.positions = {}
+
+    def _rebuild(self, fields):
+        positions = {}
+        for i, field in enumerate(fields):
+            if isinstance(field, dict):
+                # При повторах берётся первое поле с таким названием, как и при поиске перебором
+                positions.setdefault(("name", field.get("name")), i)
+                positions.setdefault(("id", field.get("id")), i)
+        self.positions = positions
+        return positions
+
+    def _locator(self, key):
+        """Функция поиска позиции поля key (название или id) в custom_fields; None, если поля нет"""
+        table_key = ("id", key) if isinstance(key, int) else ("name", key)
+        attribute = table_key[0]
+
+        def locate(fields):
+            i = self.positions.get(table_key)
+            if i is None or i >= len(fields) or fields[i].__class__ is not dict or fields[i].get(attribute) != key:
+                # Таблица могла измениться в другом потоке, поэтому позиция берётся из своей копии
+                i = self._rebuild(fields).get(table_key)
+            return i
+
+        return locate
+
+    def getter(self, key, default):
+        """Функция доступа к значению поля key (название или id)"""
+        locate = self._locator(key)
+
+        def get(item):
+            fields = item.get(CUSTOM_FIELDS_KEY)
+            if not fields:
+                return default
+            i = locate(fields)
+            if i is None:
+                return default
+            return fields[i].get("value", default)
+
+        return get
+
+    def checker(self, key, validate_value):
+        """Проверка значения поля key функцией validate_value; отсутствующее поле ошибкой не считается"""
+        locate = self._locator(key)
+
+        def check(item):
+            fields = item.get(CUSTOM_FIELDS_KEY)
+            if fields is None:
+                return None
+            if fields.__class__ is not list:
+                return [(f".{CUSTOM_FIELDS_KEY}", message) for _, message in _validate_array(fields)]
+            i = locate(fields) if fields else None
+            if i is None or "value" not in fields[i]:
+                return None
+            found = validate_value(fields[i]["value"])
+            if not found:
+                return None
+            return [(f".{CUSTOM_FIELDS_KEY}[{i}].value{found_path}", message) for found_path, message in found]
+
+        return check
+
+
+def _transformed(getter, transform):
+    return lambda item: transform(getter(item))
+
+
+def _fits(result_type, field_type):
+    # В идентификатор можно записать и строку
+    return result_type == field_type or (field_type == "id" and result_type == "text")
+
+
+def _transform(spec, field_name):
+    """Имя и функция преобразования для поля field_name; без spec — приведение к типу поля"""
+    if not spec:
+        spec = IMPLICIT_TRANSFORMS.get(FIELD_TYPES[field_name])
+        if spec is None:
+            return None, None
+    if isinstance(spec, str):
+        spec = {"name": spec}
+    if not isinstance(spec, dict) or spec.get("name") not in TRANSFORMS:
+        raise FieldMappingError(f"Поле {field_name}: неизвестное преобразование {spec!r}; "
+                                f"доступны: {', '.join(TRANSFORMS)}")
+    name = spec["name"]
+    field_type = FIELD_TYPES[field_name]
+    if not _fits(TRANSFORM_TYPES[name][0], field_type):
+        suitable = [other for other, (result_type, _) in TRANSFORM_TYPES.items() if _fits(result_type, field_type)]
+        raise FieldMappingError(f"Поле {field_name}: преобразование {name} не подходит для поля типа {field_type}; "
+                                f"подходят: {', '.join(suitable)}")
+    params = {key: value for key, value in spec.items() if key != "name"}
+    try:
+        return name, TRANSFORMS[name](**params)
+    except TypeError as e:
+        raise FieldMappingError(f"Поле {field_name}: неверные параметры преобразования {name}: {e}") from None
+
+
+def merge_field_mapping(overrides):
+    """Соответствие полей по умолчанию, дополненное overrides (поля записи целиком заменяются)"""
+    if not isinstance(overrides, dict):
+        raise FieldMappingError("Соответствие полей должно быть объектом JSON {поле записи: описание}")
+    unknown = sorted(set(overrides) - set(CONTRIBUTION_FIELDS))
+    if unknown:
+        raise FieldMappingError(f"Неизвестные поля записи: {', '.join(unknown)}; "
+                                f"допустимы: {', '.join(CONTRIBUTION_FIELDS)}")
+    return dict(DEFAULT_FIELD_MAPPING, **overrides)
+
+
+class ContributionMapping:
+    """Соответствие полей, скомпилированное в функции доступа.
+
+    Описание разбирается один раз; normalize(элемент выгрузки) строит
+    Contribution за постоянное число обращений на поле, сколько бы
+    дополнительных полей ни было в форме. validate(элемент выгрузки)
+    проверяет значения по путям и дополнительным полям соответствия так же,
+    как validation.compile_rule (см. validation.validate_contributions).
+    fingerprint отличает записи, нормализованные по разным соответствиям
+    (например, в кеше выгрузок).
+    """
+
+    def __init__(self, mapping=None):
+        mapping = merge_field_mapping(mapping or {})
+        self.fingerprint = hashlib.sha256(json.dumps(mapping, ensure_ascii=False, sort_keys=True).encode()).hexdigest()
+        self.is_default = mapping == DEFAULT_FIELD_MAPPING
+        self.custom_fields = CustomFieldIndex()
+        self.normalize, self.validate = self._compile(mapping)
+
+    def _getter(self, name, spec, validate_value):
+        """Функция доступа к исходному значению поля и проверки этого значения"""
+        default = spec.get("default")
+        if "custom_field" in spec:
+            key = spec["custom_field"]
+            if not isinstance(key, (str, int)) or isinstance(key, bool):
+                raise FieldMappingError(f"Поле {name}: custom_field — название (строка) или id (число) поля формы")
+            return self.custom_fields.getter(key, default), [self.custom_fields.checker(key, validate_value)]
+        path = spec.get("path")
+        if isinstance(path, str) and path:
+            return _path_getter(path, default), [_path_checker(path, validate_value)]
+        if isinstance(path, list) and path and all(isinstance(p, str) and p for p in path):
+            return _first_of_getter(path, default), [_path_checker(p, validate_value) for p in path]
+        raise FieldMappingError(f"Поле {name}: нужен path (строка или список строк), custom_field или source")
+
+    def _compile(self, mapping):
+        getters = []
+        derived = []
+        checks = []
+        text_positions = []
+        for position, name in enumerate(CONTRIBUTION_FIELDS):
+            spec = mapping[name]
+            if not isinstance(spec, dict):
+                raise FieldMappingError(f"Поле {name}: описание должно быть объектом JSON")
+            transform_name, transform = _transform(spec.get("transform"), name)
+            if "source" in spec:
+                source = spec["source"]
+                if (source not in CONTRIBUTION_FIELDS or not isinstance(mapping[source], dict)
+                        or "source" in mapping[source]):
+                    raise FieldMappingError(f"Поле {name}: source должен указывать на поле записи из выгрузки")
+                derived.append((position, CONTRIBUTION_FIELDS.index(source), transform or (lambda value: value)))
+                getters.append(None)
+                continue
+            # Исходное значение проверяется по тому, что принимает его преобразование
+            raw_rule = TRANSFORM_TYPES[transform_name][1] if transform_name else ID_RULE
+            getter, field_checks = self._getter(name, spec, compile_rule(raw_rule))
+            if transform is _text:
+                # Строки приводятся в normalize без вызова функции: значения обычно уже строки
+                text_positions.append(position)
+            elif transform is not None:
+                getter = _transformed(getter, transform)
+            getters.append(getter)
+            checks.extend(field_checks)
+
+        direct = [(position, getter) for position, getter in enumerate(getters) if getter is not None]
+        size = len(CONTRIBUTION_FIELDS)
+
+        def normalize(item):
+            values = [None] * size
+            for position, getter in direct:
+                values[position] = getter(item)
+            for position in text_positions:
+                if values[position].__class__ is not str:
+                    values[position] = _text(values[position])
+            for position, source, transform in derived:
+                values[position] = transform(values[source])
+            return Contribution(*values)
+
+        def validate(item):
+            if item.__class__ is not dict:
+                return _validate_object(item)
+            problems = None
+            for check in checks:
+                found = check(item)
+                if found:
+                    if problems is None:
+                        problems = []
+                    problems.extend(found)
+            return problems
+
+        return normalize, validate
+
+
+def load_field_mapping(path):
+    """Читает JSON-файл соответствия полей и компилирует его (см. ContributionMapping)"""
+    try:
+        with open(path, encoding="utf-8") as f:
+            mapping = json.load(f)
+    except json.JSONDecodeError as e:
+        raise FieldMappingError(f"Некорректный JSON в файле соответствия полей {path}: {e}") from None
+    return ContributionMapping(mapping)
+
+
+def contribution_mapping(path=None):
+    """Скомпилированное соответствие полей из файла path (без пути — по умолчанию).
+
+    Файл компилируется один раз и перечитывается, если изменились время
+    его изменения или размер: --watch и демон подхватывают правку без перезапуска.
+    """
+    if not path:
+        return _compiled_mapping(None, None)
+    stat = os.stat(path)
+    return _compiled_mapping(path, (stat.st_mtime_ns, stat.st_size))
+
+
+@lru_cache(maxsize=16)
+def _compiled_mapping(path, version):
+    return load_field_mapping(path) if path else ContributionMapping()
@@ -0,0 +1,89 @@
+import hashlib
+import os
+import tempfile
+
+# Сколько фрагментов хранить по умолчанию; при превышении удаляются давно не использованные
+DEFAULT_MAX_ENTRIES = 5000
+FRAGMENT_SUFFIX = ".xml"
+
+
+def fragment_key(parts, talks=()):
+    """Вычисляет ключ фрагмента по параметрам его оформления и нормализованным докладам"""
+    digest = hashlib.sha256(repr(parts).encode("utf-8"))
+    for talk in talks:
+        digest.update(repr(tuple(getattr(talk, name) for name in talk.__slots__)).encode("utf-8"))
+    return digest.hexdigest()
+
+
+class FragmentCache:
+    """Хранит на диске готовую разметку заседаний между запусками.
+
+    Заседания, доклады которых не изменились с прошлой выгрузки, берутся
+    из кеша и вставляются в документ без повторного формирования.
+    """
+
+    def __init__(self, directory, max_entries=DEFAULT_MAX_ENTRIES):
+        self.directory = directory
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key):
+        return os.path.join(self.directory, key + FRAGMENT_SUFFIX)
+
+    def get(self, key):
+        """Возвращает сохранённый фрагмент или None"""
+        path = self._path(key)
+        try:
+            with open(path, encoding="utf-8") as f:
+                fragment = f.read()
+        except OSError:
+            self.misses += 1
+            return None
+
+        # Время изменения отмечает последнее использование (для очистки)
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        self.hits += 1
+        return fragment
+
+    def put(self, key, fragment):
+        """Сохраняет фрагмент; запись атомарна, чтобы параллельный запуск не прочитал половину файла"""
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                f.write(fragment)
+            os.replace(tmp_path, self._path(key))
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+
+    def render(self, key, render):
+        """Возвращает фрагмент из кеша или формирует его функцией render и сохраняет"""
+        fragment = self.get(key)
+        if fragment is None:
+            fragment = render()
+            self.put(key, fragment)
+        return fragment
+
+    def prune(self):
+        """Удаляет давно не использованные фрагменты сверх max_entries"""
+        entries = []
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith(FRAGMENT_SUFFIX):
+                entries.append((entry.stat().st_mtime, entry.path))
+        if len(entries) <= self.max_entries:
+            return 0
+
+        entries.sort()
+        removed = 0
+        for _, path in entries[:len(entries) - self.max_entries]:
+            try:
+                os.remove(path)
+                removed += 1
+            except OSError:
+                pass
+        return removed
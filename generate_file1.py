@@ -1,15 +1,26 @@
-from docx import Document
 from docx.shared import Pt, Cm
 from docx.enum.text import WD_ALIGN_PARAGRAPH
-from datetime import datetime
+from docx.enum.style import WD_STYLE_TYPE
 import docx
-
-RU_MONTHS = {
-    'January': 'января', 'February': 'февраля', 'March': 'марта',
-    'April': 'апреля', 'May': 'мая', 'June': 'июня',
-    'July': 'июля', 'August': 'августа', 'September': 'сентября',
-    'October': 'октября', 'November': 'ноября', 'December': 'декабря'
-}
+from fragment_cache import fragment_key
+from instrumentation import stage
+from models import build_session_index, department_of, format_date_russian
+from ooxml import (StreamingDocxWriter, add_style, new_document, paragraph_appender, paragraph_xml, run_xml,
+                   save_document, set_style, style_id)
+from pipeline import render_fragments
+from split_output import split_into_parts, write_parts_archive
+
+# Именованные стили программы
+PROGRAM_TITLE_STYLE = "Program Title"
+SECTION_TITLE_STYLE = "Section Title"
+SESSION_HEADER_STYLE = "Session Header"
+SESSION_PLACE_STYLE = "Session Place"
+SESSION_NOTE_STYLE = "Session Note"
+SPEAKER_LINE_STYLE = "Speaker Line"
+TOPIC_LINE_STYLE = "Topic Line"
+
+# Версия разметки заседания для кеша фрагментов: увеличить при изменении session_xml
+SESSION_FRAGMENT_VERSION = 1
 
 
 def set_document_styles(doc):
@@ -25,64 +36,32 @@ def set_document_styles(doc):
             r'<w:contextualSpacing xmlns:w="http://schemas.openxmlformats.org/wordprocessingml/2006/main"/>')
     )
 
-
-def format_date_russian(date_str):
-    """Форматирует дату в русский формат (день месяц)"""
-    try:
-        date_obj = datetime.strptime(date_str.strip(), "%Y-%m-%d")
-        eng_month = date_obj.strftime("%B")
-        ru_month = RU_MONTHS.get(eng_month, eng_month)
-        return f"{date_obj.day} {ru_month}"
-    except Exception:
-        return date_str
-
-
-def process_contributions(contributions):
-    """Обрабатывает данные из JSON"""
-    processed = []
-    for item in contributions:
-        persons = item.get("persons", [{}])
-        speaker = persons[0] if persons else {}
-
-        group = ""
-        for field in item.get("custom_fields", []):
-            if field.get("name") == "Номер группы основного автора (докладчика)":
-                group = field.get("value", "")
-                break
-
-        start_dt = item.get("start_dt", "")
-        date = start_dt.split("T")[0] if start_dt else ""
-        time = start_dt.split("T")[1][:5] if start_dt else ""
-
-        processed.append({
-            "session": item.get("session", {}).get("friendly_id", "1"),
-            "date": date,
-            "time": time,
-            "aud": item.get("room_name", ""),
-            "full_name": speaker.get("full_name", ""),
-            "group": group,
-            "topic": item.get("title", "")
-        })
-    return processed
+    # Оформление шапки и заседаний задаётся стилями знака: абзацы остаются в стиле
+    # Normal, чтобы не изменилось подавление интервалов (contextualSpacing)
+    add_style(doc, PROGRAM_TITLE_STYLE, WD_STYLE_TYPE.CHARACTER, bold=True, italic=True, size=Pt(14))
+    add_style(doc, SECTION_TITLE_STYLE, WD_STYLE_TYPE.CHARACTER, bold=True, italic=True, size=Pt(12))
+    add_style(doc, SESSION_HEADER_STYLE, WD_STYLE_TYPE.CHARACTER, bold=True, size=Pt(14))
+    add_style(doc, SESSION_PLACE_STYLE, WD_STYLE_TYPE.CHARACTER, bold=True, size=Pt(12))
+    add_style(doc, SESSION_NOTE_STYLE, WD_STYLE_TYPE.CHARACTER, italic=True, size=Pt(14))
+    add_style(doc, TOPIC_LINE_STYLE, WD_STYLE_TYPE.CHARACTER, font_name='Times New Roman', size=Pt(14))
+    # Строка докладчика — нумерованный абзац на основе List Number
+    add_style(doc, SPEAKER_LINE_STYLE, WD_STYLE_TYPE.PARAGRAPH, base_style='List Number',
+              font_name='Times New Roman', size=Pt(14), space_after=Pt(0))
 
 
 def add_conference_header(doc, conference_data):
     """Добавляет шапку программы конференции"""
+    department, section_name = department_of(conference_data)
+
     # Заголовок программы
     title = doc.add_paragraph()
     title.alignment = WD_ALIGN_PARAGRAPH.CENTER
-    run = title.add_run(f"Программа {conference_data['number']} МСНК ГУАП")
-    run.bold = True
-    run.italic = True
-    run.font.size = Pt(14)
+    set_style(title.add_run(f"Программа {conference_data['number']} МСНК ГУАП"), PROGRAM_TITLE_STYLE)
 
     # Подзаголовок
     subtitle = doc.add_paragraph()
     subtitle.alignment = WD_ALIGN_PARAGRAPH.CENTER
-    run = subtitle.add_run("по кафедре № 43 компьютерных технологий и программной инженерии")
-    run.bold = True
-    run.italic = True
-    run.font.size = Pt(14)
+    set_style(subtitle.add_run(f"по кафедре № {department} {section_name}"), PROGRAM_TITLE_STYLE)
     subtitle.paragraph_format.space_after = Pt(0)
 
     p = doc.add_paragraph("")
@@ -93,10 +72,7 @@ def add_conference_header(doc, conference_data):
     p_section = doc.add_paragraph()
     p_section.alignment = WD_ALIGN_PARAGRAPH.LEFT
     p_section.paragraph_format.first_line_indent = Cm(1.27)
-    run = p_section.add_run("Секция каф.43. «компьютерных технологий и программной инженерии»")
-    run.bold = True
-    run.italic = True
-    run.font.size = Pt(12)
+    set_style(p_section.add_run(f"Секция каф.{department}. «{section_name}»"), SECTION_TITLE_STYLE)
     p_section.paragraph_format.space_after = Pt(16)
 
     # Руководство секции (не жирное, не курсив, отступ 2 см)
@@ -121,66 +97,97 @@ def add_conference_header(doc, conference_data):
 
 def add_session(doc, session_num, session_data, is_first_session=False):
     """Добавляет информацию о заседании"""
-    date_str = format_date_russian(session_data[0]["date"])
-    time = session_data[0]["time"]
-    aud = session_data[0]["aud"]
+    date_str = format_date_russian(session_data[0].start)
+    time = session_data[0].time
+    aud = session_data[0].room
+    add_paragraph = paragraph_appender(doc)
 
     # Заголовок заседания
-    p1 = doc.add_paragraph()
-    run = p1.add_run(f"Заседание {session_num}.")
-    run.bold = True
-    run.font.size = Pt(14)
+    p1 = add_paragraph()
+    set_style(p1.add_run(f"Заседание {session_num}."), SESSION_HEADER_STYLE)
     p1.paragraph_format.space_after = Pt(6)
 
     # Дата и место
-    p2 = doc.add_paragraph()
-    run = p2.add_run(f"{date_str}, {time}, ауд. {aud}.")
-    run.bold = True
-    run.font.size = Pt(12)
+    p2 = add_paragraph()
+    set_style(p2.add_run(f"{date_str}, {time}, ауд. {aud}."), SESSION_PLACE_STYLE)
     p2.paragraph_format.space_after = Pt(6)
 
     # Служебная фраза (только для первого заседания)
     if is_first_session:
-        p3 = doc.add_paragraph()
-        run = p3.add_run("По решению руководителя секции порядок следования докладов может быть изменен.")
-        run.italic = True
-        run.font.size = Pt(14)
+        p3 = add_paragraph()
+        set_style(p3.add_run("По решению руководителя секции порядок следования докладов может быть изменен."),
+                  SESSION_NOTE_STYLE)
         p3.paragraph_format.space_after = Pt(0)
-        p = doc.add_paragraph("")
+        p = add_paragraph("")
         p.paragraph_format.space_after = Pt(0)
         p.paragraph_format.line_spacing = 1.15
 
     # Участники (шрифт 14 pt)
     for i, item in enumerate(session_data, 1):
-        if not item["full_name"] or not item["topic"]:
+        if not item.speaker or not item.title:
             continue
 
         # Имя и группа
-        para = doc.add_paragraph(style='List Number')
+        para = set_style(add_paragraph(), SPEAKER_LINE_STYLE)
         para.paragraph_format.left_indent = Cm(1.25)
         para.paragraph_format.first_line_indent = Cm(-0.75)
-        para.paragraph_format.space_after = Pt(0)
 
-        full = f"{item['full_name']}"
-        if item["group"]:
-            full += f", группа {item['group']}"
+        full = f"{item.speaker}"
+        if item.group:
+            full += f", группа {item.group}"
 
-        run = para.add_run(full)
-        run.font.name = "Times New Roman"
-        run.font.size = Pt(14)  # Шрифт 14 для списка студентов
+        para.add_run(full)
 
         # Тема доклада (шрифт 14 pt)
-        title = doc.add_paragraph()
+        title = add_paragraph()
         title.paragraph_format.left_indent = Cm(1.25)
         title.paragraph_format.space_after = Pt(12)
-        run2 = title.add_run(item["topic"])
-        run2.font.name = "Times New Roman"
-        run2.font.size = Pt(14)  # Шрифт 14 для тем докладов
+        set_style(title.add_run(item.title), TOPIC_LINE_STYLE)
+
+
+def session_xml(session_num, session_data, is_first_session=False):
+    """Формирует разметку заседания для потоковой записи (как add_session)"""
+    date_str = format_date_russian(session_data[0].start)
+    time = session_data[0].time
+    aud = session_data[0].room
+
+    parts = [
+        paragraph_xml(run_xml(f"Заседание {session_num}.", style=style_id(SESSION_HEADER_STYLE)),
+                      space_after=Pt(6)),
+        paragraph_xml(run_xml(f"{date_str}, {time}, ауд. {aud}.", style=style_id(SESSION_PLACE_STYLE)),
+                      space_after=Pt(6)),
+    ]
+
+    if is_first_session:
+        parts.append(paragraph_xml(
+            run_xml("По решению руководителя секции порядок следования докладов может быть изменен.",
+                    style=style_id(SESSION_NOTE_STYLE)),
+            space_after=Pt(0)
+        ))
+        parts.append(paragraph_xml(space_after=Pt(0), line_spacing=1.15))
+
+    for item in session_data:
+        if not item.speaker or not item.title:
+            continue
+
+        full = f"{item.speaker}"
+        if item.group:
+            full += f", группа {item.group}"
+
+        parts.append(paragraph_xml(
+            run_xml(full),
+            style=style_id(SPEAKER_LINE_STYLE), left_indent=Cm(1.25), first_line_indent=Cm(-0.75)
+        ))
+        parts.append(paragraph_xml(
+            run_xml(item.title, style=style_id(TOPIC_LINE_STYLE)),
+            space_after=Pt(12), left_indent=Cm(1.25)
+        ))
+    return "".join(parts)
 
 
-def generate_conference_program(conference_data, contributions, output_path):
-    """Генерирует файл программы конференции"""
-    doc = Document()
+def create_base_document(compact=False):
+    """Создаёт пустой документ программы с настроенными полями и стилями"""
+    doc = new_document(compact)
     sections = doc.sections
     for section in sections:
         section.top_margin = Cm(2.54)
@@ -189,20 +196,69 @@ def generate_conference_program(conference_data, contributions, output_path):
         section.right_margin = Cm(2.54)
 
     set_document_styles(doc)
-
-    processed_entries = process_contributions(contributions)
-    add_conference_header(doc, conference_data)
-
-    sessions = {}
-    for entry in processed_entries:
-        session = entry["session"]
-        if session not in sessions:
-            sessions[session] = []
-        sessions[session].append(entry)
-
-    # Сортируем заседания и добавляем их в документ
-    sorted_sessions = sorted(sessions.items(), key=lambda x: int(x[0]))
-    for i, (session_num, session_data) in enumerate(sorted_sessions):
-        add_session(doc, session_num, session_data, is_first_session=(i == 0))
-
-    doc.save(output_path)
\ No newline at end of file
+    return doc
+
+
+def generate_conference_program(conference_data, contributions, output_path, streaming=False, doc=None,
+                                progress=None, fragment_cache=None, compact=False, compresslevel=None,
+                                workers=None, split_output=None):
+    """Генерирует файл программы конференции.
+
+    При streaming=True заседания записываются в архив по мере формирования,
+    без построения всего документа в памяти. Через doc можно передать
+    заранее подготовленный базовый документ (см. create_base_document).
+    Функция progress(done, total) вызывается после каждого заседания.
+    С fragment_cache (см. FragmentCache) неизменившиеся заседания берутся
+    из кеша; документ при этом собирается потоковой записью.
+    compact=True строит документ на компактном шаблоне (см. ooxml.minimal_template),
+    compresslevel (0–9) задаёт степень сжатия архива.
+    При workers больше одного разметка заседаний формируется в пуле из
+    workers процессов и собирается потоковой записью в порядке заседаний.
+    С split_output ("day" или "session") output_path — zip-архив с отдельным
+    документом на каждый день или заседание и оглавлением (см. split_output.py).
+    """
+    # Группировка читает и нормализует доклады, если они переданы потоком, поэтому
+    # идёт первой: ошибки проверки выгрузки выбрасываются до работы с документом.
+    # Заседания и доклады в них упорядочены по времени начала
+    with stage("group") as group_stage:
+        sorted_sessions = build_session_index(contributions)
+        group_stage.count = sum(len(session_data) for _, session_data in sorted_sessions)
+
+    if doc is None:
+        doc = create_base_document(compact)
+
+    with stage("header"):
+        add_conference_header(doc, conference_data)
+
+    if streaming or fragment_cache is not None or workers or split_output:
+        # При потоковой записи сохранение совмещено с формированием
+        with stage("render") as render_stage:
+            misses = fragment_cache.misses if fragment_cache is not None else 0
+            tasks = [(session_num, session_data, i == 0)
+                     for i, (session_num, session_data) in enumerate(sorted_sessions)]
+            keys = None
+            if fragment_cache is not None:
+                keys = [fragment_key(("program", SESSION_FRAGMENT_VERSION, session_num, is_first_session),
+                                     session_data) for session_num, session_data, is_first_session in tasks]
+            fragments = render_fragments(session_xml, tasks, workers, fragment_cache, keys, progress)
+            if split_output:
+                write_parts_archive(output_path, doc, split_into_parts(sorted_sessions, split_output), fragments,
+                                    "Программа", "Части программы:", compresslevel=compresslevel)
+            else:
+                with StreamingDocxWriter(doc, output_path, compresslevel) as writer:
+                    for fragment in fragments:
+                        writer.write(fragment)
+
+            # Число заново сформированных заседаний
+            render_stage.count = (fragment_cache.misses - misses if fragment_cache is not None
+                                  else len(sorted_sessions))
+        return
+
+    with stage("render", len(sorted_sessions)):
+        for i, (session_num, session_data) in enumerate(sorted_sessions):
+            add_session(doc, session_num, session_data, is_first_session=(i == 0))
+            if progress:
+                progress(i + 1, len(sorted_sessions))
+
+    with stage("save"):
+        save_document(doc, output_path, compresslevel)
\ No newline at end of file
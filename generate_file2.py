@@ -1,17 +1,39 @@
-from docx import Document
-from docx.shared import Pt, Cm
+from docx.shared import Pt, Cm, Emu
 from docx.enum.text import WD_ALIGN_PARAGRAPH
 from docx.enum.table import WD_ALIGN_VERTICAL
-from datetime import datetime
-from docx.oxml import OxmlElement
-from docx.oxml.ns import qn
+from docx.enum.style import WD_STYLE_TYPE
+from docx.oxml import OxmlElement, parse_xml
+from docx.oxml.ns import nsdecls, qn
+from fragment_cache import fragment_key
+from instrumentation import stage
+from models import build_session_index, department_of, format_date_russian
+from ooxml import (ALIGN_CENTER, ALIGN_LEFT, StreamingDocxWriter, add_style, new_document, paragraph_xml, run_xml,
+                   save_document, set_style, style_id)
+from pipeline import render_fragments
+from split_output import split_into_parts, write_parts_archive
 
-RU_MONTHS = {
-    'January': 'января', 'February': 'февраля', 'March': 'марта',
-    'April': 'апреля', 'May': 'мая', 'June': 'июня',
-    'July': 'июля', 'August': 'августа', 'September': 'сентября',
-    'October': 'октября', 'November': 'ноября', 'December': 'декабря'
-}
+
+# Ширины столбцов таблицы заседания
+TABLE_COLUMN_WIDTHS = [Cm(1.06), Cm(8.82), Cm(2.47), Cm(3.53)]
+
+TABLE_HEADERS = [
+    "№ п/п",
+    "Фамилия и инициалы докладчика, название доклада",
+    "Статус(магистр/студент)",
+    "Решение"
+]
+
+TABLE_BORDERS = ['top', 'left', 'bottom', 'right', 'insideH', 'insideV']
+
+# Именованные стили отчёта
+REPORT_TITLE_STYLE = "Report Title"
+SESSION_HEADER_STYLE = "Session Header"
+SESSION_INFO_STYLE = "Session Info"
+TABLE_HEADER_STYLE = "Table Header"
+TABLE_CELL_STYLE = "Table Cell"
+
+# Версия разметки заседания для кеша фрагментов: увеличить при изменении session_table_xml
+SESSION_FRAGMENT_VERSION = 1
 
 
 def set_document_styles(doc):
@@ -23,66 +45,36 @@ def set_document_styles(doc):
     style.paragraph_format.line_spacing = 1.15
     style.paragraph_format.space_after = Pt(0)
 
-
-def format_date_russian(date_str):
-    """Форматирует дату в русский формат (день месяц год)"""
-    try:
-        date_obj = datetime.strptime(date_str.strip(), "%Y-%m-%d")
-        eng_month = date_obj.strftime("%B")
-        ru_month = RU_MONTHS.get(eng_month, eng_month)
-        return f"{date_obj.day} {ru_month} {date_obj.year} г."
-    except Exception:
-        return date_str
-
-
-def get_status_from_group(group_number):
-    """Определяет статус (магистрант/бакалавр) по номеру группы"""
-    if not group_number:
-        return ""
-
-    last_char = group_number[-1].upper()
-    if last_char in ('M', 'М'):
-        return "магистр"
-    return "студент"
-
-
-def process_contributions(contributions):
-    """Обрабатывает сырые данные из JSON для отчета"""
-    processed = []
-    for item in contributions:
-        persons = item.get("persons", [{}])
-        speaker = persons[0] if persons else {}
-
-        group = ""
-        for field in item.get("custom_fields", []):
-            if field.get("name") == "Номер группы основного автора (докладчика)":
-                group = field.get("value", "")
-                break
-
-        start_dt = item.get("start_dt", "")
-        date = start_dt.split("T")[0] if start_dt else ""
-        time = start_dt.split("T")[1][:5] if start_dt else ""
-
-        processed.append({
-            "session": item.get("session", {}).get("friendly_id", "1"),
-            "date": date,
-            "time": time,
-            "aud": item.get("room_name", ""),
-            "full_name": speaker.get("full_name", ""),
-            "group": group,
-            "topic": item.get("title", ""),
-            "status": get_status_from_group(group)
-        })
-    return processed
-
-
-def set_cell_format(cell, font_size=10, alignment=WD_ALIGN_PARAGRAPH.CENTER):
+    add_style(doc, REPORT_TITLE_STYLE, WD_STYLE_TYPE.PARAGRAPH, base_style='Normal', bold=True,
+              alignment=WD_ALIGN_PARAGRAPH.CENTER)
+    add_style(doc, SESSION_HEADER_STYLE, WD_STYLE_TYPE.PARAGRAPH, base_style='Normal', bold=True,
+              alignment=WD_ALIGN_PARAGRAPH.LEFT)
+    add_style(doc, SESSION_INFO_STYLE, WD_STYLE_TYPE.PARAGRAPH, base_style='Normal',
+              alignment=WD_ALIGN_PARAGRAPH.LEFT)
+    # Абзацы в ячейках остаются в стиле Normal (к ним применяются свойства стиля
+    # таблицы), поэтому оформление ячеек задаётся стилями знака
+    add_style(doc, TABLE_HEADER_STYLE, WD_STYLE_TYPE.CHARACTER, font_name='Times New Roman', size=Pt(10),
+              bold=True)
+    add_style(doc, TABLE_CELL_STYLE, WD_STYLE_TYPE.CHARACTER, font_name='Times New Roman', size=Pt(10))
+
+
+def format_status(item):
+    """Формирует текст ячейки статуса докладчика"""
+    if item.status and item.group:
+        return f"{item.status}\nгр. {item.group}"
+    elif item.group:
+        return f"гр. {item.group}"
+    elif item.status:
+        return item.status
+    return ""
+
+
+def set_cell_format(cell, style, alignment=WD_ALIGN_PARAGRAPH.CENTER):
     """Устанавливает форматирование для ячейки таблицы"""
     for paragraph in cell.paragraphs:
         paragraph.alignment = alignment
         for run in paragraph.runs:
-            run.font.size = Pt(font_size)
-            run.font.name = 'Times New Roman'
+            set_style(run, style)
     cell.vertical_alignment = WD_ALIGN_VERTICAL.BOTH
 
 
@@ -96,8 +88,7 @@ def set_table_borders(table):
         tblBorders = OxmlElement('w:tblBorders')
         tblPr.append(tblBorders)
 
-    borders = ['top', 'left', 'bottom', 'right', 'insideH', 'insideV']
-    for border in borders:
+    for border in TABLE_BORDERS:
         border_element = OxmlElement(f'w:{border}')
         border_element.set(qn('w:val'), 'single')
         border_element.set(qn('w:sz'), '8')
@@ -106,40 +97,54 @@ def set_table_borders(table):
         tblBorders.append(border_element)
 
 
+def cell_xml(text, width, style=TABLE_CELL_STYLE, alignment=ALIGN_CENTER, v_align=True):
+    """Формирует ячейку таблицы (w:tc) с оформлением как у set_cell_format"""
+    v_align_xml = '<w:vAlign w:val="both"/>' if v_align else ""
+    return (
+        f'<w:tc><w:tcPr><w:tcW w:type="dxa" w:w="{width}"/>{v_align_xml}</w:tcPr>'
+        f'{paragraph_xml(run_xml(text, style=style_id(style)), alignment=alignment)}</w:tc>'
+    )
+
+
+def table_rows_xml(session_data):
+    """Формирует строки таблицы заседания (w:tr) за один проход по докладам"""
+    widths = [str(int(width.cm * 567)) for width in TABLE_COLUMN_WIDTHS]
+    parts = []
+    for i, item in enumerate(session_data, 1):
+        if not item.speaker or not item.title:
+            continue
+
+        parts.append("<w:tr>")
+        parts.append(cell_xml(str(i), widths[0]))
+        parts.append(cell_xml(f"{item.speaker}. {item.title}", widths[1],
+                              alignment=ALIGN_LEFT, v_align=False))
+        parts.append(cell_xml(format_status(item), widths[2]))
+        parts.append(cell_xml("", widths[3]))
+        parts.append("</w:tr>")
+    return "".join(parts)
+
+
 def add_session_table(doc, session_num, session_data, head, secretary):
     """Добавляет таблицу с докладами для заседания"""
     # Заголовок заседания
-    p = doc.add_paragraph()
-    p.alignment = WD_ALIGN_PARAGRAPH.LEFT
-    run = p.add_run(f"Заседание {session_num}")
-    run.bold = True
-    run.font.size = Pt(10)
+    set_style(doc.add_paragraph(f"Заседание {session_num}"), SESSION_HEADER_STYLE)
 
     # Дата и место
     first_item = session_data[0]
-    date_str = format_date_russian(first_item["date"])
-    time = first_item["time"]
-    aud = first_item["aud"]
+    date_str = format_date_russian(first_item.start, with_year=True)
+    time = first_item.time
+    aud = first_item.room
 
-    p = doc.add_paragraph()
-    p.alignment = WD_ALIGN_PARAGRAPH.LEFT
-    run = p.add_run(f"{date_str}, {time}, ул. Б. Морская, д. 67, ауд. {aud}")
-    run.font.size = Pt(10)
+    set_style(doc.add_paragraph(f"{date_str}, {time}, ул. Б. Морская, д. 67, ауд. {aud}"), SESSION_INFO_STYLE)
 
     # Руководство
-    p = doc.add_paragraph()
-    p.alignment = WD_ALIGN_PARAGRAPH.LEFT
-    run = p.add_run(f"Научный руководитель секции – {head}Секретарь – {secretary}")
-    run.font.size = Pt(10)
+    set_style(doc.add_paragraph(f"Научный руководитель секции – {head}Секретарь – {secretary}"), SESSION_INFO_STYLE)
 
     # Создаем таблицу
     table = doc.add_table(rows=1, cols=4)
-    table.style = 'Table Grid'
+    table._tbl.tblStyle_val = style_id('Table Grid')
     table.allow_autofit = False
 
-    # Ширины столбцов
-    column_widths = [Cm(1.06), Cm(8.82), Cm(2.47), Cm(3.53)]
-
     # Установка ширины таблицы и столбцов
     tbl = table._tbl
     tblPr = tbl.tblPr
@@ -149,7 +154,7 @@ def add_session_table(doc, session_num, session_data, head, secretary):
     tbl.insert(0, tblGrid)
 
     # Добавляем новые gridCol
-    for width in column_widths:
+    for width in TABLE_COLUMN_WIDTHS:
         gridCol = OxmlElement('w:gridCol')
         gridCol.set(qn('w:w'), str(int(width.cm * 567)))
         tblGrid.append(gridCol)
@@ -158,59 +163,57 @@ def add_session_table(doc, session_num, session_data, head, secretary):
     set_table_borders(table)
 
     # Заголовки таблицы
-    headers = [
-        "№ п/п",
-        "Фамилия и инициалы докладчика, название доклада",
-        "Статус(магистр/студент)",
-        "Решение"
-    ]
-
     hdr_cells = table.rows[0].cells
-    for i, header in enumerate(headers):
+    for i, header in enumerate(TABLE_HEADERS):
         hdr_cells[i].text = header
-        set_cell_format(hdr_cells[i])
-        for paragraph in hdr_cells[i].paragraphs:
-            for run in paragraph.runs:
-                run.bold = True
-
-    # Добавление докладов
-    for i, item in enumerate(session_data, 1):
-        if not item["full_name"] or not item["topic"]:
-            continue
+        set_cell_format(hdr_cells[i], TABLE_HEADER_STYLE)
 
-        row = table.add_row()
-        row_cells = row.cells
+    # Добавление докладов: все строки формируются и вставляются в таблицу одним блоком
+    rows = parse_xml(f"<w:tbl {nsdecls('w')}>{table_rows_xml(session_data)}</w:tbl>")
+    tbl.extend(list(rows))
 
-        # Номер
-        row_cells[0].text = str(i)
-        set_cell_format(row_cells[0])
 
-        # ФИО и тема
-        p = row_cells[1].paragraphs[0]
-        run = p.add_run(f"{item['full_name']}. {item['topic']}")
-        run.font.size = Pt(10)
-        p.alignment = WD_ALIGN_PARAGRAPH.LEFT
-
-        # Статус
-        status_text = ""
-        if item["status"] and item["group"]:
-            status_text = f"{item['status']}\nгр. {item['group']}"
-        elif item["group"]:
-            status_text = f"гр. {item['group']}"
-        elif item["status"]:
-            status_text = item["status"]
+def session_table_xml(session_num, session_data, head, secretary, block_width):
+    """Формирует разметку заседания с таблицей для потоковой записи (как add_session_table)"""
+    first_item = session_data[0]
+    date_str = format_date_russian(first_item.start, with_year=True)
+
+    parts = [
+        paragraph_xml(run_xml(f"Заседание {session_num}"), style=style_id(SESSION_HEADER_STYLE)),
+        paragraph_xml(run_xml(f"{date_str}, {first_item.time}, ул. Б. Морская, д. 67, ауд. {first_item.room}"),
+                      style=style_id(SESSION_INFO_STYLE)),
+        paragraph_xml(run_xml(f"Научный руководитель секции – {head}Секретарь – {secretary}"),
+                      style=style_id(SESSION_INFO_STYLE)),
+    ]
 
-        row_cells[2].text = status_text
-        set_cell_format(row_cells[2])
+    # Ширины столбцов так же, как в add_session_table; строка заголовков
+    # сохраняет равные ширины, которые python-docx задаёт при создании таблицы
+    widths = [str(int(width.cm * 567)) for width in TABLE_COLUMN_WIDTHS]
+    header_width = Emu(block_width // len(TABLE_HEADERS)).twips
+
+    parts.append("<w:tbl><w:tblGrid>")
+    parts.extend(f'<w:gridCol w:w="{width}"/>' for width in widths)
+    parts.append(
+        '</w:tblGrid><w:tblPr><w:tblStyle w:val="TableGrid"/><w:tblW w:type="auto" w:w="0"/>'
+        '<w:tblLook w:firstColumn="1" w:firstRow="1" w:lastColumn="0" w:lastRow="0" '
+        'w:noHBand="0" w:noVBand="1" w:val="04A0"/><w:tblBorders>'
+    )
+    for border in TABLE_BORDERS:
+        parts.append(f'<w:{border} w:val="single" w:sz="8" w:space="0" w:color="000000"/>')
+    parts.append("</w:tblBorders></w:tblPr><w:tblGrid>")
+    parts.extend(f'<w:gridCol w:w="{header_width}"/>' for _ in TABLE_HEADERS)
+    parts.append("</w:tblGrid><w:tr>")
+    parts.extend(cell_xml(header, header_width, style=TABLE_HEADER_STYLE) for header in TABLE_HEADERS)
+    parts.append("</w:tr>")
 
-        # Решение
-        row_cells[3].text = ""
-        set_cell_format(row_cells[3])
+    parts.append(table_rows_xml(session_data))
+    parts.append("</w:tbl>")
+    return "".join(parts)
 
 
-def generate_conference_report(conference_data, contributions, output_path):
-    """Генерирует файл отчета конференции"""
-    doc = Document()
+def create_base_document(compact=False):
+    """Создаёт пустой документ отчёта с настроенными полями и стилями"""
+    doc = new_document(compact)
 
     # Установка полей документа
     section = doc.sections[0]
@@ -220,55 +223,98 @@ def generate_conference_report(conference_data, contributions, output_path):
     section.bottom_margin = Cm(2.54)
 
     set_document_styles(doc)
-
-    # Заголовок отчета
-    p = doc.add_paragraph()
-    p.alignment = WD_ALIGN_PARAGRAPH.CENTER
-    run = p.add_run(f"Отчет о проведении {conference_data['number']} МСНК ГУАП")
-    run.bold = True
-    run.font.size = Pt(10)
-
-    # Секция кафедры
-    p = doc.add_paragraph()
-    p.alignment = WD_ALIGN_PARAGRAPH.CENTER
-    run = p.add_run("Секция 43. Кафедра компьютерных технологий и программной инженерии")
-    run.bold = True
-    run.font.size = Pt(10)
-    p.paragraph_format.space_after = Pt(12)
-
-    # Обработка данных
-    processed_entries = process_contributions(contributions)
-
-    # Группировка по заседаниям
-    sessions = {}
-    for entry in processed_entries:
-        session = entry["session"]
-        if session not in sessions:
-            sessions[session] = []
-        sessions[session].append(entry)
-
-    # Сортировка заседаний по дате
-    def get_session_date(session_data):
-        return session_data[0]["date"] if session_data else ""
-
-    sorted_sessions = sorted(
-        sessions.items(),
-        key=lambda x: get_session_date(x[1])
-    )
+    return doc
+
+
+def generate_conference_report(conference_data, contributions, output_path, streaming=False, doc=None,
+                               progress=None, fragment_cache=None, compact=False, compresslevel=None,
+                               workers=None, split_output=None):
+    """Генерирует файл отчета конференции.
+
+    При streaming=True заседания записываются в архив по мере формирования,
+    без построения всего документа в памяти. Через doc можно передать
+    заранее подготовленный базовый документ (см. create_base_document).
+    Функция progress(done, total) вызывается после каждого заседания.
+    С fragment_cache (см. FragmentCache) неизменившиеся заседания берутся
+    из кеша; документ при этом собирается потоковой записью.
+    compact=True строит документ на компактном шаблоне (см. ooxml.minimal_template),
+    compresslevel (0–9) задаёт степень сжатия архива.
+    При workers больше одного таблицы заседаний формируются в пуле из
+    workers процессов и собираются потоковой записью в порядке заседаний.
+    С split_output ("day" или "session") output_path — zip-архив с отдельным
+    отчётом на каждый день или заседание и оглавлением (см. split_output.py).
+    """
+    # Группировка по заседаниям; заседания и доклады в них упорядочены по времени начала.
+    # Поток докладов дочитывается до работы с документом, поэтому ошибки проверки выгрузки
+    # выбрасываются раньше, чем что-либо сформировано
+    with stage("group") as group_stage:
+        sorted_sessions = build_session_index(contributions)
+        group_stage.count = sum(len(session_data) for _, session_data in sorted_sessions)
+
+    if doc is None:
+        doc = create_base_document(compact)
+
+    with stage("header"):
+        # Заголовок отчета
+        set_style(doc.add_paragraph(f"Отчет о проведении {conference_data['number']} МСНК ГУАП"), REPORT_TITLE_STYLE)
+
+        # Секция кафедры
+        department, section_name = department_of(conference_data)
+        p = set_style(doc.add_paragraph(f"Секция {department}. Кафедра {section_name}"), REPORT_TITLE_STYLE)
+        p.paragraph_format.space_after = Pt(12)
+
+    signature = ("Научный руководитель секции                                    ___________________ / " +
+                 conference_data["head"].split(",")[0])
+
+    if streaming or fragment_cache is not None or workers or split_output:
+        section = doc.sections[0]
+        block_width = section.page_width - section.left_margin - section.right_margin
+        head = conference_data["head"]
+        secretary = conference_data["secretary"]
+        # При потоковой записи сохранение совмещено с формированием
+        with stage("render") as render_stage:
+            misses = fragment_cache.misses if fragment_cache is not None else 0
+            tasks = [(session_num, session_data, head, secretary, block_width)
+                     for session_num, session_data in sorted_sessions]
+            keys = None
+            if fragment_cache is not None:
+                keys = [fragment_key(("report", SESSION_FRAGMENT_VERSION, session_num, head, secretary, block_width),
+                                     session_data) for session_num, session_data in sorted_sessions]
+            # После каждого заседания — пустая строка
+            fragments = (fragment + paragraph_xml()
+                         for fragment in render_fragments(session_table_xml, tasks, workers, fragment_cache, keys,
+                                                          progress))
+            if split_output:
+                write_parts_archive(output_path, doc, split_into_parts(sorted_sessions, split_output), fragments,
+                                    "Отчет", "Части отчёта:", tail=paragraph_xml(run_xml(signature)),
+                                    compresslevel=compresslevel)
+            else:
+                with StreamingDocxWriter(doc, output_path, compresslevel) as writer:
+                    for fragment in fragments:
+                        writer.write(fragment)
+                    writer.write(paragraph_xml(run_xml(signature)))
+
+            # Число заново сформированных заседаний
+            render_stage.count = (fragment_cache.misses - misses if fragment_cache is not None
+                                  else len(sorted_sessions))
+        return
 
     # Добавление заседаний
-    for session_num, session_data in sorted_sessions:
-        add_session_table(
-            doc,
-            session_num,
-            session_data,
-            conference_data["head"],
-            conference_data["secretary"]
-        )
-        doc.add_paragraph()  # Пустая строка между заседаниями
-
-    # Подпись руководителя
-    doc.add_paragraph("Научный руководитель секции                                    ___________________ / " +
-                      conference_data["head"].split(",")[0])
-
-    doc.save(output_path)
\ No newline at end of file
+    with stage("render", len(sorted_sessions)):
+        for i, (session_num, session_data) in enumerate(sorted_sessions):
+            add_session_table(
+                doc,
+                session_num,
+                session_data,
+                conference_data["head"],
+                conference_data["secretary"]
+            )
+            doc.add_paragraph()  # Пустая строка между заседаниями
+            if progress:
+                progress(i + 1, len(sorted_sessions))
+
+        # Подпись руководителя
+        doc.add_paragraph(signature)
+
+    with stage("save"):
+        save_document(doc, output_path, compresslevel)
\ No newline at end of file
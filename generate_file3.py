@@ -1,76 +1,99 @@
-import json
-from docx import Document
 from docx.shared import Pt
 from docx.enum.text import WD_PARAGRAPH_ALIGNMENT
-from tkinter import messagebox
+from docx.enum.style import WD_STYLE_TYPE
 from docx.shared import Cm
-
-
-def create_accepted_papers_list(input_json_path, output_docx_path, leader_name, leader_email, leader_phone, conf_number):
-    try:
-        # Загрузка данных из JSON
-        with open(input_json_path, 'r', encoding='utf-8') as f:
-            data = json.load(f)
-
-        # Фильтрация принятых работ
-        accepted_papers = [paper for paper in data['papers'] if paper['state']['name'] == 'accepted']
-
-        if not accepted_papers:
-            messagebox.showwarning("Предупреждение", "Нет принятых работ для формирования списка.")
-            return
-
-        # Создание документа Word
-        doc = Document()
-        # Установка полей документа
-        sections = doc.sections
-        for section in sections:
-            section.top_margin = Cm(2.54)
-            section.bottom_margin = Cm(2.54)
-            section.left_margin = Cm(2.54)
-            section.right_margin = Cm(2.54)
-
-        # Настройка стилей
-        style = doc.styles['Normal']
-        font = style.font
-        font.name = 'Times New Roman'
-        font.size = Pt(14)
-        style.paragraph_format.line_spacing = 1.15
-
-        # Заголовок
-        title = doc.add_paragraph('Список представляемых к публикации докладов')
-        title.alignment = WD_PARAGRAPH_ALIGNMENT.CENTER
-        run = title.runs[0]
-        run.font.bold = True
-        run.font.italic = True
-        title.paragraph_format.space_after = Pt(0)
-
-        p = doc.add_paragraph("")
+from data_loader import iter_papers
+from instrumentation import stage
+from models import DEFAULT_DEPARTMENT, DEFAULT_SECTION, iter_accepted_papers
+from ooxml import add_style, new_document, paragraph_appender, save_document, set_style
+from validation import validate_papers
+
+# Именованные стили списка публикаций
+LIST_TITLE_STYLE = "List Title"
+LEADER_INFO_STYLE = "Leader Info"
+
+
+class NoAcceptedPapersError(Exception):
+    """В выгрузке нет принятых работ"""
+
+
+def create_base_document(compact=False):
+    """Создаёт пустой документ списка публикаций с настроенными полями и стилями"""
+    doc = new_document(compact)
+    # Установка полей документа
+    sections = doc.sections
+    for section in sections:
+        section.top_margin = Cm(2.54)
+        section.bottom_margin = Cm(2.54)
+        section.left_margin = Cm(2.54)
+        section.right_margin = Cm(2.54)
+
+    # Настройка стилей
+    style = doc.styles['Normal']
+    font = style.font
+    font.name = 'Times New Roman'
+    font.size = Pt(14)
+    style.paragraph_format.line_spacing = 1.15
+
+    add_style(doc, LIST_TITLE_STYLE, WD_STYLE_TYPE.CHARACTER, bold=True, italic=True)
+    add_style(doc, LEADER_INFO_STYLE, WD_STYLE_TYPE.CHARACTER, size=Pt(12))
+    return doc
+
+
+def generate_accepted_papers_list(papers, output_docx_path, leader_name, leader_email, leader_phone, conf_number,
+                                  doc=None, progress=None, department=DEFAULT_DEPARTMENT, section=DEFAULT_SECTION,
+                                  compact=False, compresslevel=None):
+    """Генерирует файл списка докладов, представляемых к публикации.
+
+    Функция progress(done, total) вызывается после каждой работы.
+    department и section — номер кафедры и название её секции.
+    compact и compresslevel — компактный шаблон и степень сжатия архива.
+    """
+    # Фильтрация принятых работ
+    with stage("normalize") as normalize_stage:
+        accepted_papers = list(iter_accepted_papers(papers))
+        normalize_stage.count = len(accepted_papers)
+
+    if not accepted_papers:
+        raise NoAcceptedPapersError("Нет принятых работ для формирования списка.")
+
+    # Создание документа Word
+    if doc is None:
+        doc = create_base_document(compact)
+
+    # Заголовок
+    title = doc.add_paragraph()
+    set_style(title.add_run('Список представляемых к публикации докладов'), LIST_TITLE_STYLE)
+    title.alignment = WD_PARAGRAPH_ALIGNMENT.CENTER
+    title.paragraph_format.space_after = Pt(0)
+
+    p = doc.add_paragraph("")
+    p.paragraph_format.space_after = Pt(0)
+    p.paragraph_format.line_spacing = 1.15
+
+
+    # Информация о кафедре и руководителе
+    def add_info_paragraph(text):
+        p = doc.add_paragraph()
+        set_style(p.add_run(text), LEADER_INFO_STYLE)
+        p.alignment = WD_PARAGRAPH_ALIGNMENT.LEFT
+        p.paragraph_format.left_indent = Cm(2)
         p.paragraph_format.space_after = Pt(0)
-        p.paragraph_format.line_spacing = 1.15
-
-
-        # Информация о кафедре и руководителе
-        def add_info_paragraph(text):
-            p = doc.add_paragraph(text)
-            p.alignment = WD_PARAGRAPH_ALIGNMENT.LEFT
-            p.paragraph_format.left_indent = Cm(2)
-            run = p.runs[0]
-            run.font.size = Pt(12)
-            p.paragraph_format.space_after = Pt(0)
 
-        add_info_paragraph("Кафедра № 43 компьютерных технологий и программной инженерии")
-        add_info_paragraph(leader_name)
-        add_info_paragraph(f"e-mail: {leader_email}")
-        add_info_paragraph(f"тел.: {leader_phone}")
+    add_info_paragraph(f"Кафедра № {department} {section}")
+    add_info_paragraph(leader_name)
+    add_info_paragraph(f"e-mail: {leader_email}")
+    add_info_paragraph(f"тел.: {leader_phone}")
 
-        p = doc.add_paragraph("")
-        p.paragraph_format.space_after = Pt(0)
-        p.paragraph_format.line_spacing = 1.15
+    p = doc.add_paragraph("")
+    p.paragraph_format.space_after = Pt(0)
+    p.paragraph_format.line_spacing = 1.15
 
 
+    with stage("render", len(accepted_papers)):
+        add_paragraph = paragraph_appender(doc)
         for idx, paper in enumerate(accepted_papers, start=1):
-            submitter = paper['revisions'][0]['submitter']
-            full_name = submitter['full_name'].strip()
+            full_name = paper.submitter.strip()
             parts = full_name.split()
 
             if len(parts) >= 2:
@@ -82,27 +105,46 @@ def create_accepted_papers_list(input_json_path, output_docx_path, leader_name,
             else:
                 author_name = full_name
 
-            paper_title = paper['contribution']['title']
+            paper_title = paper.title
 
             # Добавляем строку с табуляцией
-            p = doc.add_paragraph(f"\t{idx}.\t{author_name}, {paper_title}")
+            p = add_paragraph(f"\t{idx}.\t{author_name}, {paper_title}")
             p.paragraph_format.left_indent = Cm(0)  # весь абзац без отступа
             p.paragraph_format.first_line_indent = Cm(0)
             p.paragraph_format.space_after = Pt(0)
             p.alignment = WD_PARAGRAPH_ALIGNMENT.JUSTIFY
 
-            run = p.runs[0]
+            if progress:
+                progress(idx, len(accepted_papers))
+
+    # Добавляем подпись
+    doc.add_paragraph("\n")
+    signature = doc.add_paragraph()
+    set_style(signature.add_run(f"Руководитель УНИДС                                               {leader_name} "),
+              LEADER_INFO_STYLE)
+    signature.alignment = WD_PARAGRAPH_ALIGNMENT.LEFT
+    signature.paragraph_format.left_indent = Cm(2)
+
+    # Сохранение документа
+    with stage("save"):
+        save_document(doc, output_docx_path, compresslevel)
 
-        # Добавляем подпись
-        doc.add_paragraph("\n")
-        signature = doc.add_paragraph(f"Руководитель УНИДС                                               {leader_name} ")
-        signature.alignment = WD_PARAGRAPH_ALIGNMENT.LEFT
-        signature.paragraph_format.left_indent = Cm(2)
-        run = signature.runs[0]
-        run.font.size = Pt(12)
 
-        # Сохранение документа
-        doc.save(output_docx_path)
+def create_accepted_papers_list(input_json_path, output_docx_path, leader_name, leader_email, leader_phone, conf_number,
+                                department=DEFAULT_DEPARTMENT, section=DEFAULT_SECTION):
+    from tkinter import messagebox
+
+    try:
+        # Публикации читаются потоково; в памяти остаются только нужные поля принятых работ
+        with stage("load"):
+            papers = list(iter_accepted_papers(validate_papers(iter_papers(input_json_path), input_json_path)))
+
+        generate_accepted_papers_list(
+            papers, output_docx_path, leader_name, leader_email, leader_phone, conf_number,
+            department=department, section=section
+        )
 
+    except NoAcceptedPapersError as e:
+        messagebox.showwarning("Предупреждение", str(e))
     except Exception as e:
         messagebox.showerror("Ошибка", f"Произошла ошибка при создании документа:\n{e}")
\ No newline at end of file
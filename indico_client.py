@@ -0,0 +1,286 @@
+import hashlib
+import http.client
+import json
+import os
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlencode, urlsplit
+
+DEFAULT_PAGE_SIZE = 200
+DEFAULT_WORKERS = 4
+DEFAULT_TIMEOUT = 30
+
+# Пути API относительно адреса Indico по умолчанию ({event_id} — номер мероприятия).
+# Выгрузка докладов — HTTP export API Indico, формат ответа как у ручной выгрузки.
+# Стандартного export API для публикаций в Indico нет, поэтому их путь зависит
+# от сервера и задаётся параметром papers_path (в cli.py — --indico-papers-path).
+CONTRIBUTIONS_PATH = "/export/event/{event_id}.json"
+CONTRIBUTIONS_PARAMS = {"detail": "contributions"}
+PAPERS_PATH = "/export/event/{event_id}/papers.json"
+PAPERS_PARAMS = {}
+
+TOKEN_ENV = "INDICO_TOKEN"
+
+
+class IndicoError(Exception):
+    """Ошибка обращения к API Indico"""
+
+
+class ConnectionPool:
+    """Пул постоянных соединений HTTP/1.1 с одним сервером Indico"""
+
+    def __init__(self, base_url, size=DEFAULT_WORKERS, timeout=DEFAULT_TIMEOUT):
+        parts = urlsplit(base_url)
+        if parts.scheme not in ("http", "https") or not parts.hostname:
+            raise IndicoError(f"Некорректный адрес Indico: {base_url}")
+        self._https = parts.scheme == "https"
+        self._host = parts.hostname
+        self._port = parts.port
+        self.prefix = parts.path.rstrip("/")
+        self._size = size
+        self._timeout = timeout
+        self._idle = queue.LifoQueue()
+        self.opened = 0
+
+    def _connect(self):
+        self.opened += 1
+        if self._https:
+            return http.client.HTTPSConnection(self._host, self._port, timeout=self._timeout)
+        return http.client.HTTPConnection(self._host, self._port, timeout=self._timeout)
+
+    def _send(self, connection, path, headers):
+        """Запрос на соединении connection; при любой ошибке соединение закрывается"""
+        try:
+            connection.request("GET", self.prefix + path, headers=headers)
+            response = connection.getresponse()
+            return response, response.read()
+        except BaseException:
+            connection.close()
+            raise
+
+    def request(self, path, headers):
+        """Выполняет GET-запрос и возвращает (статус, заголовки, тело)"""
+        try:
+            connection = self._idle.get_nowait()
+            reused = True
+        except queue.Empty:
+            connection = self._connect()
+            reused = False
+
+        try:
+            response, body = self._send(connection, path, headers)
+        except (http.client.HTTPException, OSError):
+            if not reused:
+                raise
+            # Сервер мог закрыть простаивающее соединение — повторяем на новом
+            connection = self._connect()
+            response, body = self._send(connection, path, headers)
+
+        if response.will_close or self._idle.qsize() >= self._size:
+            connection.close()
+        else:
+            self._idle.put(connection)
+        return response.status, response.headers, body
+
+    def close(self):
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                return
+
+
+class ResponseCache:
+    """Хранит ответы с их ETag и Last-Modified для условных запросов"""
+
+    INDEX_FILE = "index.json"
+
+    def __init__(self, directory):
+        self.directory = directory
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+        try:
+            with open(os.path.join(directory, self.INDEX_FILE), encoding="utf-8") as f:
+                self._index = json.load(f)
+        except (OSError, ValueError):
+            self._index = {}
+
+    def _body_path(self, url):
+        return os.path.join(self.directory, hashlib.sha256(url.encode("utf-8")).hexdigest() + ".json")
+
+    def validators(self, url):
+        """Заголовки условного запроса для сохранённого ответа"""
+        with self._lock:
+            entry = self._index.get(url)
+        if not entry or not os.path.exists(self._body_path(url)):
+            return {}
+        headers = {}
+        if entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        if entry.get("last_modified"):
+            headers["If-Modified-Since"] = entry["last_modified"]
+        return headers
+
+    def load(self, url):
+        """Возвращает сохранённое тело ответа"""
+        with open(self._body_path(url), "rb") as f:
+            return f.read()
+
+    def store(self, url, headers, body):
+        """Сохраняет ответ, если сервер указал ETag или Last-Modified"""
+        etag = headers.get("ETag")
+        last_modified = headers.get("Last-Modified")
+        if not etag and not last_modified:
+            return
+        with open(self._body_path(url), "wb") as f:
+            f.write(body)
+        with self._lock:
+            self._index[url] = {"etag": etag, "last_modified": last_modified}
+
+    def save(self):
+        """Записывает индекс кеша на диск"""
+        with self._lock:
+            data = json.dumps(self._index, ensure_ascii=False)
+        path = os.path.join(self.directory, self.INDEX_FILE)
+        with open(path + ".tmp", "w", encoding="utf-8") as f:
+            f.write(data)
+        os.replace(path + ".tmp", path)
+
+
+def extract_items(data, key):
+    """Достаёт элементы из ответа: массив, объект с полем key или ответ export API (results)"""
+    if isinstance(data, list):
+        return data
+    if not isinstance(data, dict):
+        raise IndicoError("Неожиданный формат ответа Indico")
+    if key in data:
+        return data[key]
+    results = data.get("results")
+    if isinstance(results, list):
+        # В export API элементы вложены в описание мероприятия
+        if results and isinstance(results[0], dict) and key in results[0]:
+            return [item for result in results for item in result.get(key, [])]
+        return results
+    raise IndicoError(f"В ответе Indico нет поля {key}")
+
+
+class IndicoClient:
+    """Загружает доклады и публикации мероприятия через HTTP API Indico.
+
+    Соединения переиспользуются, страницы запрашиваются параллельно,
+    а при заданном cache_dir запросы условные: неизменившиеся страницы
+    не скачиваются повторно (ответ 304 Not Modified). contributions_path
+    и papers_path — пути API относительно base_url с подстановкой {event_id}.
+    """
+
+    contributions_params = CONTRIBUTIONS_PARAMS
+    papers_params = PAPERS_PARAMS
+
+    def __init__(self, base_url, token=None, cache_dir=None, workers=DEFAULT_WORKERS,
+                 page_size=DEFAULT_PAGE_SIZE, timeout=DEFAULT_TIMEOUT, contributions_path=None, papers_path=None):
+        self.contributions_path = contributions_path or CONTRIBUTIONS_PATH
+        self.papers_path = papers_path or PAPERS_PATH
+        self.token = token if token is not None else os.environ.get(TOKEN_ENV)
+        self.workers = workers
+        self.page_size = page_size
+        self.pool = ConnectionPool(base_url, workers, timeout)
+        self.cache = ResponseCache(cache_dir) if cache_dir else None
+        self._executor = ThreadPoolExecutor(max_workers=workers)
+
+    def get_json(self, path, params=None):
+        """Запрашивает JSON; возвращает (данные, изменились ли они с прошлого запроса)"""
+        url = path + ("?" + urlencode(params) if params else "")
+        headers = {"Accept": "application/json"}
+        if self.token:
+            headers["Authorization"] = f"Bearer {self.token}"
+        if self.cache:
+            headers.update(self.cache.validators(url))
+
+        status, response_headers, body = self.pool.request(url, headers)
+        if status == 304 and self.cache:
+            return json.loads(self.cache.load(url)), False
+        if status != 200:
+            raise IndicoError(f"Indico вернул код {status} для {url}")
+
+        if self.cache:
+            self.cache.store(url, response_headers, body)
+        return json.loads(body), True
+
+    def fetch_items(self, path, params, key):
+        """Загружает все страницы списка; возвращает (элементы, изменились ли данные).
+
+        Страницы запрашиваются пачками по числу потоков, пока не придёт
+        неполная страница. Элементы с уже встреченным id отбрасываются,
+        поэтому сервер, не поддерживающий постраничную выдачу, не даст повторов.
+        """
+        items = []
+        seen = set()
+        changed = False
+        offset = 0
+        while True:
+            offsets = [offset + i * self.page_size for i in range(self.workers)]
+            # Дожидаемся всей пачки, чтобы ответы успели попасть в кеш до его сохранения
+            pages = list(self._executor.map(
+                lambda page_offset: self.get_json(path, dict(params, offset=page_offset, limit=self.page_size)),
+                offsets
+            ))
+
+            last_page = False
+            for data, page_changed in pages:
+                page = extract_items(data, key)
+                changed = changed or page_changed
+                new_items = [item for item in page if item.get("id") is None or item["id"] not in seen]
+                seen.update(item["id"] for item in new_items if item.get("id") is not None)
+                items.extend(new_items)
+                if len(page) < self.page_size or not new_items:
+                    last_page = True
+                    break
+
+            if last_page:
+                break
+            offset += self.workers * self.page_size
+
+        if self.cache:
+            self.cache.save()
+        return items, changed
+
+    def fetch_contributions(self, event_id):
+        """Доклады мероприятия в формате ручной выгрузки"""
+        return self.fetch_items(self.contributions_path.format(event_id=event_id), self.contributions_params,
+                                "contributions")
+
+    def fetch_papers(self, event_id):
+        """Публикации мероприятия (структура papers, как в ручной выгрузке)"""
+        return self.fetch_items(self.papers_path.format(event_id=event_id), self.papers_params, "papers")
+
+    def download_contributions(self, event_id, output_path):
+        """Сохраняет доклады в JSON-файл; при неизменившихся данных файл не переписывается"""
+        items, changed = self.fetch_contributions(event_id)
+        if changed or not os.path.exists(output_path):
+            write_json(output_path, items)
+        return changed
+
+    def download_papers(self, event_id, output_path):
+        """Сохраняет публикации в JSON-файл вида {"papers": [...]}"""
+        papers, changed = self.fetch_papers(event_id)
+        if changed or not os.path.exists(output_path):
+            write_json(output_path, {"papers": papers})
+        return changed
+
+    def close(self):
+        self._executor.shutdown()
+        self.pool.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+def write_json(path, data):
+    """Атомарно записывает JSON, чтобы наблюдение за файлом не увидело его недописанным"""
+    with open(path + ".tmp", "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False)
+    os.replace(path + ".tmp", path)
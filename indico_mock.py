@@ -0,0 +1,184 @@
+import argparse
+import hashlib
+import json
+import threading
+import time
+from email.utils import formatdate, parsedate_to_datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+from indico_client import CONTRIBUTIONS_PATH, PAPERS_PATH
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8800
+DEFAULT_EVENT_ID = "1"
+
+
+class MockIndicoServer:
+    """Локальный сервер, имитирующий API Indico для проверки загрузки без доступа к сети.
+
+    Отдаёт доклады и публикации постранично (offset/limit), выставляет ETag и
+    Last-Modified и отвечает 304 на условные запросы к неизменившимся данным.
+    Считает запросы и открытые соединения, чтобы проверять их переиспользование.
+    """
+
+    def __init__(self, contributions=(), papers=(), event_id=DEFAULT_EVENT_ID, token=None,
+                 host=DEFAULT_HOST, port=0, papers_path=PAPERS_PATH):
+        self.event_id = str(event_id)
+        self.token = token
+        self.papers_path = papers_path
+        self.requests = 0
+        self.not_modified = 0
+        self.connections = 0
+        self._lock = threading.Lock()
+        self.set_data(contributions, papers)
+
+        handler = type("Handler", (MockIndicoHandler,), {"mock": self})
+        self.server = ThreadingHTTPServer((host, port), handler)
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def set_data(self, contributions=None, papers=None):
+        """Заменяет данные мероприятия; время изменения обновляется"""
+        with self._lock:
+            if contributions is not None:
+                self.contributions = list(contributions)
+            if papers is not None:
+                self.papers = list(papers)
+            # Last-Modified имеет точность до секунды, поэтому новое время всегда больше прошлого
+            self.modified = max(int(time.time()), getattr(self, "modified", 0) + 1)
+
+    def count(self, name):
+        """Увеличивает счётчик запросов или соединений"""
+        with self._lock:
+            setattr(self, name, getattr(self, name) + 1)
+
+    def start(self):
+        """Запускает сервер в фоновом потоке"""
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
+
+
+class MockIndicoHandler(BaseHTTPRequestHandler):
+    """Обработчик запросов имитатора Indico"""
+
+    protocol_version = "HTTP/1.1"
+    mock = None
+
+    def setup(self):
+        super().setup()
+        self.mock.count("connections")
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        self.mock.count("requests")
+        mock = self.mock
+        parts = urlsplit(self.path)
+        query = parse_qs(parts.query)
+
+        if mock.token and self.headers.get("Authorization") != f"Bearer {mock.token}":
+            self._send_json(401, {"error": "unauthorized"})
+            return
+
+        if parts.path == CONTRIBUTIONS_PATH.format(event_id=mock.event_id):
+            items, wrap = mock.contributions, self._export_results
+        elif parts.path == mock.papers_path.format(event_id=mock.event_id):
+            items, wrap = mock.papers, lambda page: {"papers": page}
+        else:
+            self._send_json(404, {"error": "not found"})
+            return
+
+        offset = int(query.get("offset", ["0"])[0])
+        limit = int(query.get("limit", [str(len(items))])[0])
+        body = json.dumps(wrap(items[offset:offset + limit]), ensure_ascii=False).encode("utf-8")
+        etag = '"' + hashlib.sha256(body).hexdigest()[:32] + '"'
+        last_modified = formatdate(mock.modified, usegmt=True)
+
+        if self._not_modified(etag, mock.modified):
+            mock.count("not_modified")
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.send_header("Last-Modified", last_modified)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+
+        self._send_json(200, None, body, {"ETag": etag, "Last-Modified": last_modified})
+
+    def _export_results(self, page):
+        # Формат HTTP export API: доклады вложены в описание мероприятия
+        return {"count": 1, "results": [{"id": self.mock.event_id, "contributions": page}]}
+
+    def _not_modified(self, etag, modified):
+        if_none_match = self.headers.get("If-None-Match")
+        if if_none_match is not None:
+            return if_none_match == etag
+        if_modified_since = self.headers.get("If-Modified-Since")
+        if if_modified_since:
+            try:
+                return parsedate_to_datetime(if_modified_since).timestamp() >= modified
+            except (TypeError, ValueError):
+                return False
+        return False
+
+    def _send_json(self, status, data, body=None, headers=None):
+        if body is None:
+            body = json.dumps(data, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Имитатор API Indico для проверки загрузки выгрузок")
+    parser.add_argument("--contributions", help="JSON-выгрузка докладов (массив)")
+    parser.add_argument("--papers", help="JSON-выгрузка публикаций ({\"papers\": [...]})")
+    parser.add_argument("--event-id", default=DEFAULT_EVENT_ID)
+    parser.add_argument("--token", help="требовать этот токен в заголовке Authorization")
+    parser.add_argument("--papers-path", default=PAPERS_PATH,
+                        help="путь API публикаций ({event_id} — номер мероприятия)")
+    parser.add_argument("--host", default=DEFAULT_HOST)
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    args = parser.parse_args(argv)
+
+    contributions, papers = [], []
+    if args.contributions:
+        with open(args.contributions, encoding="utf-8") as f:
+            contributions = json.load(f)
+    if args.papers:
+        with open(args.papers, encoding="utf-8") as f:
+            papers = json.load(f)["papers"]
+
+    mock = MockIndicoServer(contributions, papers, args.event_id, args.token, args.host, args.port, args.papers_path)
+    print(f"Имитатор Indico запущен: {mock.url} (мероприятие {mock.event_id})")
+    try:
+        mock.server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        mock.server.server_close()
+
+
+if __name__ == "__main__":
+    main()
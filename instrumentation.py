@@ -0,0 +1,130 @@
+import cProfile
+import json
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+# Текущий сборщик замеров свой у каждого потока (GUI и сервис создают документы в рабочих потоках)
+_local = threading.local()
+
+
+class StageCount:
+    """Число обработанных элементов этапа; можно задать и внутри блока with"""
+    __slots__ = ("count",)
+
+    def __init__(self, count=None):
+        self.count = count
+
+
+class StageRecorder:
+    """Собирает длительность этапов, число элементов и пики памяти одного запуска"""
+
+    def __init__(self, trace_memory=False):
+        self.trace_memory = trace_memory
+        self.stages = {}
+        self.total_seconds = None
+        self.profile_path = None
+        self._started = time.perf_counter()
+
+    def add(self, name, seconds, count=None, peak=None):
+        """Добавляет замер этапа; повторные замеры одного этапа суммируются"""
+        entry = self.stages.get(name)
+        if entry is None:
+            entry = self.stages[name] = {"seconds": 0.0, "calls": 0}
+        entry["seconds"] += seconds
+        entry["calls"] += 1
+        if count is not None:
+            entry["count"] = entry.get("count", 0) + count
+        if peak is not None:
+            entry["peak_mb"] = max(entry.get("peak_mb", 0.0), peak / 2 ** 20)
+
+    def as_dict(self):
+        """Возвращает замеры в виде словаря для журнала или JSON"""
+        stages = {}
+        for name, entry in self.stages.items():
+            stage = dict(entry, seconds=round(entry["seconds"], 4))
+            if "peak_mb" in stage:
+                stage["peak_mb"] = round(stage["peak_mb"], 2)
+            stages[name] = stage
+
+        result = {"stages": stages}
+        if self.total_seconds is not None:
+            result["total_seconds"] = round(self.total_seconds, 4)
+        if self.profile_path:
+            result["profile"] = self.profile_path
+        return result
+
+    def to_json(self, **kwargs):
+        return json.dumps(self.as_dict(), ensure_ascii=False, **kwargs)
+
+
+def current_recorder():
+    """Возвращает активный сборщик замеров текущего потока или None"""
+    return getattr(_local, "recorder", None)
+
+
+@contextmanager
+def recording(trace_memory=False, profile_path=None):
+    """Включает замеры этапов на время блока with.
+
+    trace_memory — отслеживать пик выделенной памяти по этапам (tracemalloc),
+    profile_path — записать профиль cProfile всего запуска в указанный файл.
+    """
+    recorder = StageRecorder(trace_memory)
+    previous = current_recorder()
+    _local.recorder = recorder
+
+    start_tracing = trace_memory and not tracemalloc.is_tracing()
+    if start_tracing:
+        tracemalloc.start()
+    profiler = cProfile.Profile() if profile_path else None
+    if profiler:
+        profiler.enable()
+
+    try:
+        yield recorder
+    finally:
+        if profiler:
+            profiler.disable()
+            profiler.dump_stats(profile_path)
+            recorder.profile_path = profile_path
+        if start_tracing:
+            tracemalloc.stop()
+        recorder.total_seconds = time.perf_counter() - recorder._started
+        _local.recorder = previous
+
+
+@contextmanager
+def scope(name):
+    """Относит вложенные этапы к документу: этап render внутри scope("report") запишется как report.render"""
+    previous = getattr(_local, "scope", None)
+    _local.scope = f"{previous}.{name}" if previous else name
+    try:
+        yield
+    finally:
+        _local.scope = previous
+
+
+@contextmanager
+def stage(name, count=None):
+    """Засекает этап создания документа; без активного сборщика ничего не делает"""
+    counter = StageCount(count)
+    recorder = current_recorder()
+    if recorder is None:
+        yield counter
+        return
+
+    prefix = getattr(_local, "scope", None)
+    if prefix:
+        name = f"{prefix}.{name}"
+
+    tracing = recorder.trace_memory and tracemalloc.is_tracing()
+    if tracing:
+        tracemalloc.reset_peak()
+    started = time.perf_counter()
+    try:
+        yield counter
+    finally:
+        peak = tracemalloc.get_traced_memory()[1] if tracing else None
+        recorder.add(name, time.perf_counter() - started, counter.count, peak)
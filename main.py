@@ -1,10 +1,137 @@
+import time
+
+START_TIME = time.perf_counter()
+
 import tkinter as tk
 from tkinter import filedialog, messagebox, ttk
-from generate_file1 import generate_conference_program
-from generate_file2 import generate_conference_report
-from generate_file3 import create_accepted_papers_list
-import json
+from data_loader import iter_json_array, iter_papers
+from models import DEFAULT_DEPARTMENT, DEFAULT_SECTION, iter_accepted_papers, iter_contributions
+from validation import validate_contributions, validate_papers
+import importlib
 import os
+import queue
+import threading
+
+# Период опроса очереди рабочего потока, мс
+POLL_INTERVAL_MS = 100
+# Как часто проверять отмену при чтении выгрузки (в элементах)
+CANCEL_CHECK_EVERY = 500
+# Задержка перед фоновой загрузкой генераторов после показа окна, мс
+PREWARM_DELAY_MS = 200
+# Переменная окружения для замера времени запуска (см. benchmarks/startup_time.py)
+STARTUP_PROBE_ENV = "INDOX_STARTUP_PROBE"
+# Начальные значения полей кафедры в окнах ввода
+FIELD_DEFAULTS = {"department": DEFAULT_DEPARTMENT, "section": DEFAULT_SECTION}
+
+# Модули генераторов тянут python-docx и lxml, поэтому загружаются не при
+# запуске, а при первом использовании или в фоне после отрисовки окна
+GENERATOR_MODULES = ("generate_file1", "generate_file2", "generate_file3")
+
+
+def load_generator(name):
+    """Возвращает модуль генератора, импортируя его при первом обращении"""
+    return importlib.import_module(name)
+
+
+def prewarm_generators():
+    """Загружает модули генераторов в фоновом потоке"""
+    def run():
+        for name in GENERATOR_MODULES:
+            try:
+                load_generator(name)
+            except Exception:
+                # Ошибка импорта будет показана при создании документа
+                return
+
+    threading.Thread(target=run, daemon=True).start()
+
+
+def open_export_cache():
+    """Открывает кеш разобранных выгрузок в каталоге пользователя; если это невозможно — работа без кеша"""
+    import sqlite3
+    from export_cache import ExportCache
+
+    try:
+        return ExportCache()
+    except (OSError, sqlite3.Error):
+        return None
+
+
+class GenerationCancelled(Exception):
+    """Создание документа отменено пользователем"""
+
+
+class BackgroundTask:
+    """Выполняет создание документа в рабочем потоке.
+
+    Прогресс и результат передаются в главный поток через очередь,
+    которую опрашивает root.after(), поэтому окна не блокируются.
+    """
+
+    def __init__(self, root, target, on_progress, on_done, on_error, on_cancel):
+        self._root = root
+        self._target = target
+        self._on_progress = on_progress
+        self._on_done = on_done
+        self._on_error = on_error
+        self._on_cancel = on_cancel
+        self._queue = queue.Queue()
+        self._cancel_event = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def start(self):
+        self._thread.start()
+        self._root.after(POLL_INTERVAL_MS, self._poll)
+
+    def cancel(self):
+        """Запрашивает отмену; рабочий поток остановится на ближайшей проверке"""
+        self._cancel_event.set()
+
+    def check_cancelled(self):
+        if self._cancel_event.is_set():
+            raise GenerationCancelled()
+
+    def report_progress(self, done, total):
+        """Вызывается из рабочего потока после каждого заседания или работы"""
+        self.check_cancelled()
+        self._queue.put(("progress", done, total))
+
+    def cancellable(self, items):
+        """Оборачивает поток элементов выгрузки проверками отмены"""
+        for i, item in enumerate(items):
+            if i % CANCEL_CHECK_EVERY == 0:
+                self.check_cancelled()
+            yield item
+
+    def _run(self):
+        try:
+            self._target(self)
+            self._queue.put(("done",))
+        except GenerationCancelled:
+            self._queue.put(("cancelled",))
+        except Exception as e:
+            self._queue.put(("error", e))
+
+    def _poll(self):
+        while True:
+            try:
+                message = self._queue.get_nowait()
+            except queue.Empty:
+                break
+
+            kind = message[0]
+            if kind == "progress":
+                self._on_progress(message[1], message[2])
+                continue
+            if kind == "done":
+                self._on_done()
+            elif kind == "cancelled":
+                self._on_cancel()
+            else:
+                self._on_error(message[1])
+            return
+
+        self._root.after(POLL_INTERVAL_MS, self._poll)
 
 
 # Стиль для всего приложения
@@ -19,16 +146,19 @@ def configure_styles():
               background=[('active', '#45a049'), ('!disabled', '#4CAF50')])
 
 
-def open_data_window(root, report_mode=False, papers_mode=False):
+def open_data_window(root, report_mode=False, papers_mode=False, all_mode=False):
     root.withdraw()  # Скрыть главное окно
 
     def check_fields():
         if papers_mode:
-            required_fields = ["conf_number", "leader_name", "leader_email", "leader_phone"]
+            required_fields = ["conf_number", "department", "section", "leader_name", "leader_email", "leader_phone"]
         else:
-            required_fields = ["conf_number", "head", "secretary"] if report_mode else list(entries.keys())
+            required_fields = (["conf_number", "department", "section", "head", "secretary"] if report_mode
+                               else list(entries.keys()))
 
         all_filled = all(entries[field].get().strip() for field in required_fields) and json_path.get()
+        if all_mode:
+            all_filled = all_filled and papers_path.get()
         create_btn.config(state=tk.NORMAL if all_filled else tk.DISABLED)
 
     def select_json_file():
@@ -40,79 +170,238 @@ def open_data_window(root, report_mode=False, papers_mode=False):
             json_path.set(filename)
             check_fields()
 
-    def create_file():
-        try:
-            if papers_mode:
-                conf_number = entries["conf_number"].get().strip()
-                default_filename = f"Список представляемых к публикации докладов конференции {conf_number}.docx" if conf_number else "Список представляемых к публикации докладов.docx"
-
-                output_path = filedialog.asksaveasfilename(
-                    defaultextension=".docx",
-                    filetypes=[("Word документ", "*.docx")],
-                    title="Сохранить список публикуемых докладов",
-                    initialfile=default_filename
-                )
-                if not output_path:
-                    return
+    def select_papers_file():
+        filename = filedialog.askopenfilename(
+            title="Выберите файл с публикациями",
+            filetypes=[("JSON файлы", "*.json"), ("Все файлы", "*.*")]
+        )
+        if filename:
+            papers_path.set(filename)
+            check_fields()
 
-                create_accepted_papers_list(
-                    json_path.get(),
-                    output_path,
-                    entries["leader_name"].get(),
-                    entries["leader_email"].get(),
-                    entries["leader_phone"].get(),
-                    conf_number
-                )
-            else:
-                conference_data = {
-                    "number": entries["conf_number"].get(),
-                    "head": entries["head"].get(),
-                    "deputy": entries.get("deputy", tk.StringVar(value="")).get(),
-                    "secretary": entries.get("secretary", tk.StringVar(value="")).get()
-                }
-
-                default_filename = f"{'Отчет' if report_mode else 'Программа'}_конференции_{conference_data['number']}.docx"
-                output_path = filedialog.asksaveasfilename(
-                    defaultextension=".docx",
-                    filetypes=[("Word документ", "*.docx")],
-                    title="Сохранить документ конференции",
-                    initialfile=default_filename
-                )
-                if not output_path:
-                    return
+    task = None
+    done_message = None
+
+    def set_running(running):
+        for entry in entries.values():
+            entry.config(state=tk.DISABLED if running else tk.NORMAL)
+        btn_file.config(state=tk.DISABLED if running else tk.NORMAL)
+        if all_mode:
+            btn_papers_file.config(state=tk.DISABLED if running else tk.NORMAL)
+        cancel_btn.config(state=tk.NORMAL if running else tk.DISABLED)
+        if running:
+            create_btn.config(state=tk.DISABLED)
+            progress_bar.config(mode='indeterminate', value=0)
+            progress_bar.start()
+        else:
+            progress_bar.stop()
+            progress_bar.config(mode='determinate', value=0)
+            check_fields()
 
-                with open(json_path.get(), encoding="utf-8") as f:
-                    contributions = json.load(f)
+    def on_progress(done, total):
+        if not window.winfo_exists():
+            return
+        progress_bar.stop()
+        progress_bar.config(mode='determinate', maximum=total, value=done)
+
+    def on_done():
+        nonlocal task
+        task = None
+        if not window.winfo_exists():
+            return
+        messagebox.showinfo("Успех", done_message or "Документ успешно создан!")
+        window.destroy()
+        root.deiconify()  # Показать главное окно снова
+
+    def on_error(e):
+        nonlocal task
+        task = None
+        if not window.winfo_exists():
+            return
+        set_running(False)
+        if isinstance(e, load_generator("generate_file3").NoAcceptedPapersError):
+            messagebox.showwarning("Предупреждение", str(e))
+        elif papers_mode or all_mode:
+            messagebox.showerror("Ошибка", f"Произошла ошибка при создании документа:\n{e}")
+        else:
+            messagebox.showerror("Ошибка", f"Не удалось создать файл:\n{e}")
+
+    def on_cancel():
+        nonlocal task
+        task = None
+        if window.winfo_exists():
+            set_running(False)
 
+    def cancel_task():
+        if task is not None:
+            task.cancel()
+            cancel_btn.config(state=tk.DISABLED)
+
+    def close_window():
+        cancel_task()
+        window.destroy()
+        root.deiconify()  # При закрытии вернуть главное окно
+
+    def create_file():
+        nonlocal task
+        input_path = json_path.get()
+
+        if all_mode:
+            output_dir = filedialog.askdirectory(title="Папка для сохранения документов")
+            if not output_dir:
+                return
+
+            number = entries["conf_number"].get().strip()
+            options = {field: entries[field].get().strip() for field in entries if field != "conf_number"}
+            options.update(
+                number=number,
+                contributions=input_path,
+                papers=papers_path.get(),
+                program=os.path.join(output_dir, f"Программа_конференции_{number}.docx"),
+                report=os.path.join(output_dir, f"Отчет_конференции_{number}.docx"),
+                papers_list=os.path.join(output_dir,
+                                         f"Список представляемых к публикации докладов конференции {number}.docx")
+            )
+
+            def generate(task):
+                nonlocal done_message
+                pipeline = load_generator("pipeline")
+                finished = 0
+
+                def on_result(result):
+                    nonlocal finished
+                    finished += 1
+                    task.report_progress(finished, len(pipeline.DOCUMENT_KINDS))
+
+                # Отмена проверяется при разборе выгрузок и при ожидании документов;
+                # ещё не начатые документы снимаются
+                results = pipeline.generate_all(options, export_cache=open_export_cache(), on_result=on_result,
+                                                check=task.check_cancelled)
+                errors = [f"{pipeline.DOCUMENT_TITLES[result['document']]}: {result['message']}"
+                          for result in results if result["status"] == "error"]
+                if errors:
+                    raise RuntimeError("\n".join(errors))
+                lines = ["Документы созданы в папке:", output_dir]
+                lines += [f"{pipeline.DOCUMENT_TITLES[result['document']]} не создан: {result['message']}"
+                          for result in results if result["status"] == "skipped"]
+                done_message = "\n".join(lines)
+        elif papers_mode:
+            conf_number = entries["conf_number"].get().strip()
+            default_filename = f"Список представляемых к публикации докладов конференции {conf_number}.docx" if conf_number else "Список представляемых к публикации докладов.docx"
+
+            output_path = filedialog.asksaveasfilename(
+                defaultextension=".docx",
+                filetypes=[("Word документ", "*.docx")],
+                title="Сохранить список публикуемых докладов",
+                initialfile=default_filename
+            )
+            if not output_path:
+                return
+
+            leader_name = entries["leader_name"].get()
+            leader_email = entries["leader_email"].get()
+            leader_phone = entries["leader_phone"].get()
+            department = entries["department"].get().strip()
+            section = entries["section"].get().strip()
+
+            def generate(task):
+                export_cache = open_export_cache()
+                if export_cache is not None:
+                    papers = export_cache.load_papers(input_path, wrap=task.cancellable)
+                else:
+                    # Публикации читаются по одной; от принятых остаются только нужные поля
+                    papers = iter_accepted_papers(
+                        validate_papers(task.cancellable(iter_papers(input_path)), input_path)
+                    )
+                task.check_cancelled()
+                load_generator("generate_file3").generate_accepted_papers_list(
+                    task.cancellable(papers),
+                    output_path,
+                    leader_name,
+                    leader_email,
+                    leader_phone,
+                    conf_number,
+                    progress=task.report_progress,
+                    department=department,
+                    section=section
+                )
+        else:
+            conference_data = {
+                "number": entries["conf_number"].get(),
+                "head": entries["head"].get(),
+                "deputy": entries["deputy"].get() if "deputy" in entries else "",
+                "secretary": entries["secretary"].get() if "secretary" in entries else "",
+                "department": entries["department"].get().strip(),
+                "section": entries["section"].get().strip()
+            }
+
+            default_filename = f"{'Отчет' if report_mode else 'Программа'}_конференции_{conference_data['number']}.docx"
+            output_path = filedialog.asksaveasfilename(
+                defaultextension=".docx",
+                filetypes=[("Word документ", "*.docx")],
+                title="Сохранить документ конференции",
+                initialfile=default_filename
+            )
+            if not output_path:
+                return
+
+            def generate(task):
                 if report_mode:
-                    generate_conference_report(conference_data, contributions, output_path)
+                    generate_document = load_generator("generate_file2").generate_conference_report
                 else:
-                    generate_conference_program(conference_data, contributions, output_path)
+                    generate_document = load_generator("generate_file1").generate_conference_program
+                export_cache = open_export_cache()
+                if export_cache is not None:
+                    # Повторно по той же выгрузке JSON не разбирается
+                    contributions = export_cache.load_contributions(input_path, wrap=task.cancellable)
+                else:
+                    # Доклады читаются из файла по одному и сразу нормализуются
+                    # Ошибки выгрузки сообщаются все сразу, до формирования заседаний
+                    contributions = iter_contributions(
+                        validate_contributions(task.cancellable(iter_json_array(input_path)), input_path)
+                    )
+                generate_document(conference_data, contributions, output_path, progress=task.report_progress)
 
-            messagebox.showinfo("Успех", "Документ успешно создан!")
-            window.destroy()
-            root.deiconify()  # Показать главное окно снова
-
-        except Exception as e:
-            messagebox.showerror("Ошибка", f"Не удалось создать файл:\n{e}")
+        task = BackgroundTask(root, generate, on_progress, on_done, on_error, on_cancel)
+        set_running(True)
+        task.start()
 
     window = tk.Toplevel()
-    window.protocol("WM_DELETE_WINDOW", lambda: (window.destroy(), root.deiconify()))  # При закрытии вернуть главное окно
+    window.protocol("WM_DELETE_WINDOW", close_window)
 
-    window.title("Данные для списка публикуемых докладов" if papers_mode else (
-        "Данные для отчета" if report_mode else "Данные для программы конференции"))
+    if all_mode:
+        window.title("Данные для всех документов")
+    else:
+        window.title("Данные для списка публикуемых докладов" if papers_mode else (
+            "Данные для отчета" if report_mode else "Данные для программы конференции"))
     window.configure(bg='#f0f0f0')
     window.resizable(False, False)
 
     title_text = "Данные для списка публикуемых докладов" if papers_mode else (
         "Данные для отчёта о конференции" if report_mode else "Данные для программы конференции")
+    if all_mode:
+        title_text = "Данные для программы, отчёта и списка публикаций"
 
     ttk.Label(window, text=title_text, style='Header.TLabel').grid(
         row=0, column=0, columnspan=3, pady=(10, 20), padx=10, sticky="w")
 
-    if papers_mode:
+    if all_mode:
+        fields = [
+            ("Номер конференции (например, 77-й):", "conf_number"),
+            ("Номер кафедры:", "department"),
+            ("Название секции кафедры:", "section"),
+            ("Научный руководитель (ФИО, должность, звание):", "head"),
+            ("Заместитель (ФИО, должность, звание):", "deputy"),
+            ("Секретарь (ФИО, должность):", "secretary"),
+            ("ФИО руководителя УНИДС:", "leader_name"),
+            ("Email руководителя УНИДС:", "leader_email"),
+            ("Телефон руководителя УНИДС:", "leader_phone")
+        ]
+    elif papers_mode:
         fields = [
             ("Номер конференции (например, 77-й):", "conf_number"),
+            ("Номер кафедры:", "department"),
+            ("Название секции кафедры:", "section"),
             ("ФИО руководителя УНИДС:", "leader_name"),
             ("Email руководителя УНИДС:", "leader_email"),
             ("Телефон руководителя УНИДС:", "leader_phone")
@@ -120,12 +409,16 @@ def open_data_window(root, report_mode=False, papers_mode=False):
     elif report_mode:
         fields = [
             ("Номер конференции (например, 77-й):", "conf_number"),
+            ("Номер кафедры:", "department"),
+            ("Название секции кафедры:", "section"),
             ("Научный руководитель (ФИО, должность, звание):", "head"),
             ("Секретарь (ФИО, должность):", "secretary")
         ]
     else:
         fields = [
             ("Номер конференции (например, 77-й):", "conf_number"),
+            ("Номер кафедры:", "department"),
+            ("Название секции кафедры:", "section"),
             ("Научный руководитель (ФИО, должность, звание):", "head"),
             ("Заместитель (ФИО, должность, звание):", "deputy"),
             ("Секретарь (ФИО, должность):", "secretary")
@@ -167,11 +460,13 @@ def open_data_window(root, report_mode=False, papers_mode=False):
         entry = ttk.Entry(window, width=40)
         entry.grid(row=i, column=1, padx=10, pady=5, columnspan=2, sticky="ew")
         bind_paste_shortcuts(entry)
+        entry.insert(0, FIELD_DEFAULTS.get(field_name, ""))
         entry.bind("<KeyRelease>", lambda e: check_fields())
         entries[field_name] = entry
 
     row_num = len(fields) + 1
-    ttk.Label(window, text="Файл с данными участников:").grid(row=row_num, column=0, sticky="w", padx=10, pady=5)
+    ttk.Label(window, text="Выгрузка докладов:" if all_mode else "Файл с данными участников:").grid(
+        row=row_num, column=0, sticky="w", padx=10, pady=5)
 
     json_path = tk.StringVar()
     entry_file = ttk.Entry(window, textvariable=json_path, width=30, state='readonly')
@@ -180,8 +475,19 @@ def open_data_window(root, report_mode=False, papers_mode=False):
     btn_file = ttk.Button(window, text="Выбрать...", command=select_json_file)
     btn_file.grid(row=row_num, column=2, padx=(0, 10), pady=5, sticky="e")
 
+    papers_path = tk.StringVar()
+    if all_mode:
+        row_num += 1
+        ttk.Label(window, text="Выгрузка публикаций:").grid(row=row_num, column=0, sticky="w", padx=10, pady=5)
+        ttk.Entry(window, textvariable=papers_path, width=30, state='readonly').grid(
+            row=row_num, column=1, padx=10, pady=5, sticky="ew")
+        btn_papers_file = ttk.Button(window, text="Выбрать...", command=select_papers_file)
+        btn_papers_file.grid(row=row_num, column=2, padx=(0, 10), pady=5, sticky="e")
+
     btn_text = "Создать список публикуемых докладов" if papers_mode else (
         "Создать отчёт" if report_mode else "Создать программу конференции")
+    if all_mode:
+        btn_text = "Создать все документы"
 
     create_btn = ttk.Button(
         window, text=btn_text, command=create_file,
@@ -189,6 +495,13 @@ def open_data_window(root, report_mode=False, papers_mode=False):
     )
     create_btn.grid(row=row_num + 1, column=0, columnspan=3, pady=(20, 10), padx=10, sticky="ew")
 
+    # Ход создания документа и отмена
+    progress_bar = ttk.Progressbar(window, mode='determinate')
+    progress_bar.grid(row=row_num + 2, column=0, columnspan=2, padx=10, pady=(0, 10), sticky="ew")
+
+    cancel_btn = ttk.Button(window, text="Отмена", command=cancel_task, state=tk.DISABLED)
+    cancel_btn.grid(row=row_num + 2, column=2, padx=(0, 10), pady=(0, 10), sticky="e")
+
     window.update_idletasks()
     width = window.winfo_width()
     height = window.winfo_height()
@@ -206,7 +519,7 @@ def run_interface():
     configure_styles()
 
     width = 400
-    height = 300
+    height = 360
     x = (root.winfo_screenwidth() // 2) - (width // 2)
     y = (root.winfo_screenheight() // 2) - (height // 2)
     root.geometry(f'{width}x{height}+{x}+{y}')
@@ -241,8 +554,26 @@ def run_interface():
         style='Accent.TButton'
     ).pack(fill='x', pady=10, ipady=8)
 
+    ttk.Button(
+        main_frame,
+        text="Создать все документы",
+        command=lambda: open_data_window(root, all_mode=True),
+        style='Accent.TButton'
+    ).pack(fill='x', pady=10, ipady=8)
+
+    if os.environ.get(STARTUP_PROBE_ENV):
+        # Режим замера: дожидаемся отрисовки окна, сообщаем время и выходим
+        root.update()
+        print(f"{STARTUP_PROBE_ENV} {time.perf_counter() - START_TIME:.4f}", flush=True)
+        root.destroy()
+        return
+
+    root.after(PREWARM_DELAY_MS, prewarm_generators)
     root.mainloop()
 
 
 if __name__ == "__main__":
+    # Документы создаются в дочерних процессах; нужно для собранного .exe
+    import multiprocessing
+    multiprocessing.freeze_support()
     run_interface()
@@ -0,0 +1,182 @@
+from datetime import datetime
+from functools import lru_cache
+from operator import itemgetter
+
+GROUP_FIELD_NAME = "Номер группы основного автора (докладчика)"
+
+# Кафедра и секция, для которых создаются документы, если они не заданы
+DEFAULT_DEPARTMENT = "43"
+DEFAULT_SECTION = "компьютерных технологий и программной инженерии"
+
+# Названия месяцев в родительном падеже (не зависят от локали системы)
+RU_MONTHS_GENITIVE = (
+    "января", "февраля", "марта", "апреля", "мая", "июня",
+    "июля", "августа", "сентября", "октября", "ноября", "декабря"
+)
+
+# Ключ сортировки для докладов и заседаний без времени начала — в конец
+NO_START = float("inf")
+
+
+def parse_start_dt(start_dt):
+    """Разбирает время начала доклада из формата Indico (ISO 8601)"""
+    if not start_dt:
+        return None
+    try:
+        return datetime.fromisoformat(start_dt)
+    except (TypeError, ValueError):
+        return None
+
+
+class Contribution:
+    """Нормализованная запись о докладе"""
+    __slots__ = ("session", "start", "room", "speaker", "group", "title", "status", "id", "track", "session_code")
+
+    def __init__(self, session, start, room, speaker, group, title, status, id=None, track="", session_code=""):
+        self.session = session
+        self.start = start
+        self.room = room
+        self.speaker = speaker
+        self.group = group
+        self.title = title
+        self.status = status
+        self.id = id
+        self.track = track
+        self.session_code = session_code
+
+    @property
+    def date(self):
+        """Дата доклада в формате ГГГГ-ММ-ДД"""
+        return self.start.strftime("%Y-%m-%d") if self.start else ""
+
+    @property
+    def time(self):
+        """Время начала доклада в формате ЧЧ:ММ"""
+        return self.start.strftime("%H:%M") if self.start else ""
+
+
+class AcceptedPaper:
+    """Нормализованная запись о принятой к публикации работе"""
+    __slots__ = ("submitter", "title", "contribution_id", "track")
+
+    def __init__(self, submitter, title, contribution_id=None, track=""):
+        self.submitter = submitter
+        self.title = title
+        self.contribution_id = contribution_id
+        self.track = track
+
+
+def department_of(conference_data):
+    """Номер кафедры и название секции из данных конференции"""
+    return (conference_data.get("department") or DEFAULT_DEPARTMENT,
+            conference_data.get("section") or DEFAULT_SECTION)
+
+
+def track_code(track):
+    """Код направления (трека) Indico: код, а если его нет — название"""
+    if isinstance(track, dict):
+        return str(track.get("code") or track.get("title") or "")
+    return str(track or "")
+
+
+def _default_normalizer():
+    # Соответствие полей ссылается на Contribution, поэтому импортируется при первом использовании
+    from field_mapping import contribution_mapping
+    return contribution_mapping().normalize
+
+
+def normalize_contribution(item):
+    """Преобразует доклад из JSON Indico в запись Contribution по соответствию полей по умолчанию"""
+    return _default_normalizer()(item)
+
+
+def iter_contributions(items, normalize=None):
+    """Построчно нормализует доклады; уже нормализованные записи пропускает как есть.
+
+    normalize — функция нормализации элемента выгрузки (см.
+    field_mapping.ContributionMapping); по умолчанию — соответствие полей Indico.
+    """
+    normalize = normalize or _default_normalizer()
+    for item in items:
+        if isinstance(item, Contribution):
+            yield item
+        else:
+            yield normalize(item)
+
+
+def process_contributions(items, normalize=None):
+    """Нормализует все доклады выгрузки"""
+    return list(iter_contributions(items, normalize))
+
+
+def iter_accepted_papers(papers):
+    """Отбирает принятые работы и возвращает их в виде записей AcceptedPaper"""
+    for paper in papers:
+        if isinstance(paper, AcceptedPaper):
+            yield paper
+        elif paper['state']['name'] == 'accepted':
+            contribution = paper['contribution']
+            yield AcceptedPaper(
+                paper['revisions'][0]['submitter']['full_name'],
+                contribution['title'],
+                contribution.get('id'),
+                track_code(contribution.get('track'))
+            )
+
+
+def group_by_session(contributions):
+    """Группирует доклады по заседаниям с сохранением порядка следования"""
+    sessions = {}
+    for entry in iter_contributions(contributions):
+        session = entry.session
+        if session not in sessions:
+            sessions[session] = []
+        sessions[session].append(entry)
+    return sessions
+
+
+def start_key(contribution):
+    """Ключ сортировки по фактическому моменту начала доклада"""
+    return contribution.start.timestamp() if contribution.start else NO_START
+
+
+def session_number_key(session):
+    """Ключ сортировки по номеру заседания: числовые номера — по значению"""
+    return (0, int(session), "") if session.isdigit() else (1, 0, session)
+
+
+def build_session_index(contributions):
+    """Группирует доклады по заседаниям за один проход и упорядочивает их по времени.
+
+    Возвращает список пар (номер заседания, доклады): заседания идут по началу
+    первого доклада, доклады внутри заседания — по времени начала. Время
+    начала разбирается один раз при нормализации, ключ сортировки
+    вычисляется один раз для каждого доклада.
+    """
+    sessions = {}
+    for entry in iter_contributions(contributions):
+        talks = sessions.get(entry.session)
+        if talks is None:
+            talks = sessions[entry.session] = []
+        talks.append((start_key(entry), entry))
+
+    index = []
+    for session, talks in sessions.items():
+        # Сортировка устойчива: доклады с одинаковым временем сохраняют порядок выгрузки
+        talks.sort(key=itemgetter(0))
+        index.append(((talks[0][0], session_number_key(session)), session, [entry for _, entry in talks]))
+
+    index.sort(key=itemgetter(0))
+    return [(session, talks) for _, session, talks in index]
+
+
+@lru_cache(maxsize=None)
+def _russian_day(day, with_year):
+    if with_year:
+        return f"{day.day} {RU_MONTHS_GENITIVE[day.month - 1]} {day.year} г."
+    return f"{day.day} {RU_MONTHS_GENITIVE[day.month - 1]}"
+
+
+def format_date_russian(start, with_year=False):
+    """Дата доклада по-русски («5 апреля» или «5 апреля 2025 г.»); строки кешируются для каждой даты"""
+    return _russian_day(start.date(), with_year) if start else ""
@@ -0,0 +1,506 @@
+import io
+import os
+import posixpath
+import re
+import zipfile
+from functools import lru_cache
+from xml.sax.saxutils import escape
+
+import docx
+from docx import Document
+from docx.oxml import OxmlElement
+from docx.oxml.ns import qn
+from docx.text.paragraph import Paragraph
+from lxml import etree
+
+DOCUMENT_PART = "word/document.xml"
+STYLES_PART = "word/styles.xml"
+NUMBERING_PART = "word/numbering.xml"
+CONTENT_TYPES_PART = "[Content_Types].xml"
+
+# Встроенные стили шаблона python-docx, на которые ссылаются генераторы;
+# остальные (кроме стилей по умолчанию и их родителей) в компактный шаблон не попадают
+TEMPLATE_STYLES = ("Normal", "List Number", "Table Grid")
+
+# Части шаблона, не нужные документам конференции: тема, стили с эффектами
+# Word 2010, настройки веб-представления, пользовательский XML и миниатюра
+OMITTED_RELATIONSHIPS = {
+    "http://schemas.openxmlformats.org/officeDocument/2006/relationships/theme",
+    "http://schemas.microsoft.com/office/2007/relationships/stylesWithEffects",
+    "http://schemas.openxmlformats.org/officeDocument/2006/relationships/webSettings",
+    "http://schemas.openxmlformats.org/officeDocument/2006/relationships/customXml",
+    "http://schemas.openxmlformats.org/package/2006/relationships/metadata/thumbnail",
+}
+THEME_RELATIONSHIP = "http://schemas.openxmlformats.org/officeDocument/2006/relationships/theme"
+
+# Атрибуты шрифтов темы и соответствующие им явные атрибуты w:rFonts
+THEME_FONT_ATTRIBUTES = {"asciiTheme": "ascii", "hAnsiTheme": "hAnsi", "eastAsiaTheme": "eastAsia", "cstheme": "cs"}
+_DRAWING_NS = {"a": "http://schemas.openxmlformats.org/drawingml/2006/main"}
+
+# Значения выравнивания абзаца в разметке WordprocessingML
+ALIGN_LEFT = "left"
+ALIGN_CENTER = "center"
+ALIGN_JUSTIFY = "both"
+
+
+_SPECIAL_CHARS = re.compile(r"([\t\r\n])")
+
+
+def _t_xml(chunk):
+    """Формирует элемент w:t, сохраняя пробелы по краям как python-docx"""
+    space = ' xml:space="preserve"' if len(chunk.strip()) < len(chunk) else ""
+    return f"<w:t{space}>{escape(chunk)}</w:t>"
+
+
+def style_id(style_name):
+    """Возвращает идентификатор стиля так же, как его формирует python-docx"""
+    return style_name.replace(" ", "")
+
+
+def set_style(obj, style_name):
+    """Назначает именованный стиль абзацу или фрагменту текста.
+
+    Присваивание obj.style в python-docx при каждом вызове перебирает все
+    стили документа в поисках стиля по умолчанию, поэтому в больших
+    документах стиль записывается сразу по идентификатору.
+    """
+    obj._element.style = style_id(style_name)
+    return obj
+
+
+def add_style(doc, name, style_type, base_style=None, size=None, bold=None, italic=None, font_name=None,
+              space_after=None, alignment=None):
+    """Определяет в документе именованный стиль абзаца или знака"""
+    style = doc.styles.add_style(name, style_type)
+    if base_style:
+        style.base_style = doc.styles[base_style]
+    font = style.font
+    if font_name:
+        font.name = font_name
+    if bold is not None:
+        font.bold = bold
+    if italic is not None:
+        font.italic = italic
+    if size:
+        font.size = size
+    if space_after is not None:
+        style.paragraph_format.space_after = space_after
+    if alignment is not None:
+        style.paragraph_format.alignment = alignment
+    return style
+
+
+def paragraph_appender(doc):
+    """Возвращает функцию add(text), добавляющую абзац в конец тела документа.
+
+    doc.add_paragraph при каждом вызове ищет w:sectPr перебором всех
+    элементов тела, поэтому список из тысяч абзацев строится за квадратичное
+    время; здесь w:sectPr находится один раз, и абзац вставляется перед ним.
+    """
+    body = doc.element.body
+    sect_pr = body.sectPr
+
+    def add(text=""):
+        p = OxmlElement("w:p")
+        if sect_pr is not None:
+            sect_pr.addprevious(p)
+        else:
+            body.append(p)
+        paragraph = Paragraph(p, doc._body)
+        if text:
+            paragraph.add_run(text)
+        return paragraph
+
+    return add
+
+
+def text_xml(text):
+    """Формирует содержимое фрагмента текста так же, как python-docx:
+    табуляции и переводы строк становятся отдельными элементами"""
+    if not _SPECIAL_CHARS.search(text):
+        return _t_xml(text) if text else ""
+
+    parts = []
+    for chunk in _SPECIAL_CHARS.split(text):
+        if chunk == "\t":
+            parts.append("<w:tab/>")
+        elif chunk in ("\r", "\n"):
+            parts.append("<w:br/>")
+        elif chunk:
+            parts.append(_t_xml(chunk))
+    return "".join(parts)
+
+
+@lru_cache(maxsize=None)
+def run_properties_xml(bold=False, italic=False, size=None, font=None, style=None):
+    """Формирует свойства фрагмента текста (w:rPr); результат кешируется"""
+    props = []
+    if style:
+        props.append(f'<w:rStyle w:val="{style}"/>')
+    if font:
+        props.append(f'<w:rFonts w:ascii="{font}" w:hAnsi="{font}"/>')
+    if bold:
+        props.append("<w:b/>")
+    if italic:
+        props.append("<w:i/>")
+    if size:
+        props.append(f'<w:sz w:val="{int(size.pt * 2)}"/>')
+    return f"<w:rPr>{''.join(props)}</w:rPr>" if props else ""
+
+
+def run_xml(text, bold=False, italic=False, size=None, font=None, style=None):
+    """Формирует фрагмент текста (w:r) со стилем знака и/или заданным оформлением шрифта"""
+    return f"<w:r>{run_properties_xml(bold, italic, size, font, style)}{text_xml(text)}</w:r>"
+
+
+@lru_cache(maxsize=None)
+def paragraph_properties_xml(style=None, space_after=None, line_spacing=None,
+                             left_indent=None, first_line_indent=None, alignment=None):
+    """Формирует свойства абзаца (w:pPr); результат кешируется"""
+    props = []
+    if style:
+        props.append(f'<w:pStyle w:val="{style}"/>')
+
+    spacing = ""
+    if space_after is not None:
+        spacing += f' w:after="{space_after.twips}"'
+    if line_spacing is not None:
+        spacing += f' w:line="{int(round(line_spacing * 240))}" w:lineRule="auto"'
+    if spacing:
+        props.append(f"<w:spacing{spacing}/>")
+
+    indent = ""
+    if left_indent is not None:
+        indent += f' w:left="{left_indent.twips}"'
+    if first_line_indent is not None:
+        if first_line_indent < 0:
+            indent += f' w:hanging="{-first_line_indent.twips}"'
+        else:
+            indent += f' w:firstLine="{first_line_indent.twips}"'
+    if indent:
+        props.append(f"<w:ind{indent}/>")
+
+    if alignment:
+        props.append(f'<w:jc w:val="{alignment}"/>')
+
+    return f"<w:pPr>{''.join(props)}</w:pPr>" if props else ""
+
+
+def paragraph_xml(runs="", style=None, space_after=None, line_spacing=None,
+                  left_indent=None, first_line_indent=None, alignment=None):
+    """Формирует абзац (w:p) с заданными свойствами и готовыми фрагментами текста"""
+    ppr = paragraph_properties_xml(style, space_after, line_spacing, left_indent, first_line_indent, alignment)
+    if not ppr and not runs:
+        return "<w:p/>"
+    return f"<w:p>{ppr}{runs}</w:p>"
+
+
+def _rels_part(part_name):
+    """Имя части связей для части пакета (для корня пакета — _rels/.rels)"""
+    directory, name = posixpath.split(part_name)
+    return posixpath.join(directory, "_rels", f"{name}.rels")
+
+
+def _serialize(root):
+    return etree.tostring(root, xml_declaration=True, encoding="UTF-8", standalone=True)
+
+
+def _theme_fonts(theme_xml):
+    """Гарнитуры шрифтов темы по именам вида minorHAnsi, majorEastAsia"""
+    root = etree.fromstring(theme_xml)
+    fonts = {}
+    for kind in ("major", "minor"):
+        font = root.find(f".//a:{kind}Font", _DRAWING_NS)
+        if font is None:
+            continue
+        for script, names in (("latin", ("Ascii", "HAnsi")), ("ea", ("EastAsia",)), ("cs", ("Bidi",))):
+            element = font.find(f"a:{script}", _DRAWING_NS)
+            for name in names:
+                fonts[kind + name] = element.get("typeface", "") if element is not None else ""
+    return fonts
+
+
+def _resolve_theme_fonts(root, theme_fonts):
+    """Заменяет ссылки на шрифты темы явными гарнитурами, чтобы документ без темы выглядел так же"""
+    for fonts in root.iter(qn("w:rFonts")):
+        for theme_attribute, attribute in THEME_FONT_ATTRIBUTES.items():
+            value = fonts.attrib.pop(qn(f"w:{theme_attribute}"), None)
+            if value is not None and theme_fonts.get(value):
+                fonts.set(qn(f"w:{attribute}"), theme_fonts[value])
+
+
+def _style_name(style):
+    name = style.find(qn("w:name"))
+    return name.get(qn("w:val")) if name is not None else None
+
+
+def _prune_styles(root, keep_names):
+    """Оставляет стили по умолчанию, стили keep_names и их родителей"""
+    for latent in root.findall(qn("w:latentStyles")):
+        root.remove(latent)
+
+    styles = {style.get(qn("w:styleId")): style for style in root.findall(qn("w:style"))}
+    pending = [key for key, style in styles.items()
+               if style.get(qn("w:default")) == "1" or _style_name(style) in keep_names]
+    kept = set()
+    while pending:
+        key = pending.pop()
+        if key in kept or key not in styles:
+            continue
+        kept.add(key)
+        based_on = styles[key].find(qn("w:basedOn"))
+        if based_on is not None:
+            pending.append(based_on.get(qn("w:val")))
+
+    for key, style in styles.items():
+        if key not in kept:
+            root.remove(style)
+            continue
+        # Ссылки на следующий и связанный стиль не должны указывать на удалённые
+        for name in ("w:next", "w:link"):
+            reference = style.find(qn(name))
+            if reference is not None and reference.get(qn("w:val")) not in kept:
+                style.remove(reference)
+
+
+def _prune_numbering(root, num_ids):
+    """Оставляет только списки с номерами num_ids и их абстрактные описания"""
+    abstract_ids = set()
+    for num in root.findall(qn("w:num")):
+        if num.get(qn("w:numId")) in num_ids:
+            abstract_ids.add(num.find(qn("w:abstractNumId")).get(qn("w:val")))
+        else:
+            root.remove(num)
+    for abstract in root.findall(qn("w:abstractNum")):
+        if abstract.get(qn("w:abstractNumId")) not in abstract_ids:
+            root.remove(abstract)
+
+
+def compact_package(parts, keep_styles=TEMPLATE_STYLES):
+    """Сокращает пакет .docx до частей и стилей, нужных документам конференции.
+
+    parts — словарь «имя части -> содержимое»; возвращается новый словарь.
+    Отбрасываются части из OMITTED_RELATIONSHIPS и всё, на что ссылаются
+    только они; шрифты темы подставляются в стили явно.
+    """
+    rels = {}
+    theme_fonts = {}
+    kept = {CONTENT_TYPES_PART}
+    pending = [""]
+    while pending:
+        source = pending.pop()
+        rels_name = _rels_part(source) if source else "_rels/.rels"
+        if rels_name not in parts:
+            continue
+        root = etree.fromstring(parts[rels_name])
+        for relationship in list(root):
+            if relationship.get("TargetMode") == "External":
+                continue
+            target = relationship.get("Target")
+            target = (target.lstrip("/") if target.startswith("/")
+                      else posixpath.normpath(posixpath.join(posixpath.dirname(source), target)))
+            if relationship.get("Type") in OMITTED_RELATIONSHIPS:
+                if relationship.get("Type") == THEME_RELATIONSHIP and target in parts:
+                    theme_fonts = _theme_fonts(parts[target])
+                root.remove(relationship)
+            elif target not in kept and target in parts:
+                kept.add(target)
+                pending.append(target)
+        rels[rels_name] = _serialize(root)
+
+    result = {name: parts[name] for name in parts if name in kept}
+    result.update(rels)
+
+    types = etree.fromstring(parts[CONTENT_TYPES_PART])
+    for override in types.findall("{*}Override"):
+        if override.get("PartName").lstrip("/") not in kept:
+            types.remove(override)
+    result[CONTENT_TYPES_PART] = _serialize(types)
+
+    if STYLES_PART in result:
+        styles = etree.fromstring(result[STYLES_PART])
+        _resolve_theme_fonts(styles, theme_fonts)
+        _prune_styles(styles, set(keep_styles))
+        result[STYLES_PART] = _serialize(styles)
+        if NUMBERING_PART in result:
+            num_ids = {num_id.get(qn("w:val")) for num_id in styles.iter(qn("w:numId"))}
+            numbering = etree.fromstring(result[NUMBERING_PART])
+            _resolve_theme_fonts(numbering, theme_fonts)
+            _prune_numbering(numbering, num_ids)
+            result[NUMBERING_PART] = _serialize(numbering)
+    return result
+
+
+@lru_cache(maxsize=None)
+def minimal_template():
+    """Компактный базовый шаблон: шаблон python-docx без лишних частей и стилей (содержимое .docx)"""
+    path = os.path.join(os.path.dirname(docx.__file__), "templates", "default.docx")
+    with zipfile.ZipFile(path) as package:
+        parts = {info.filename: package.read(info) for info in package.infolist()}
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as package:
+        for name, data in compact_package(parts).items():
+            package.writestr(name, data)
+    return buffer.getvalue()
+
+
+def new_document(compact=False):
+    """Создаёт пустой документ python-docx; при compact=True — на компактном шаблоне"""
+    return Document(io.BytesIO(minimal_template())) if compact else Document()
+
+
+def package_parts(doc):
+    """Части пакета документа python-docx без записи архива: (имя, содержимое)"""
+    package = doc.part.package
+    parts = list(package.iter_parts())
+    overrides = "".join(f'<Override PartName="{part.partname}" ContentType="{part.content_type}"/>'
+                        for part in parts)
+    yield CONTENT_TYPES_PART, (
+        "<?xml version='1.0' encoding='UTF-8' standalone='yes'?>\n"
+        '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+        '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+        f'<Default Extension="xml" ContentType="application/xml"/>{overrides}</Types>'
+    ).encode("utf-8")
+    yield "_rels/.rels", package.rels.xml
+    for part in parts:
+        yield part.partname.membername, part.blob
+        if len(part.rels):
+            yield part.partname.rels_uri.membername, part.rels.xml
+
+
+def package_template(doc, compresslevel=None):
+    """Заготовка для StreamingDocxWriter: (архив частей пакета doc без word/document.xml, document.xml).
+
+    Нужна, если по одному базовому документу пишется много архивов:
+    части копируются из заготовки без повторной сериализации и сжатия.
+    """
+    parts = dict(package_parts(doc))
+    document_xml = parts.pop(DOCUMENT_PART).decode("utf-8")
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED, compresslevel=compresslevel) as package:
+        for name, data in parts.items():
+            package.writestr(name, data)
+    return buffer.getvalue(), document_xml
+
+
+def save_document(doc, output_path, compresslevel=None):
+    """Сохраняет документ; compresslevel (0–9) задаёт степень сжатия архива.
+
+    Без compresslevel документ сохраняется средствами python-docx.
+    """
+    if compresslevel is None:
+        doc.save(output_path)
+        return
+    with zipfile.ZipFile(output_path, "w", zipfile.ZIP_DEFLATED, compresslevel=compresslevel) as package:
+        for name, data in package_parts(doc):
+            package.writestr(name, data)
+
+
+def temporary_output(output_path):
+    """Временный файл для записи документа по пути output_path; None, если output_path — объект-файл"""
+    if isinstance(output_path, (str, os.PathLike)):
+        return os.fspath(output_path) + ".tmp"
+    return None
+
+
+def finish_output(temp_path, output_path, completed):
+    """Подменяет output_path записанным временным файлом, а если запись не завершена — удаляет его"""
+    if temp_path is None:
+        return
+    if completed:
+        os.replace(temp_path, output_path)
+    elif os.path.exists(temp_path):
+        os.remove(temp_path)
+
+
+class StreamingDocxWriter:
+    """Записывает тело документа в архив .docx по частям, не строя дерево lxml.
+
+    Все части пакета, кроме word/document.xml, берутся из подготовленного
+    базового документа python-docx (стили, нумерация, поля, шапка), а
+    фрагменты заседаний дописываются в document.xml по мере формирования.
+    Архив пишется во временный файл и заменяет output_path только после
+    close(): при ошибке (выход из with по исключению, abort()) прежний
+    файл остаётся нетронутым. В объект-файл пишется напрямую.
+    template — заготовка из package_template(base_doc): архив начинается с её
+    копии (объект-файл тогда должен поддерживать чтение и seek).
+    """
+
+    def __init__(self, base_doc, output_path, compresslevel=None, template=None):
+        if template is None:
+            parts = dict(package_parts(base_doc))
+            document_xml = parts.pop(DOCUMENT_PART).decode("utf-8")
+        else:
+            archive, document_xml = template
+
+        # Фрагменты вставляются перед свойствами раздела в конце тела документа
+        split_at = document_xml.rindex("<w:sectPr")
+        self._tail = document_xml[split_at:]
+
+        self._output_path = output_path
+        self._temp_path = temporary_output(output_path)
+        self._stream = None
+        self._zip = None
+        target = self._temp_path or output_path
+        try:
+            if template is None:
+                self._zip = zipfile.ZipFile(target, "w", zipfile.ZIP_DEFLATED, compresslevel=compresslevel)
+                for name, data in parts.items():
+                    self._zip.writestr(name, data)
+            else:
+                if self._temp_path:
+                    with open(target, "wb") as f:
+                        f.write(archive)
+                else:
+                    target.write(archive)
+                # Дописывание в архив заготовки: её части уже сжаты
+                self._zip = zipfile.ZipFile(target, "a", zipfile.ZIP_DEFLATED, compresslevel=compresslevel)
+            self._stream = self._zip.open(DOCUMENT_PART, "w")
+            self._stream.write(document_xml[:split_at].encode("utf-8"))
+        except BaseException:
+            self.abort()
+            raise
+
+    def write(self, xml_fragment):
+        """Дописывает фрагмент разметки тела документа"""
+        self._stream.write(xml_fragment.encode("utf-8"))
+
+    def close(self):
+        """Завершает document.xml, закрывает архив и переносит его в output_path"""
+        if self._zip is None:
+            return
+        try:
+            self._stream.write(self._tail.encode("utf-8"))
+            self._stream.close()
+            self._stream = None
+            self._zip.close()
+            self._zip = None
+            # Подмена тоже может не удаться (output_path открыт в Word) — тогда временный файл удаляется
+            finish_output(self._temp_path, self._output_path, True)
+        except BaseException:
+            self.abort()
+            raise
+
+    def abort(self):
+        """Закрывает незавершённый архив без конца document.xml и удаляет временный файл"""
+        try:
+            if self._stream is not None:
+                self._stream.close()
+            if self._zip is not None:
+                self._zip.close()
+        except (OSError, ValueError):
+            # Архив всё равно отбрасывается; исходная ошибка важнее
+            pass
+        finally:
+            self._stream = None
+            self._zip = None
+            finish_output(self._temp_path, self._output_path, False)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
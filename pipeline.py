@@ -0,0 +1,211 @@
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+from data_loader import iter_json_array, iter_papers
+from field_mapping import contribution_mapping
+from instrumentation import stage
+from models import department_of, iter_accepted_papers, iter_contributions
+from validation import validate_contributions, validate_papers
+
+# Виды документов в порядке вывода
+DOCUMENT_KINDS = ("program", "report", "papers_list")
+
+# Названия документов в сообщениях и сводках
+DOCUMENT_TITLES = {"program": "программа", "report": "отчёт", "papers_list": "список публикаций"}
+
+# Как часто проверяется отмена: каждые CHECK_EVERY элементов выгрузки
+# и каждые CHECK_INTERVAL секунд ожидания документов
+CHECK_EVERY = 500
+CHECK_INTERVAL = 0.1
+
+# Обязательные поля для каждого вида документа (как в графическом интерфейсе)
+REQUIRED_FIELDS = {
+    "program": ["number", "head", "deputy", "secretary", "contributions"],
+    "report": ["number", "head", "secretary", "contributions"],
+    "papers_list": ["number", "leader_name", "leader_email", "leader_phone", "papers"],
+}
+
+# Поля шапки программы и отчёта
+CONFERENCE_DATA_FIELDS = ("number", "head", "deputy", "secretary", "department", "section")
+
+
+def checked(items, check):
+    """Поток items с вызовом check() каждые CHECK_EVERY элементов"""
+    for i, item in enumerate(items):
+        if i % CHECK_EVERY == 0:
+            check()
+        yield item
+
+
+def load_inputs(options, documents, export_cache=None, check=None):
+    """Загружает выгрузки один раз на все документы; возвращает (доклады, принятые работы).
+
+    check() вызывается между этапами загрузки и по ходу разбора выгрузок;
+    он прерывает загрузку исключением (например, при отмене).
+    """
+    check = check or (lambda: None)
+
+    def wrap(items):
+        return checked(items, check)
+
+    contributions, papers = [], []
+    check()
+    with stage("load"):
+        # В пакетном режиме доклады нужны и для списка публикаций: по ним работы без трека относятся к кафедрам
+        if options.get("contributions") and (options.get("split_by") or any(kind != "papers_list" for kind in documents)):
+            mapping = contribution_mapping(options.get("field_mapping"))
+            if export_cache is not None:
+                contributions = export_cache.load_contributions(options["contributions"], wrap, mapping)
+            else:
+                contributions = list(iter_contributions(
+                    validate_contributions(wrap(iter_json_array(options["contributions"])), options["contributions"],
+                                           mapping),
+                    mapping.normalize
+                ))
+            check()
+        if "papers_list" in documents:
+            if export_cache is not None:
+                papers = export_cache.load_papers(options["papers"], wrap)
+            else:
+                papers = list(iter_accepted_papers(validate_papers(wrap(iter_papers(options["papers"])),
+                                                                   options["papers"])))
+            check()
+    return contributions, papers
+
+
+def render_fragments(render, tasks, workers=None, fragment_cache=None, keys=None, progress=None):
+    """Формирует фрагменты разметки render(*задание) и отдаёт их в порядке заданий.
+
+    При workers больше одного фрагменты формируются в пуле процессов
+    (render — функция уровня модуля), иначе — по одному по мере записи.
+    С fragment_cache готовые фрагменты берутся из кеша по ключам keys.
+    Функция progress(done, total) вызывается перед выдачей каждого фрагмента.
+    """
+    fragments = _render_fragments(render, tasks, workers, fragment_cache, keys)
+    for i, fragment in enumerate(fragments, 1):
+        if progress:
+            progress(i, len(tasks))
+        yield fragment
+
+
+def _render_fragments(render, tasks, workers, fragment_cache, keys):
+    if not workers or workers < 2 or len(tasks) < 2:
+        for key, task in zip(keys or [None] * len(tasks), tasks):
+            if fragment_cache is None:
+                yield render(*task)
+            else:
+                yield fragment_cache.render(key, lambda: render(*task))
+        return
+
+    fragments = [fragment_cache.get(key) for key in keys] if fragment_cache is not None else [None] * len(tasks)
+    missing = [i for i, fragment in enumerate(fragments) if fragment is None]
+    if not missing:
+        yield from fragments
+        return
+
+    workers = min(workers, len(missing))
+    # Задания передаются пачками, чтобы пересылка между процессами не съела выигрыш
+    chunksize = max(1, len(missing) // (workers * 4))
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        rendered = executor.map(render, *zip(*(tasks[i] for i in missing)), chunksize=chunksize)
+        for i in range(len(fragments)):
+            fragment, fragments[i] = fragments[i], None
+            if fragment is None:
+                fragment = next(rendered)
+                if fragment_cache is not None:
+                    fragment_cache.put(keys[i], fragment)
+            yield fragment
+
+
+def run_job(job):
+    """Создаёт один документ (выполняется в отдельном процессе); возвращает описание результата"""
+    kind, options, items, output_path = job
+    department, section = department_of(options)
+    output = {"compact": options.get("compact", False), "compresslevel": options.get("compress_level")}
+    result = {"department": department, "document": kind, "path": output_path, "items": len(items)}
+    started = time.perf_counter()
+    try:
+        if kind == "papers_list":
+            from generate_file3 import NoAcceptedPapersError, generate_accepted_papers_list
+            try:
+                generate_accepted_papers_list(items, output_path, options["leader_name"], options["leader_email"],
+                                              options["leader_phone"], options["number"],
+                                              department=department, section=section, **output)
+                result["status"] = "created"
+            except NoAcceptedPapersError as e:
+                result.update(status="skipped", message=str(e))
+        else:
+            if kind == "program":
+                from generate_file1 import generate_conference_program as generate
+            else:
+                from generate_file2 import generate_conference_report as generate
+            from fragment_cache import FragmentCache
+
+            conference_data = {name: options.get(name, "") for name in CONFERENCE_DATA_FIELDS}
+            fragment_cache = FragmentCache(options["cache_dir"]) if options.get("cache_dir") else None
+            generate(conference_data, items, output_path, streaming=options.get("streaming", False),
+                     fragment_cache=fragment_cache, workers=options.get("render_jobs"),
+                     split_output=options.get("split_output"), **output)
+            result["status"] = "created"
+    except Exception as e:
+        result.update(status="error", message=str(e))
+    result["seconds"] = round(time.perf_counter() - started, 3)
+    return result
+
+
+def run_jobs(jobs, workers=None, on_result=None, check=None):
+    """Выполняет задания в пуле процессов; on_result(результат) вызывается по мере готовности.
+
+    check() вызывается каждые CHECK_INTERVAL секунд ожидания. Если on_result
+    или check прерывают работу исключением (например, при отмене), ещё
+    не начатые задания снимаются, а исключение передаётся дальше; уже
+    начатые документы дописываются в своих процессах.
+    """
+    if not jobs:
+        return []
+
+    results = []
+    pending = set()
+    executor = ProcessPoolExecutor(max_workers=min(len(jobs), workers or os.cpu_count() or 1))
+    try:
+        pending = {executor.submit(run_job, job) for job in jobs}
+        while pending:
+            done, pending = wait(pending, CHECK_INTERVAL if check else None, FIRST_COMPLETED)
+            if check:
+                check()
+            for future in done:
+                result = future.result()
+                results.append(result)
+                if on_result:
+                    on_result(result)
+    except BaseException:
+        # Задания снимаются здесь же: cancel_futures не срабатывает, если пул
+        # удалён сборщиком мусора раньше, чем его служебный поток заметит остановку
+        for future in pending:
+            future.cancel()
+        executor.shutdown(wait=False, cancel_futures=True)
+        raise
+    executor.shutdown()
+    return results
+
+
+def generate_all(options, documents=DOCUMENT_KINDS, workers=None, export_cache=None, on_result=None, check=None):
+    """Создаёт несколько документов одновременно в отдельных процессах.
+
+    Каждая выгрузка загружается один раз; пути сохранения берутся из
+    options[вид документа]. Общее время близко ко времени самого долгого
+    документа, а не к сумме. Возвращает результаты в порядке DOCUMENT_KINDS.
+    check — проверка отмены при загрузке и ожидании (см. load_inputs, run_jobs).
+    """
+    contributions, papers = load_inputs(options, documents, export_cache, check)
+    jobs = [(kind, options, papers if kind == "papers_list" else contributions, options[kind])
+            for kind in DOCUMENT_KINDS if kind in documents]
+    # Крупные задания — первыми, чтобы процессы загружались равномерно
+    jobs.sort(key=lambda job: len(job[2]), reverse=True)
+
+    results = run_jobs(jobs, workers, on_result, check)
+    if options.get("cache_dir"):
+        from fragment_cache import FragmentCache
+        FragmentCache(options["cache_dir"]).prune()
+    return sorted(results, key=lambda result: DOCUMENT_KINDS.index(result["document"]))
@@ -0,0 +1,91 @@
+import io
+import re
+import zipfile
+from itertools import groupby
+
+from models import format_date_russian
+from ooxml import StreamingDocxWriter, finish_output, package_template, save_document, temporary_output
+
+# Способы разделения программы и отчёта на отдельные документы
+SPLIT_OUTPUT_MODES = ("day", "session")
+
+# Символы, недопустимые в именах файлов Windows
+UNSAFE_FILE_CHARS = re.compile(r'[\\/:*?"<>|\s]+')
+
+
+def _session_day(session):
+    start = session[1][0].start
+    return start.date() if start else None
+
+
+def split_into_parts(sorted_sessions, split_output):
+    """Делит упорядоченные заседания на части по дням или по одному заседанию.
+
+    Возвращает список (подпись части, часть имени файла, заседания).
+    """
+    if split_output == "session":
+        return [(f"Заседание {session_num}", f"заседание_{session_num}", [(session_num, talks)])
+                for session_num, talks in sorted_sessions]
+
+    parts = []
+    for day, sessions in groupby(sorted_sessions, key=_session_day):
+        sessions = list(sessions)
+        if day is None:
+            parts.append(("Без даты", "без_даты", sessions))
+        else:
+            parts.append((format_date_russian(sessions[0][1][0].start, with_year=True), day.isoformat(), sessions))
+    return parts
+
+
+def part_file_name(prefix, number, width, slug):
+    """Имя документа части в архиве; номер в начале сохраняет порядок частей"""
+    return UNSAFE_FILE_CHARS.sub("_", f"{number:0{width}d}_{prefix}_{slug}.docx")
+
+
+def write_parts_archive(output_path, doc, parts, fragments, prefix, index_title, tail=None, compresslevel=None):
+    """Записывает части документа в zip-архив по одной и добавляет оглавление.
+
+    doc — базовый документ с шапкой: он открывает каждую часть, а затем
+    дополняется списком частей и сохраняется как оглавление архива.
+    fragments — разметка заседаний в порядке parts, tail — разметка,
+    завершающая каждую часть (например, подпись). Готовая часть сразу
+    переносится в архив, поэтому в памяти не больше одной части. Как и
+    StreamingDocxWriter, архив заменяет output_path только целиком.
+    """
+    temp_path = temporary_output(output_path)
+    try:
+        _write_parts(temp_path or output_path, doc, parts, fragments, prefix, index_title, tail, compresslevel)
+    except BaseException:
+        finish_output(temp_path, output_path, False)
+        raise
+    finish_output(temp_path, output_path, True)
+
+
+def _write_parts(output_path, doc, parts, fragments, prefix, index_title, tail, compresslevel):
+    width = len(str(len(parts)))
+    entries = []
+    fragments = iter(fragments)
+    # Базовый документ сериализуется и сжимается один раз на все части:
+    # при делении по заседаниям частей могут быть тысячи
+    template = package_template(doc, compresslevel)
+    # Документы .docx уже сжаты, поэтому в архив они кладутся без повторного сжатия
+    with zipfile.ZipFile(output_path, "w", zipfile.ZIP_STORED) as archive:
+        for number, (label, slug, sessions) in enumerate(parts, 1):
+            name = part_file_name(prefix, number, width, slug)
+            buffer = io.BytesIO()
+            with StreamingDocxWriter(doc, buffer, compresslevel, template) as writer:
+                for _ in sessions:
+                    writer.write(next(fragments))
+                if tail:
+                    writer.write(tail)
+            archive.writestr(name, buffer.getvalue())
+            talks = sum(len(session_talks) for _, session_talks in sessions)
+            entries.append(f"{label} — {name} (заседаний: {len(sessions)}, докладов: {talks})")
+
+        doc.add_paragraph()
+        doc.add_paragraph().add_run(index_title).bold = True
+        for entry in entries:
+            doc.add_paragraph(entry)
+        buffer = io.BytesIO()
+        save_document(doc, buffer, compresslevel)
+        archive.writestr(part_file_name(prefix, 0, width, "содержание"), buffer.getvalue())
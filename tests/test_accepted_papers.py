@@ -0,0 +1,64 @@
+"""Отбор принятых работ: в памяти остаются только нужные поля принятых работ"""
+import json
+import subprocess
+import sys
+
+import pytest
+
+from benchmarks.run_benchmarks import PROJECT_DIR, peak_rss_mb
+from data_loader import BACKEND_ENV
+from models import AcceptedPaper, iter_accepted_papers
+
+# Пиковая память загрузки публикаций в отдельном процессе: прирост RSS, МБ
+MEASURE_LOAD = """
+import sys
+from benchmarks.run_benchmarks import peak_rss_mb
+from pipeline import load_inputs
+
+before = peak_rss_mb()
+_, papers = load_inputs({"papers": sys.argv[1]}, ["papers_list"])
+print(len(papers), peak_rss_mb() - before)
+"""
+
+
+def paper(i, state="accepted", **fields):
+    item = {
+        "id": i,
+        "state": {"name": state, "title": state},
+        "revisions": [{"submitter": {"full_name": f"Автор {i}"}}, {"submitter": {"full_name": "Соавтор"}}],
+        "contribution": {"id": i, "title": f"Работа {i}", "track": {"code": "43", "title": "Кафедра 43"}},
+    }
+    item.update(fields)
+    return item
+
+
+def test_only_accepted_papers_are_kept():
+    papers = [paper(1), paper(2, "rejected"), paper(3, "submitted"), paper(4, contribution={"title": "Без трека"})]
+    accepted = list(iter_accepted_papers(papers))
+    assert [(p.submitter, p.title, p.contribution_id, p.track) for p in accepted] == [
+        ("Автор 1", "Работа 1", 1, "43"),
+        ("Автор 4", "Без трека", None, ""),
+    ]
+    # Уже отобранные записи (например, из кеша выгрузок) пропускаются как есть
+    assert list(iter_accepted_papers(accepted)) == accepted
+
+
+@pytest.mark.skipif(peak_rss_mb() is None, reason="пиковый размер процесса недоступен")
+def test_load_memory_does_not_grow_with_rejected_papers(tmp_path, monkeypatch):
+    # Разбор orjson целиком держит в памяти всю выгрузку, поэтому проверяется разборщик по умолчанию
+    monkeypatch.delenv(BACKEND_ENV, raising=False)
+    abstract = "Аннотация работы, которая в список публикаций не попадает. " * 30
+    path = tmp_path / "papers.json"
+    with open(path, "w", encoding="utf-8") as f:
+        f.write('{"papers": [')
+        for i in range(20000):
+            state = "accepted" if i % 1000 == 0 else "rejected"
+            f.write(("," if i else "") + json.dumps(paper(i, state, abstract=abstract), ensure_ascii=False))
+        f.write("]}")
+    size_mb = path.stat().st_size / 2 ** 20
+    assert size_mb > 40
+
+    output = subprocess.check_output([sys.executable, "-c", MEASURE_LOAD, str(path)], cwd=PROJECT_DIR, text=True)
+    accepted, growth_mb = output.split()
+    assert int(accepted) == 20
+    assert float(growth_mb) < 8, f"прирост {growth_mb} МБ при выгрузке {size_mb:.0f} МБ"
@@ -0,0 +1,164 @@
+"""Пакетный режим: разделение выгрузки по кафедрам и создание документов каждой кафедры"""
+import json
+import zipfile
+
+import pytest
+from docx import Document
+
+import cli
+from batch import (format_summary, output_file_name, plan_jobs, run_batch, session_prefix, split_contributions,
+                   split_papers)
+from models import AcceptedPaper, Contribution
+
+SECTIONS = {"43": "компьютерных технологий", "44": "прикладной информатики"}
+
+
+def talk(i, track, session_code, session="1"):
+    return Contribution(session, None, "52-18", f"Докладчик {i}", "4317М", f"Доклад {i}", "магистр", id=i,
+                        track=track, session_code=session_code)
+
+
+def export_item(i, track, session):
+    return {
+        "id": i,
+        "title": f"Доклад {i}",
+        "start_dt": f"2025-04-07T{10 + i % 5}:00:00",
+        "room_name": "52-18",
+        "session": {"friendly_id": session, "code": f"{track}.{session}" if track else "", "title": "Секция"},
+        "track": {"code": track, "title": f"Кафедра {track}"} if track else None,
+        "persons": [{"full_name": f"Иванов Иван {i}"}],
+        "custom_fields": [],
+    }
+
+
+def paper_item(i, state="accepted", track=None):
+    return {
+        "state": {"name": state},
+        "contribution": {"id": i, "title": f"Работа {i}", "track": track},
+        "revisions": [{"submitter": {"full_name": f"Петров Пётр {i}"}}],
+    }
+
+
+@pytest.fixture
+def options(tmp_path):
+    contributions = [export_item(i, "43", "1") for i in range(4)] + [export_item(4, "44", "2"), export_item(5, "", "3")]
+    papers = [paper_item(0), paper_item(1, "rejected"), paper_item(4), paper_item(9, track={"code": "44"}),
+              paper_item(5)]
+    (tmp_path / "contributions.json").write_text(json.dumps(contributions, ensure_ascii=False), encoding="utf-8")
+    (tmp_path / "papers.json").write_text(json.dumps({"papers": papers}, ensure_ascii=False), encoding="utf-8")
+    return {
+        "number": "78-й",
+        "head": "Иванов И.И.",
+        "deputy": "Петров П.П.",
+        "secretary": "Сидоров С.С.",
+        "leader_name": "Смирнов А.В.",
+        "leader_email": "unids@example.org",
+        "leader_phone": "+7 812 000-00-00",
+        "contributions": str(tmp_path / "contributions.json"),
+        "papers": str(tmp_path / "papers.json"),
+        "split_by": "track",
+        "output_dir": str(tmp_path / "out"),
+        "departments": {key: {"section": section} for key, section in SECTIONS.items()},
+    }
+
+
+@pytest.mark.parametrize("code, prefix", [("43.1", "43"), ("44-2", "44"), ("Заседание 43.2", "43"), ("43", ""),
+                                          ("", "")])
+def test_session_prefix(code, prefix):
+    assert session_prefix(code) == prefix
+
+
+def test_split_contributions_by_track_and_session_code():
+    talks = [talk(1, "43", "43.1"), talk(2, "44", "43.2"), talk(3, "", "44.1"), talk(4, "", "")]
+    by_track, unassigned = split_contributions(talks, "track")
+    assert {key: [t.id for t in items] for key, items in by_track.items()} == {"43": [1], "44": [2]}
+    assert unassigned == 2
+    by_session, unassigned = split_contributions(talks, "session")
+    assert {key: [t.id for t in items] for key, items in by_session.items()} == {"43": [1, 2], "44": [3]}
+    assert unassigned == 1
+
+
+def test_papers_follow_their_contribution_unless_track_is_given():
+    departments = {"43": [talk(1, "43", "43.1")], "44": [talk(2, "44", "44.1")]}
+    papers = [AcceptedPaper("А", "Работа 1", 1), AcceptedPaper("Б", "Работа 2", 2, track="43"),
+              AcceptedPaper("В", "Работа 3", 3)]
+    # Трек из выгрузки публикаций важнее кафедры доклада
+    by_track, unassigned = split_papers(papers, departments, "track")
+    assert {key: [p.title for p in items] for key, items in by_track.items()} == {"43": ["Работа 1", "Работа 2"]}
+    assert unassigned == 1
+    # При разделении по кодам заседаний трек публикации не используется
+    by_session, _ = split_papers(papers, departments, "session")
+    assert {key: [p.title for p in items] for key, items in by_session.items()} == {
+        "43": ["Работа 1"], "44": ["Работа 2"]
+    }
+
+
+def test_output_file_name_is_safe_for_windows():
+    options = {"number": "78-й", "department": "43/1 a"}
+    assert output_file_name("program", options) == "Программа_конференции_78-й_кафедра_43_1_a.docx"
+    assert output_file_name("report", dict(options, split_output="day")) == "Отчет_конференции_78-й_кафедра_43_1_a.zip"
+    assert output_file_name("papers_list", dict(options, split_output="day")).endswith(".docx")
+
+
+def test_plan_skips_departments_without_parameters(options):
+    options = dict(options, departments={"43": {"section": SECTIONS["43"]}})
+    talks = [talk(i, "43", "43.1") for i in range(3)] + [talk(3, "44", "44.1")]
+    jobs, skipped, unassigned = plan_jobs(options, ["program"], talks, [])
+    assert [(kind, department["department"], len(items)) for kind, department, items, _ in jobs] == [
+        ("program", "43", 3)
+    ]
+    assert skipped == [{"department": "44", "document": "program", "status": "skipped",
+                        "message": "не заданы параметры: section"}]
+    assert unassigned == {"contributions": 0, "papers": 0}
+
+
+def test_department_parameters_override_common_ones(options):
+    options["departments"]["44"]["head"] = "Кузнецов К.К."
+    talks = [talk(1, "43", "43.1"), talk(2, "44", "44.1"), talk(3, "44", "44.2")]
+    jobs, _, _ = plan_jobs(options, ["report"], talks, [])
+    # Крупные задания — первыми
+    assert [(department["department"], department["head"], department["section"]) for _, department, _, _ in jobs] == [
+        ("44", "Кузнецов К.К.", SECTIONS["44"]),
+        ("43", "Иванов И.И.", SECTIONS["43"]),
+    ]
+
+
+def test_run_batch_creates_documents_of_each_department(options):
+    summary = run_batch(options, ["program", "report", "papers_list"], jobs=2)
+
+    assert summary["departments"] == ["43", "44"]
+    assert summary["unassigned"] == {"contributions": 1, "papers": 1}
+    statuses = [(result["department"], result["document"], result["status"], result["items"])
+                for result in summary["documents"]]
+    assert statuses == [
+        ("43", "program", "created", 4),
+        ("43", "report", "created", 4),
+        ("43", "papers_list", "created", 1),
+        ("44", "program", "created", 1),
+        ("44", "report", "created", 1),
+        ("44", "papers_list", "created", 2),
+    ]
+    program = Document(summary["documents"][0]["path"])
+    assert any(SECTIONS["43"] in p.text for p in program.paragraphs)
+    assert not any("Доклад 4" in cell.text for table in program.tables for row in table.rows for cell in row.cells)
+    papers = Document(summary["documents"][5]["path"])
+    assert sum("Работа" in p.text for p in papers.paragraphs) == 2
+
+    lines = format_summary(summary).splitlines()
+    assert lines[0].startswith("Кафедра 43, программа: ")
+    assert lines[-2].startswith("Кафедр: 2, создано документов: 6 из 6")
+    assert lines[-1] == "Без кафедры: докладов 1, публикаций 1"
+
+
+def test_batch_mode_from_command_line(options, tmp_path):
+    config = tmp_path / "conference.json"
+    config.write_text(json.dumps(options, ensure_ascii=False), encoding="utf-8")
+    summary_path = tmp_path / "summary.json"
+
+    assert cli.main(["--config", str(config), "--split-output", "session", "--jobs", "2",
+                     "--summary", str(summary_path)]) == 0
+    summary = json.loads(summary_path.read_text(encoding="utf-8"))
+    archives = [result["path"] for result in summary["documents"] if result["document"] != "papers_list"]
+    assert len(archives) == 4 and all(path.endswith(".zip") for path in archives)
+    with zipfile.ZipFile(archives[0]) as archive:
+        assert any(name.endswith(".docx") for name in archive.namelist())
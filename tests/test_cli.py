@@ -0,0 +1,243 @@
+"""Командная строка: параметры запуска, проверка выгрузок и наблюдение за файлами"""
+import json
+import os
+
+import pytest
+from docx import Document
+
+import cli
+from field_mapping import contribution_mapping
+
+CONFERENCE = {"number": "78-й", "head": "Иванов И.И.", "deputy": "Петров П.П.", "secretary": "Сидоров С.С.",
+              "leader_name": "Смирнов А.В.", "leader_email": "unids@example.org", "leader_phone": "+7 812 000-00-00"}
+
+
+def write_json(path, data):
+    path.write_text(json.dumps(data, ensure_ascii=False), encoding="utf-8")
+    return str(path)
+
+
+def touch(path):
+    """Сдвигает время изменения: при грубой точности часов ФС оно могло не измениться"""
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+
+
+def contribution(i, **fields):
+    item = {
+        "id": i,
+        "title": f"Доклад {i}",
+        "start_dt": f"2025-04-07T1{i}:00:00",
+        "room_name": "52-18",
+        "session": {"friendly_id": "1", "title": "Секция 43"},
+        "persons": [{"full_name": f"Иванов Иван {i}"}],
+        "custom_fields": [{"name": "Учебная группа", "value": "4317М"}],
+    }
+    item.update(fields)
+    return item
+
+
+def paper(i, **fields):
+    item = {
+        "state": {"name": "accepted"},
+        "contribution": {"id": i, "title": f"Работа {i}"},
+        "revisions": [{"submitter": {"full_name": f"Петров Пётр {i}"}}],
+    }
+    item.update(fields)
+    return item
+
+
+@pytest.fixture
+def exports(tmp_path):
+    """Конфигурация и корректные выгрузки; возвращает аргументы командной строки для них"""
+    return ["--config", write_json(tmp_path / "conference.json", CONFERENCE),
+            "--contributions", write_json(tmp_path / "contributions.json", [contribution(i) for i in range(3)]),
+            "--papers", write_json(tmp_path / "papers.json", {"papers": [paper(0), paper(1)]})]
+
+
+def parser_error(capsys, argv):
+    with pytest.raises(SystemExit) as info:
+        cli.main(argv)
+    assert info.value.code == 2
+    return capsys.readouterr().err
+
+
+def test_no_documents_requested(capsys, exports):
+    assert "Не указан ни один документ" in parser_error(capsys, exports)
+
+
+def test_missing_conference_fields(capsys, tmp_path):
+    contributions = write_json(tmp_path / "contributions.json", [])
+    error = parser_error(capsys, ["--contributions", contributions, "--number", "78-й",
+                                  "--report", str(tmp_path / "report.docx")])
+    assert "Для документа report не заданы параметры: --head, --secretary" in error
+
+
+@pytest.mark.parametrize("argv, message", [
+    (["--split-by", "track", "--output-dir", "out", "--watch"], "не совмещается с --watch"),
+    (["--split-by", "track"], "не задан каталог --output-dir"),
+    (["--program", "p.docx", "--indico-url", "https://indico.example.org"], "не задан параметр --event-id"),
+    (["--program", "p.docx", "--compress-level", "10"], "invalid choice"),
+])
+def test_invalid_arguments(capsys, exports, argv, message):
+    assert message in parser_error(capsys, exports + argv)
+
+
+def test_invalid_options_from_config(capsys, tmp_path, exports):
+    config = write_json(tmp_path / "bad.json", dict(CONFERENCE, compress_level=12, program="p.docx"))
+    assert "compress_level должен быть целым числом от 0 до 9" in parser_error(capsys, exports + ["--config", config])
+    mapping = write_json(tmp_path / "mapping.json", {"room": {"transform": "нет такого"}})
+    assert "room" in parser_error(capsys, exports + ["--program", "p.docx", "--field-mapping", mapping])
+
+
+def test_command_line_overrides_config(exports):
+    args = cli.build_parser().parse_args(exports + ["--number", "79-й"])
+    options = cli.resolve_options(args)
+    assert options["number"] == "79-й" and options["head"] == CONFERENCE["head"]
+
+
+def test_check_valid_exports(capsys, exports):
+    assert cli.main(exports + ["--program", "p.docx", "--papers-list", "l.docx", "--check"]) == 0
+    out = capsys.readouterr().out.splitlines()
+    assert [line.split(" корректна")[0] for line in out] == [
+        f"Выгрузка {exports[3]}", f"Выгрузка {exports[5]}"
+    ]
+    assert out[0].endswith("элементов: 3") and out[1].endswith("элементов: 2")
+
+
+def test_check_reports_all_problems(capsys, tmp_path, exports):
+    contributions = write_json(tmp_path / "bad.json", [contribution(0, title=None), contribution(1),
+                                                       contribution(2, start_dt="завтра")])
+    status = cli.main(exports + ["--contributions", contributions, "--program", "p.docx", "--papers-list", "l.docx",
+                                 "--check"])
+    assert status == 1
+    captured = capsys.readouterr()
+    assert captured.err.splitlines() == [
+        f"{contributions}[0].title: ожидалось: строка, получено: null",
+        f"{contributions}[2].start_dt: дата и время не в формате ISO 8601 (ГГГГ-ММ-ДДTЧЧ:ММ): 'завтра'",
+        f"Ошибок в выгрузке {contributions}: 2",
+    ]
+    # Вторая выгрузка всё равно проверяется
+    assert "корректна, элементов: 2" in captured.out
+    assert not (tmp_path / "p.docx").exists()
+
+
+def test_check_unreadable_export(capsys, tmp_path, exports):
+    broken = tmp_path / "broken.json"
+    broken.write_text('[{"id": 1', encoding="utf-8")
+    assert cli.main(exports + ["--contributions", str(broken), "--report", "r.docx", "--check"]) == 1
+    assert str(broken) in capsys.readouterr().err
+    assert cli.main(exports + ["--contributions", str(tmp_path / "missing.json"), "--report", "r.docx",
+                               "--check"]) == 1
+
+
+def test_creates_documents(capsys, tmp_path, exports):
+    outputs = {name: str(tmp_path / f"{name}.docx") for name in ("program", "report", "papers-list")}
+    argv = exports + [arg for name, path in outputs.items() for arg in (f"--{name}", path)]
+    assert cli.main(argv) == 0
+    assert capsys.readouterr().out.splitlines() == [f"Создан документ: {path}" for path in outputs.values()]
+    papers = [p.text for p in Document(outputs["papers-list"]).paragraphs]
+    assert any("Работа 1" in text for text in papers)
+
+
+def test_generation_error_exit_code(capsys, tmp_path, exports):
+    contributions = write_json(tmp_path / "bad.json", [contribution(0, persons="Иванов")])
+    assert cli.main(exports + ["--contributions", contributions, "--program", str(tmp_path / "p.docx")]) == 1
+    assert capsys.readouterr().err.startswith("Не удалось создать документ: ")
+    assert not (tmp_path / "p.docx").exists()
+
+
+def run_watch(monkeypatch, options, documents, actions, fail=()):
+    """Запускает watch; перед каждым следующим опросом выполняется очередное действие из actions.
+
+    На опросах с номерами из fail создание документов завершается ошибкой.
+    Возвращает список пересозданных на каждом опросе документов.
+    """
+    rounds = []
+    pending = iter(actions)
+
+    def generate(options, kinds):
+        rounds[-1].append((kinds, contribution_mapping(options.get("field_mapping")).fingerprint))
+        if len(rounds) - 1 in fail:
+            raise PermissionError("документ открыт в Word")
+        return []
+
+    def sleep(_):
+        action = next(pending, None)
+        if action is None:
+            raise KeyboardInterrupt
+        action()
+        rounds.append([])
+
+    monkeypatch.setattr(cli, "generate_instrumented", generate)
+    monkeypatch.setattr(cli.time, "sleep", sleep)
+    rounds.append([])
+    with pytest.raises(KeyboardInterrupt):
+        cli.watch(options, documents, 0)
+    return [[kinds for kinds, _ in calls] for calls in rounds], rounds
+
+
+def test_watch_reruns_only_changed_documents(tmp_path, monkeypatch):
+    contributions = tmp_path / "contributions.json"
+    options = {"contributions": write_json(contributions, []),
+               "papers": write_json(tmp_path / "papers.json", {"papers": []})}
+
+    def edit_contributions():
+        write_json(contributions, [contribution(1)])
+
+    def rewrite_same_content():
+        write_json(contributions, [contribution(1)])
+        touch(contributions)
+
+    rounds, _ = run_watch(monkeypatch, options, ["program", "papers_list"],
+                          [lambda: None, edit_contributions, rewrite_same_content])
+    # Перезапись файла тем же содержимым документы не пересоздаёт
+    assert rounds == [[["program", "papers_list"]], [], [["program"]], []]
+
+
+def test_watch_retries_after_failure(tmp_path, monkeypatch, capsys):
+    options = {"contributions": write_json(tmp_path / "contributions.json", [])}
+
+    rounds, _ = run_watch(monkeypatch, options, ["report"], [lambda: None, lambda: None], fail={0})
+    # После ошибки хеши не запоминаются: тот же файл обрабатывается на следующем опросе
+    assert rounds == [[["report"]], [["report"]], []]
+    assert "Не удалось создать документ: документ открыт в Word" in capsys.readouterr().err
+
+
+def test_watch_survives_missing_export(tmp_path, monkeypatch, capsys):
+    contributions = tmp_path / "contributions.json"
+    options = {"contributions": str(contributions)}
+
+    rounds, _ = run_watch(monkeypatch, options, ["program"], [lambda: write_json(contributions, [])])
+    assert rounds == [[], [["program"]]]
+    assert f"Не удалось прочитать {contributions}" in capsys.readouterr().err
+
+
+def test_watch_reloads_edited_field_mapping(tmp_path, monkeypatch):
+    mapping = tmp_path / "mapping.json"
+    options = {
+        "contributions": write_json(tmp_path / "contributions.json", []),
+        "papers": write_json(tmp_path / "papers.json", {"papers": []}),
+        "field_mapping": write_json(mapping, {"room": {"path": "room_name"}}),
+    }
+
+    def edit_mapping():
+        write_json(mapping, {"room": {"path": "location_data.room_name"}})
+        touch(mapping)
+
+    rounds, calls = run_watch(monkeypatch, options, ["program", "papers_list"], [lambda: None, edit_mapping])
+    # Список публикаций от соответствия полей докладов не зависит
+    assert rounds == [[["program", "papers_list"]], [], [["program"]]]
+    assert calls[2][0][1] != calls[0][0][1]
+
+
+def test_watch_from_command_line_stops_on_interrupt(monkeypatch, tmp_path, exports):
+    generated = []
+    monkeypatch.setattr(cli, "generate_instrumented", lambda options, kinds: generated.append(kinds) or [])
+
+    def interrupt(_):
+        raise KeyboardInterrupt
+
+    monkeypatch.setattr(cli.time, "sleep", interrupt)
+    assert cli.main(exports + ["--program", str(tmp_path / "p.docx"), "--watch", "--interval", "0.5"]) == 0
+    assert generated == [["program"]]
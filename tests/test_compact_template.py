@@ -0,0 +1,92 @@
+"""Компактный базовый шаблон: пакет открывается в python-docx и даёт ту же разметку документа"""
+import io
+import posixpath
+import re
+import zipfile
+from datetime import datetime
+
+import pytest
+from docx import Document
+from lxml import etree
+
+import generate_file1
+import generate_file2
+import generate_file3
+from models import AcceptedPaper, Contribution
+from ooxml import (CONTENT_TYPES_PART, DOCUMENT_PART, NUMBERING_PART, OMITTED_RELATIONSHIPS, STYLES_PART,
+                   minimal_template)
+
+CONFERENCE = {"number": "78-й", "head": "Иванов И.И.", "deputy": "Петров П.П.", "secretary": "Сидоров С.С."}
+TALKS = [Contribution(str(1 + i % 2), datetime(2025, 4, 7, 10 + i), "52-18", f"Докладчик {i}", "4317М",
+                      f"Доклад {i}", "магистр") for i in range(4)]
+PAPERS = [AcceptedPaper(f"Петров Пётр {i}", f"Работа {i}") for i in range(3)]
+
+
+def read_package(data):
+    with zipfile.ZipFile(io.BytesIO(data)) as package:
+        return {name: package.read(name) for name in package.namelist()}
+
+
+def generate(kind, compact, **options):
+    output = io.BytesIO()
+    if kind == "program":
+        generate_file1.generate_conference_program(CONFERENCE, TALKS, output, compact=compact, **options)
+    elif kind == "report":
+        generate_file2.generate_conference_report(CONFERENCE, TALKS, output, compact=compact, **options)
+    else:
+        generate_file3.generate_accepted_papers_list(PAPERS, output, "Смирнов А.В.", "unids@example.org",
+                                                     "+7 812 000-00-00", "78-й", compact=compact)
+    return output.getvalue()
+
+
+def test_template_opens_in_python_docx():
+    document = Document(io.BytesIO(minimal_template()))
+    assert [style.name for style in document.styles if style.name in ("Normal", "List Number", "Table Grid")] == [
+        "Normal", "List Number", "Table Grid"
+    ]
+    document.add_paragraph("Проверка", style="List Number")
+    document.add_table(rows=1, cols=2).style = "Table Grid"
+    buffer = io.BytesIO()
+    document.save(buffer)
+    assert Document(buffer).paragraphs[-1].text == "Проверка"
+
+
+def test_template_keeps_only_referenced_parts():
+    parts = read_package(minimal_template())
+    # Отброшенных частей нет, а все ссылки ведут на части пакета
+    assert not any(name.startswith(("word/theme/", "customXml/", "docProps/thumbnail")) for name in parts)
+    assert "word/stylesWithEffects.xml" not in parts and "word/webSettings.xml" not in parts
+    for name, data in parts.items():
+        if not name.endswith(".rels"):
+            continue
+        # Ссылки из word/_rels/document.xml.rels считаются от каталога word/
+        base = posixpath.dirname(posixpath.dirname(name))
+        for relationship in etree.fromstring(data):
+            assert relationship.get("Type") not in OMITTED_RELATIONSHIPS
+            target = relationship.get("Target")
+            target = target.lstrip("/") if target.startswith("/") else posixpath.normpath(posixpath.join(base, target))
+            assert target in parts, (name, target)
+    overrides = etree.fromstring(parts[CONTENT_TYPES_PART]).findall("{*}Override")
+    assert {override.get("PartName").lstrip("/") for override in overrides} <= set(parts)
+    # Шрифты темы подставлены явно: без темы ссылки на неё не работали бы
+    assert b"Theme=" not in parts[STYLES_PART] and b"Theme=" not in parts.get(NUMBERING_PART, b"")
+
+
+@pytest.mark.parametrize("kind, options", [
+    ("program", {}),
+    ("program", {"streaming": True}),
+    ("report", {}),
+    ("report", {"streaming": True}),
+    ("papers_list", {}),
+])
+def test_same_document_markup_as_default_template(kind, options):
+    default = read_package(generate(kind, False, **options))
+    data = generate(kind, True, **options)
+    compact = read_package(data)
+    assert compact[DOCUMENT_PART] == default[DOCUMENT_PART]
+    # Все стили из разметки документа есть в компактном шаблоне
+    used = set(re.findall(rb'w:(?:pStyle|rStyle|tblStyle) w:val="([^"]+)"', compact[DOCUMENT_PART]))
+    defined = set(re.findall(rb'w:styleId="([^"]+)"', compact[STYLES_PART]))
+    assert used and used <= defined
+    assert sum(map(len, compact.values())) < sum(map(len, default.values())) / 2
+    assert any(paragraph.text for paragraph in Document(io.BytesIO(data)).paragraphs)
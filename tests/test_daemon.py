@@ -0,0 +1,198 @@
+"""Локальный HTTP-сервис: задания на создание документов и ответы на ошибки"""
+import http.client
+import io
+import json
+import os
+import threading
+
+import pytest
+from docx import Document
+
+import daemon
+
+CONFERENCE = {"number": "78-й", "head": "Иванов И.И.", "deputy": "Петров П.П.", "secretary": "Сидоров С.С."}
+
+
+def contribution(i, room="52-18", **fields):
+    item = {
+        "id": i,
+        "title": f"Доклад {i}",
+        "start_dt": f"2025-04-07T1{i}:00:00",
+        "room_name": room,
+        "session": {"friendly_id": "1", "code": "43.1", "title": "Секция 43"},
+        "persons": [{"full_name": f"Иванов Иван {i}"}],
+        "custom_fields": [{"name": "Учебная группа", "value": "4317М"}],
+    }
+    item.update(fields)
+    return item
+
+
+def start(server):
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server
+
+
+def request(server, method, path, body=None):
+    connection = http.client.HTTPConnection(*server.server_address, timeout=30)
+    try:
+        connection.request(method, path, body)
+        response = connection.getresponse()
+        return response.status, response.getheader("Content-Type"), response.read()
+    finally:
+        connection.close()
+
+
+def post(server, path, job):
+    return request(server, "POST", path, json.dumps(job, ensure_ascii=False).encode("utf-8"))
+
+
+def error_of(response):
+    status, content_type, body = response
+    assert content_type == "application/json; charset=utf-8"
+    return status, json.loads(body)["error"]
+
+
+def document_text(data):
+    document = Document(io.BytesIO(data))
+    return "\n".join(p.text for p in document.paragraphs)
+
+
+def paper(i, state="accepted"):
+    return {
+        "state": {"name": state},
+        "contribution": {"id": i, "title": f"Работа {i}"},
+        "revisions": [{"submitter": {"full_name": f"Петров Пётр {i}"}}],
+    }
+
+
+@pytest.fixture
+def serve():
+    servers = []
+
+    def serve(**options):
+        servers.append(start(daemon.create_server("127.0.0.1", 0, **options)))
+        return servers[-1]
+
+    yield serve
+    for server in servers:
+        server.shutdown()
+        server.server_close()
+
+
+@pytest.fixture(scope="module")
+def server():
+    server = start(daemon.create_server("127.0.0.1", 0))
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def test_edited_field_mapping_applies_to_next_job(tmp_path, serve):
+    mapping = tmp_path / "mapping.json"
+    mapping.write_text(json.dumps({"room": {"path": "room_name"}}), encoding="utf-8")
+    server = serve(field_mapping=str(mapping))
+    job = {"conference": CONFERENCE, "contributions": [contribution(1, location_data={"room_name": "52-19"})]}
+
+    status, _, data = post(server, "/program", job)
+    assert status == 200 and "52-18" in document_text(data)
+
+    mapping.write_text(json.dumps({"room": {"path": "location_data.room_name"}}), encoding="utf-8")
+    stat = os.stat(mapping)
+    os.utime(mapping, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+    status, _, data = post(server, "/program", job)
+    assert status == 200 and "52-19" in document_text(data)
+
+    # Испорченный файл — ошибка сервиса, а не задания
+    mapping.write_text("{", encoding="utf-8")
+    os.utime(mapping, ns=(stat.st_atime_ns, stat.st_mtime_ns + 2 * 10 ** 9))
+    status, _, body = post(server, "/program", job)
+    assert status == 500
+    assert "соответствие полей" in json.loads(body)["error"]
+
+
+def test_health(server):
+    assert request(server, "GET", "/health") == (200, "text/plain; charset=utf-8", b"ok")
+    assert error_of(request(server, "GET", "/program")) == (404, "Не найдено")
+
+
+@pytest.mark.parametrize("kind, header", [("program", "Программа 78-й"), ("report", "Отчет о проведении 78-й")])
+def test_program_and_report(server, kind, header):
+    talks = [contribution(2), contribution(1, session={"friendly_id": "2", "title": "Секция 44"})]
+    status, content_type, data = post(server, f"/{kind}", {"conference": dict(CONFERENCE, section="информатики"),
+                                                             "contributions": talks})
+    assert status == 200 and content_type == daemon.DOCX_CONTENT_TYPE
+    document = Document(io.BytesIO(data))
+    text = document_text(data) + "\n".join(cell.text for table in document.tables for row in table.rows
+                                           for cell in row.cells)
+    assert header in text and "информатики" in text
+    assert text.index("Доклад 1") < text.index("Доклад 2")
+
+
+def test_papers_list(server):
+    job = {"conference": {"number": "78-й", "leader_name": "Смирнов А.В."},
+           "papers": [paper(1), paper(2, "rejected"), paper(3)]}
+    status, content_type, data = post(server, "/papers_list", job)
+    assert status == 200 and content_type == daemon.DOCX_CONTENT_TYPE
+    text = document_text(data)
+    assert "Работа 1" in text and "Работа 3" in text and "Работа 2" not in text
+    assert "Смирнов А.В." in text
+
+
+@pytest.mark.parametrize("path, body, status, message", [
+    ("/unknown", b"{}", 400, "Неизвестный вид документа: unknown"),
+    ("/program", b"{", 400, "Expecting"),
+    ("/program", b"[]", 400, "Задание должно быть объектом JSON"),
+    ("/program", b"{}", 400, "В задании отсутствует поле contributions"),
+    ("/papers_list", b"{}", 400, "В задании отсутствует поле papers"),
+    ("/papers_list", json.dumps({"papers": [paper(1, "rejected")]}).encode(), 400, "принят"),
+    ("/program", json.dumps({"contributions": [contribution(1, title=None)]}).encode(), 400, "[0].title"),
+])
+def test_job_errors(server, path, body, status, message):
+    error_status, error = error_of(request(server, "POST", path, body))
+    assert error_status == status
+    assert message in error
+
+
+def test_server_error_is_reported(server, monkeypatch):
+    def fail(*args, **kwargs):
+        raise OSError("диск переполнен")
+
+    monkeypatch.setattr(daemon.generate_file1, "generate_conference_program", fail)
+    assert error_of(post(server, "/program", {"contributions": [contribution(1)]})) == (
+        500, "Не удалось создать документ: диск переполнен"
+    )
+
+
+def test_parallel_jobs_get_their_own_documents(server):
+    from concurrent.futures import ThreadPoolExecutor
+
+    def run(i):
+        job = {"conference": dict(CONFERENCE, number=f"{i}-й"), "contributions": [contribution(1, title=f"Тема {i}")]}
+        status, _, data = post(server, "/program", job)
+        return status, document_text(data)
+
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        results = list(executor.map(run, range(8)))
+    for i, (status, text) in enumerate(results):
+        assert status == 200
+        assert f"Программа {i}-й" in text and f"Тема {i}" in text
+        assert all(f"Тема {j}" not in text for j in range(8) if j != i)
+
+
+def test_base_document_cache_returns_independent_copies():
+    cache = daemon.BaseDocumentCache()
+    first = cache.get("program")
+    first.add_paragraph("Изменение первой копии")
+    second = cache.get("program")
+    assert second is not first
+    assert "Изменение первой копии" not in [p.text for p in second.paragraphs]
+    assert len(second.paragraphs) == len(first.paragraphs) - 1
+
+
+def test_compact_server(serve):
+    server = serve(compact=True, compresslevel=9)
+    status, _, data = post(server, "/report", {"conference": CONFERENCE, "contributions": [contribution(1)]})
+    assert status == 200
+    assert "Доклад 1" in "\n".join(cell.text for table in Document(io.BytesIO(data)).tables
+                                   for row in table.rows for cell in row.cells)
@@ -0,0 +1,199 @@
+"""Чтение выгрузок: одинаковый результат и одинаковые ошибки у обоих разборщиков JSON"""
+import codecs
+import json
+
+import pytest
+
+import data_loader
+from data_loader import BACKEND_ENV, CHUNK_SIZE, ExportFormatError, iter_json_array, iter_papers, load_json
+
+BACKENDS = ["json", pytest.param("orjson", marks=pytest.mark.skipif(data_loader.orjson is None,
+                                                                      reason="orjson не установлен"))]
+
+
+@pytest.fixture(params=BACKENDS)
+def backend(request, monkeypatch):
+    monkeypatch.setenv(BACKEND_ENV, request.param)
+    assert data_loader.json_backend() == request.param
+    return request.param
+
+
+@pytest.fixture
+def write(tmp_path):
+    def write(data):
+        path = tmp_path / "export.json"
+        path.write_bytes(data.encode() if isinstance(data, str) else data)
+        return str(path)
+
+    return write
+
+
+def read_all(path, key=None):
+    return list(iter_json_array(path, key=key))
+
+
+def error_for(path, monkeypatch, backend, key=None):
+    monkeypatch.setenv(BACKEND_ENV, backend)
+    with pytest.raises(ExportFormatError) as info:
+        read_all(path, key)
+    return str(info.value)
+
+
+@pytest.mark.parametrize("data, key", [
+    ('[{"id": 1}]', None),
+    ('{"papers": [{"id": 1}]}', "papers"),
+])
+def test_bom_is_skipped(backend, write, data, key):
+    path = write(codecs.BOM_UTF8 + data.encode())
+    assert read_all(path, key) == [{"id": 1}]
+
+
+def test_invalid_utf8(backend, write):
+    path = write(b'[{"title": "\xd0\x9f\xff"}]')
+    with pytest.raises(ExportFormatError, match=r"недопустимый байт 0xff \(байт 14\)"):
+        read_all(path)
+
+
+def test_character_cut_by_end_of_file(backend, write):
+    path = write(b'[{"title": "\xd0')
+    with pytest.raises(ExportFormatError, match="оборванный символ в конце файла"):
+        read_all(path)
+
+
+@pytest.mark.parametrize("data", ['[{"id": 1}, {"id":', '[{"id": 1}', '[', '{"papers": [1]'])
+def test_truncated_file(backend, write, data):
+    with pytest.raises(ExportFormatError, match="Некорректный JSON"):
+        read_all(write(data), "papers" if data.startswith("{") else None)
+
+
+@pytest.mark.parametrize("data", ['[1,]', '[{"id": 1,}]', '{"papers": [1],}'])
+def test_trailing_comma(backend, write, data):
+    with pytest.raises(ExportFormatError, match="Некорректный JSON"):
+        read_all(write(data), "papers" if data.startswith("{") else None)
+
+
+@pytest.mark.parametrize("data, key", [
+    ('[{"id": 1}, {"id":', None),
+    ('[{"id": 1}', None),
+    ('[1,]', None),
+    ('[{"id": 1,}]', None),
+    ('{"papers": [1],}', "papers"),
+    ('[1] x', None),
+    ('[1 2]', None),
+    ('   ', None),
+    ('', None),
+    ('[1, 2]', "papers"),
+    ('{"id": 1}', None),
+    ('{"id": 1}', "papers"),
+    ('{"papers": 1}', "papers"),
+    (b'[{"title": "\xff"}]', None),
+])
+def test_backends_report_same_error(write, monkeypatch, data, key):
+    if data_loader.orjson is None:
+        pytest.skip("orjson не установлен")
+    path = write(data)
+    assert error_for(path, monkeypatch, "json", key) == error_for(path, monkeypatch, "orjson", key)
+
+
+def test_error_position_counts_characters_after_bom(backend, write):
+    path = write(codecs.BOM_UTF8 + '["Пётр",]'.encode())
+    with pytest.raises(ExportFormatError, match=r"\(символ 8\)"):
+        read_all(path)
+
+
+@pytest.mark.parametrize("shift", range(-40, 8))
+def test_token_split_across_chunk_boundary(backend, write, shift):
+    # Граница блока в 64 КБ по очереди проходит через имя поля, многобайтовые символы и число
+    prefix = '[{"pad": "' + "x" * (CHUNK_SIZE - 20 + shift) + '"}, '
+    items = [{"pad": "x" * (CHUNK_SIZE - 20 + shift)}, {"title": "Доклад", "id": 1234567890}]
+    path = write(prefix + '{"title": "Доклад", "id": 1234567890}]')
+    assert read_all(path) == items
+
+
+def test_error_past_chunk_boundary(backend, write):
+    data = json.dumps([{"id": i} for i in range(10000)])[:-1] + ",]"
+    assert len(data) > CHUNK_SIZE
+    with pytest.raises(ExportFormatError, match=rf"\(символ {len(data) - 1}\)"):
+        read_all(write(data))
+
+
+def test_nan_accepted_by_both_backends(backend, write):
+    # orjson не принимает NaN, стандартный json принимает — результат не зависит от разборщика
+    items = read_all(write('[{"score": NaN}]'))
+    assert len(items) == 1 and items[0]["score"] != items[0]["score"]
+
+
+def test_papers_key_on_top_level_array(backend, write):
+    with pytest.raises(ExportFormatError, match="Ожидался объект JSON верхнего уровня"):
+        list(iter_papers(write('[{"id": 1}]')))
+
+
+def test_load_json_reports_stdlib_error(backend, write):
+    with pytest.raises(ExportFormatError, match=r"Expecting value \(символ 3\)"):
+        load_json(write('[1,]'))
+
+
+# Экранирование, суррогатная пара, многобайтовые символы, числа, вложенные значения и пробелы между лексемами
+ARRAY_TEXT = (' [ {"title": "Кавычка \\" и \\\\ обратная черта", "emoji": "\\ud83d\\ude00 😀",\n'
+              '   "n": -12.5e3, "ok": true, "none": null, "persons": [{"full_name": "Пётр"}]} ,\r\n'
+              '  12345678901234567890, "строка", [], {} ] ')
+
+
+@pytest.mark.parametrize("chunk_size", [1, 2, 3, 5, 7, 64])
+def test_stream_matches_json_loads_for_any_chunk_size(monkeypatch, write, chunk_size):
+    monkeypatch.setenv(BACKEND_ENV, "json")
+    path = write(ARRAY_TEXT)
+    assert list(iter_json_array(path, chunk_size=chunk_size)) == json.loads(ARRAY_TEXT)
+
+
+@pytest.mark.parametrize("chunk_size", [1, 3, 4, 16])
+def test_stream_skips_other_fields_for_any_chunk_size(monkeypatch, write, chunk_size):
+    monkeypatch.setenv(BACKEND_ENV, "json")
+    text = '{"count": 3, "meta": {"papers": [0], "s": "]}"}, "papers": ' + ARRAY_TEXT + ', "tail": [1, {"a": "b"}]}'
+    path = write(codecs.BOM_UTF8 + text.encode())
+    assert list(iter_papers(path, chunk_size=chunk_size)) == json.loads(text)["papers"]
+
+
+@pytest.mark.parametrize("chunk_size", [1, 2, 3, 5])
+def test_stream_error_position_does_not_depend_on_chunk_size(monkeypatch, write, chunk_size):
+    monkeypatch.setenv(BACKEND_ENV, "json")
+    path = write('["Пётр", {"id": 1} {"id": 2}]')
+    with pytest.raises(ExportFormatError, match=r"некорректный разделитель элементов '\{' \(символ 19\)"):
+        list(iter_json_array(path, chunk_size=chunk_size))
+
+
+def test_stream_yields_items_before_reading_whole_file(monkeypatch, write):
+    monkeypatch.setenv(BACKEND_ENV, "json")
+    path = write('[{"id": 1}, {"id": 2}, ' + " " * (4 * CHUNK_SIZE) + "oops]")
+    items = iter_json_array(path, chunk_size=16)
+    assert next(items) == {"id": 1}
+    assert next(items) == {"id": 2}
+    with pytest.raises(ExportFormatError):
+        next(items)
+
+
+@pytest.mark.parametrize("read, data", [
+    (iter_json_array, '[{"id": 1}, {"id": 2}, '),
+    (iter_papers, '{"count": 3, "papers": [{"id": 1}, {"id": 2}, '),
+], ids=["array", "papers"])
+def test_default_backend_streams(monkeypatch, write, read, data):
+    # Разбор orjson держит в памяти весь документ, поэтому без явного выбора массивы читаются потоково
+    monkeypatch.delenv(BACKEND_ENV, raising=False)
+    assert not data_loader.parses_arrays_whole()
+
+    def whole_file_load(path):
+        raise AssertionError(f"файл {path} разобран целиком")
+
+    monkeypatch.setattr(data_loader, "_orjson_load", whole_file_load)
+    items = read(write(data + " " * (4 * CHUNK_SIZE) + "oops]"), chunk_size=16)
+    assert next(items) == {"id": 1}
+    assert next(items) == {"id": 2}
+    with pytest.raises(ExportFormatError, match="Некорректный JSON"):
+        next(items)
+
+
+def test_whole_file_parsing_is_opt_in(monkeypatch):
+    monkeypatch.setenv(BACKEND_ENV, "orjson")
+    assert data_loader.parses_arrays_whole() == (data_loader.orjson is not None)
+    monkeypatch.setenv(BACKEND_ENV, "json")
+    assert not data_loader.parses_arrays_whole()
@@ -0,0 +1,149 @@
+"""Кеш разобранных выгрузок: поиск записей, вытеснение и разделение по формату и соответствию полей"""
+import json
+import os
+import shutil
+
+import pytest
+
+import export_cache
+from export_cache import ExportCache
+from field_mapping import ContributionMapping
+from validation import ExportValidationError
+
+
+def contribution(i, **fields):
+    item = {
+        "id": i,
+        "title": f"Доклад {i}",
+        "start_dt": f"2025-04-07T10:{i % 60:02d}:00",
+        "room_name": "52-18",
+        "hall": "Большой зал",
+        "session": {"friendly_id": str(i % 3 + 1), "code": "43.1", "title": "Секция 43"},
+        "persons": [{"full_name": f"Докладчик {i}"}],
+        "custom_fields": [{"name": "Номер группы", "value": "4317М"}],
+    }
+    item.update(fields)
+    return item
+
+
+def write_export(path, count=5, **fields):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump([contribution(i, **fields) for i in range(count)], f, ensure_ascii=False)
+    return str(path)
+
+
+def rows(records):
+    return [tuple(getattr(record, name) for name in record.__slots__) for record in records]
+
+
+@pytest.fixture
+def parses(monkeypatch):
+    """Пути выгрузок, которые разбирались (а не брались из кеша)"""
+    parsed = []
+    iter_json_array = export_cache.iter_json_array
+
+    def counting(path, *args, **kwargs):
+        parsed.append(os.path.basename(path))
+        return iter_json_array(path, *args, **kwargs)
+
+    monkeypatch.setattr(export_cache, "iter_json_array", counting)
+    return parsed
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return ExportCache(str(tmp_path / "cache" / "exports.sqlite3"))
+
+
+def test_second_load_uses_cache(tmp_path, cache, parses):
+    path = write_export(tmp_path / "a.json")
+    first = cache.load_contributions(path)
+    second = cache.load_contributions(path)
+    assert parses == ["a.json"]
+    assert rows(second) == rows(first)
+    assert second[0].start == first[0].start and second[0].start is not None
+
+
+def test_same_content_found_by_hash(tmp_path, cache, parses):
+    path = write_export(tmp_path / "a.json")
+    cache.load_contributions(path)
+
+    # Та же выгрузка, скачанная заново или скопированная в другой файл
+    os.utime(path, ns=(0, 0))
+    copy = shutil.copy(path, tmp_path / "b.json")
+    cache.load_contributions(path)
+    cache.load_contributions(copy)
+    assert parses == ["a.json"]
+
+
+def test_changed_content_is_parsed_again(tmp_path, cache, parses):
+    path = write_export(tmp_path / "a.json")
+    cache.load_contributions(path)
+    write_export(path, count=6)
+    assert len(cache.load_contributions(path)) == 6
+    assert parses == ["a.json", "a.json"]
+
+
+def test_invalid_export_is_not_cached(tmp_path, cache, parses):
+    path = write_export(tmp_path / "a.json", title=5)
+    for _ in range(2):
+        with pytest.raises(ExportValidationError):
+            cache.load_contributions(path)
+    assert parses == ["a.json", "a.json"]
+
+
+def test_least_recently_used_entries_are_evicted(tmp_path, parses):
+    # Содержимое разное, иначе записи нашлись бы по хешу друг друга
+    paths = [write_export(tmp_path / f"{name}.json", count=200 + i) for i, name in enumerate("abc")]
+    cache = ExportCache(str(tmp_path / "exports.sqlite3"))
+    cache.load_contributions(paths[0])
+    size = len(export_cache.pack_contributions(cache.load_contributions(paths[0])))
+
+    # Помещаются две записи: после загрузки c вытесняется давно не использованная a
+    cache = ExportCache(cache.path, max_bytes=2 * size + size // 2)
+    cache.load_contributions(paths[1])
+    cache.load_contributions(paths[2])
+    parses.clear()
+    cache.load_contributions(paths[1])
+    cache.load_contributions(paths[2])
+    assert parses == []
+    cache.load_contributions(paths[0])
+    assert parses == ["a.json"]
+
+
+def test_record_format_change_invalidates_entries(tmp_path, cache, parses, monkeypatch):
+    path = write_export(tmp_path / "a.json")
+    cache.load_contributions(path)
+    monkeypatch.setattr(export_cache, "RECORD_FORMAT", export_cache.RECORD_FORMAT + 1)
+    cache.load_contributions(path)
+    cache.load_contributions(path)
+    assert parses == ["a.json", "a.json"]
+
+
+def test_field_mappings_are_cached_separately(tmp_path, cache, parses):
+    path = write_export(tmp_path / "a.json")
+    default = ContributionMapping()
+    hall = ContributionMapping({"room": {"path": "hall"}})
+    same_as_hall = ContributionMapping({"room": {"path": "hall"}})
+
+    assert {c.room for c in cache.load_contributions(path, mapping=default)} == {"52-18"}
+    assert {c.room for c in cache.load_contributions(path, mapping=hall)} == {"Большой зал"}
+    assert parses == ["a.json", "a.json"]
+
+    # Соответствие с тем же описанием находит те же записи; по умолчанию — свои
+    assert {c.room for c in cache.load_contributions(path, mapping=same_as_hall)} == {"Большой зал"}
+    assert {c.room for c in cache.load_contributions(path)} == {"52-18"}
+    assert parses == ["a.json", "a.json"]
+
+
+def test_papers_and_contributions_do_not_share_entries(tmp_path, cache):
+    contributions = write_export(tmp_path / "a.json")
+    papers = tmp_path / "p.json"
+    papers.write_text(json.dumps({"papers": [{
+        "state": {"name": "accepted"},
+        "contribution": {"title": "Работа", "id": 1, "track": None},
+        "revisions": [{"submitter": {"full_name": "Автор"}}],
+    }]}), encoding="utf-8")
+    assert len(cache.load_contributions(contributions)) == 5
+    assert [p.title for p in cache.load_papers(str(papers))] == ["Работа"]
+    assert len(cache.load_contributions(contributions)) == 5
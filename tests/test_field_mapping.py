@@ -0,0 +1,194 @@
+"""Соответствие полей записи доклада и выгрузки: нормализация и проверка"""
+import json
+import os
+from datetime import datetime
+
+import pytest
+
+from export_cache import pack_contributions, unpack_contributions
+from field_mapping import ContributionMapping, CustomFieldIndex, FieldMappingError, contribution_mapping
+from models import iter_contributions
+from validation import ExportValidationError, validate_contributions
+
+
+def contribution(**fields):
+    item = {
+        "id": 1,
+        "title": "Доклад",
+        "start_dt": "2025-04-07T10:00:00",
+        "room_name": "52-18",
+        "session": {"friendly_id": "3", "code": "43.1", "title": "Секция 43"},
+        "track": {"code": "43", "title": "Кафедра 43"},
+        "persons": [{"full_name": "Иванов Иван"}],
+        "custom_fields": [{"id": 5, "name": "Тема", "value": "x"}, {"id": 7, "name": "Учебная группа", "value": "4317М"}],
+    }
+    item.update(fields)
+    return item
+
+
+def normalized(items, mapping):
+    return list(iter_contributions(validate_contributions(items, "test", mapping), mapping.normalize))
+
+
+def problems(items, mapping):
+    with pytest.raises(ExportValidationError) as info:
+        normalized(items, mapping)
+    return [(path, message) for _, path, message in info.value.problems]
+
+
+def test_group_from_numeric_custom_field_is_text():
+    mapping = ContributionMapping({"group": {"custom_field": 9}})
+    item = contribution(custom_fields=[{"id": 9, "name": "Группа (номер)", "value": 4317}])
+    [record] = normalized([item], mapping)
+    assert record.group == "4317"
+    assert record.status == "студент"
+
+
+def test_start_without_transform_is_parsed():
+    mapping = ContributionMapping({"start": {"path": "begins"}})
+    [record] = normalized([contribution(begins="2025-04-08T11:30:00")], mapping)
+    assert record.start == datetime(2025, 4, 8, 11, 30)
+    # Запись сохраняется в кеш выгрузок, который вызывает start.isoformat()
+    assert unpack_contributions(pack_contributions([record]))[0].start == record.start
+
+
+def test_start_with_text_transform_is_rejected():
+    with pytest.raises(FieldMappingError, match="Поле start: преобразование str не подходит"):
+        ContributionMapping({"start": {"path": "begins", "transform": "str"}})
+
+
+def test_session_without_transform_is_text():
+    mapping = ContributionMapping({"session": {"path": "session.number"}})
+    [record] = normalized([contribution(session={"number": 2, "code": "43.1"})], mapping)
+    assert record.session == "2"
+
+
+def test_null_custom_field_value_becomes_empty_group():
+    mapping = ContributionMapping({"group": {"custom_field": "Учебная группа"}})
+    item = contribution(custom_fields=[{"name": "Учебная группа", "value": None}])
+    [record] = normalized([item], mapping)
+    assert (record.group, record.status) == ("", "")
+
+
+def test_mapped_values_are_validated():
+    mapping = ContributionMapping({
+        "group": {"custom_field": "Учебная группа"},
+        "start": {"path": "begins"},
+        "room": {"path": "location.room"},
+    })
+    items = [
+        contribution(begins="завтра"),
+        contribution(custom_fields=[{"name": "Тема"}, {"name": "Учебная группа", "value": {"номер": 1}}]),
+        contribution(location=["52-18"]),
+        contribution(location={"room": None}),
+    ]
+    assert problems(items, mapping) == [
+        ("[0].begins", "дата и время не в формате ISO 8601 (ГГГГ-ММ-ДДTЧЧ:ММ): 'завтра'"),
+        ("[1].custom_fields[1].value", "ожидалось: строка или целое число или число, получено: объект"),
+        ("[2].location", "ожидалось: объект, получено: массив"),
+    ]
+
+
+def test_custom_mapping_ignores_unmapped_indico_fields():
+    # Поле title по умолчанию должно быть строкой, но по этому соответствию не читается
+    mapping = ContributionMapping({"title": {"path": "title.ru"}})
+    [record] = normalized([contribution(title={"ru": "Доклад", "en": "Talk"})], mapping)
+    assert record.title == "Доклад"
+
+
+def test_default_mapping_uses_indico_schema():
+    mapping = ContributionMapping()
+    assert problems([contribution(title=5)], mapping) == [("[0].title", "ожидалось: строка, получено: целое число")]
+
+
+def counting_index():
+    index = CustomFieldIndex()
+    rebuilds = []
+    rebuild = index._rebuild
+
+    def counted(fields):
+        rebuilds.append(len(fields))
+        return rebuild(fields)
+
+    index._rebuild = counted
+    return index, rebuilds
+
+
+def form(*fields):
+    return {"custom_fields": [{"id": i, "name": name, "value": value} for i, name, value in fields]}
+
+
+def test_same_form_layout_builds_table_once():
+    index, rebuilds = counting_index()
+    get = index.getter("Учебная группа", "")
+    items = [form((1, "Тема", "x"), (2, "Учебная группа", f"431{i}")) for i in range(5)]
+    assert [get(item) for item in items] == ["4310", "4311", "4312", "4313", "4314"]
+    assert len(rebuilds) == 1
+
+
+def test_table_follows_shifting_positions():
+    index, rebuilds = counting_index()
+    by_name = index.getter("Учебная группа", "")
+    by_id = index.getter(2, "")
+    items = [
+        form((1, "Тема", "x"), (2, "Учебная группа", "4311")),
+        form((2, "Учебная группа", "4312"), (1, "Тема", "x")),
+        form((3, "Другое", "y"), (1, "Тема", "x"), (2, "Учебная группа", "4313")),
+        form((1, "Тема", "x")),
+        form((1, "Тема", "x"), (2, "Учебная группа", "4315")),
+        {"custom_fields": []},
+        {},
+    ]
+    values = []
+    rebuilt = []
+    for item in items:
+        values.append(by_name(item))
+        rebuilt.append(len(rebuilds))
+    assert values == ["4311", "4312", "4313", "", "4315", "", ""]
+    # Таблица перестраивается при сдвиге позиций и после доклада без поля; без custom_fields — нет
+    assert rebuilt == [1, 2, 3, 4, 5, 5, 5]
+    assert [by_id(item) for item in items] == values
+
+
+def test_stale_position_pointing_at_other_entry():
+    index = CustomFieldIndex()
+    get = index.getter("Учебная группа", None)
+    assert get(form((1, "Тема", "x"), (2, "Учебная группа", "4311"))) == "4311"
+    # На прежней позиции теперь не объект и не то поле
+    assert get({"custom_fields": [{"name": "Тема"}, "мусор", {"name": "Учебная группа", "value": "4312"}]}) == "4312"
+    assert get({"custom_fields": [{"name": "Тема"}, {"name": "Учебная группа"}]}) is None
+
+
+def test_duplicate_names_take_first_field():
+    get = CustomFieldIndex().getter("Учебная группа", "")
+    assert get(form((1, "Учебная группа", "первая"), (2, "Учебная группа", "вторая"))) == "первая"
+
+
+def test_checker_reports_position_of_current_item():
+    mapping = ContributionMapping({"group": {"custom_field": "Учебная группа"}})
+    items = [
+        contribution(custom_fields=[{"name": "Учебная группа", "value": "4311"}]),
+        contribution(custom_fields=[{"name": "Тема"}, {"name": "Другое"}, {"name": "Учебная группа", "value": []}]),
+        contribution(custom_fields={"Учебная группа": "4313"}),
+    ]
+    assert problems(items, mapping) == [
+        ("[1].custom_fields[2].value", "ожидалось: строка или целое число или число, получено: массив"),
+        ("[2].custom_fields", "ожидалось: массив, получено: объект"),
+    ]
+
+
+def test_edited_mapping_file_is_reloaded(tmp_path):
+    path = tmp_path / "mapping.json"
+    path.write_text(json.dumps({"room": {"path": "room_name"}}), encoding="utf-8")
+    mapping = contribution_mapping(str(path))
+    assert contribution_mapping(str(path)) is mapping
+
+    path.write_text(json.dumps({"room": {"path": "location_data.room_name", "default": "-"}}), encoding="utf-8")
+    # Время изменения может совпасть с прежним при грубой точности часов файловой системы
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+    edited = contribution_mapping(str(path))
+    assert edited is not mapping and edited.fingerprint != mapping.fingerprint
+    [record] = normalized([contribution(location_data={"room_name": "52-19"})], edited)
+    assert record.room == "52-19"
+    assert contribution_mapping(str(path)) is edited
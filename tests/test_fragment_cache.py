@@ -0,0 +1,99 @@
+"""Кеш заседаний: ключи фрагментов и их устаревание"""
+import os
+from datetime import datetime
+
+from docx import Document
+
+from fragment_cache import FragmentCache, fragment_key
+from generate_file2 import generate_conference_report
+from models import Contribution
+
+CONFERENCE = {"number": "78-й", "head": "Иванов И.И., проф.", "deputy": "Петров П.П.", "secretary": "Сидоров С.С.",
+              "department": "", "section": ""}
+
+
+def talk(session="1", minute=0, title="Доклад", **fields):
+    values = dict(session=session, start=datetime(2025, 4, 7, 10, minute), room="52-18", speaker="Иванов Иван",
+                  group="4317М", title=title, status="магистр", id=f"{session}-{minute}", track="43",
+                  session_code="43.1")
+    values.update(fields)
+    return Contribution(**values)
+
+
+def test_key_is_stable_for_equal_talks():
+    assert fragment_key(("program", 1, "1"), [talk()]) == fragment_key(("program", 1, "1"), [talk()])
+
+
+def test_key_changes_with_any_talk_field():
+    base = fragment_key(("program", 1, "1"), [talk()])
+    changed = [
+        talk(title="Другой доклад"),
+        talk(minute=5),
+        talk(room="52-19"),
+        talk(speaker="Петров Пётр"),
+        talk(group="4318"),
+        talk(status="студент"),
+        talk(id="x"),
+        talk(track="44"),
+        talk(session_code="43.2"),
+    ]
+    keys = {fragment_key(("program", 1, "1"), [item]) for item in changed}
+    assert base not in keys
+    assert len(keys) == len(changed)
+
+
+def test_key_changes_with_layout_parameters_and_talk_order():
+    talks = [talk(minute=0), talk(minute=20, title="Второй")]
+    base = fragment_key(("report", 1, "1", "Иванов", "Сидоров"), talks)
+    assert fragment_key(("report", 2, "1", "Иванов", "Сидоров"), talks) != base
+    assert fragment_key(("report", 1, "1", "Иванов", "Смирнов"), talks) != base
+    assert fragment_key(("report", 1, "1", "Иванов", "Сидоров"), talks[::-1]) != base
+    assert fragment_key(("report", 1, "1", "Иванов", "Сидоров"), talks[:1]) != base
+
+
+def test_render_only_on_miss_and_persists_between_runs(tmp_path):
+    calls = []
+
+    def render():
+        calls.append(1)
+        return "<w:p/>"
+
+    cache = FragmentCache(str(tmp_path))
+    assert cache.render("k", render) == "<w:p/>"
+    assert cache.render("k", render) == "<w:p/>"
+    assert FragmentCache(str(tmp_path)).render("k", render) == "<w:p/>"
+    assert len(calls) == 1
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_prune_removes_least_recently_used(tmp_path):
+    cache = FragmentCache(str(tmp_path), max_entries=2)
+    for i, key in enumerate(["old", "used", "new"]):
+        cache.put(key, key)
+        os.utime(cache._path(key), (1000 + i, 1000 + i))
+    cache.get("old")  # Чтение отмечает фрагмент как недавно использованный
+
+    assert cache.prune() == 1
+    assert cache.get("used") is None
+    assert cache.get("old") == "old" and cache.get("new") == "new"
+
+
+def test_changed_talk_rerenders_only_its_session(tmp_path):
+    talks = [talk("1", 0), talk("1", 20, title="Второй"), talk("2", 40), talk("3", 50)]
+    output = str(tmp_path / "report.docx")
+
+    cache = FragmentCache(str(tmp_path / "cache"))
+    generate_conference_report(CONFERENCE, talks, output, fragment_cache=cache)
+    assert (cache.hits, cache.misses) == (0, 3)
+
+    talks[1] = talk("1", 20, title="Исправленное название")
+    cache = FragmentCache(str(tmp_path / "cache"))
+    generate_conference_report(CONFERENCE, talks, output, fragment_cache=cache)
+    assert (cache.hits, cache.misses) == (2, 1)
+    cells = [cell.text for table in Document(output).tables for row in table.rows for cell in row.cells]
+    assert any("Исправленное название" in text for text in cells)
+
+    # Секретарь входит в оформление каждого заседания отчёта
+    cache = FragmentCache(str(tmp_path / "cache"))
+    generate_conference_report(dict(CONFERENCE, secretary="Смирнов С.С."), talks, output, fragment_cache=cache)
+    assert (cache.hits, cache.misses) == (0, 3)
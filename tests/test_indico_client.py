@@ -0,0 +1,197 @@
+"""Клиент Indico: пул соединений и загрузка с имитатора API"""
+import http.client
+import json
+
+import pytest
+
+from indico_client import TOKEN_ENV, ConnectionPool, IndicoClient, IndicoError
+from indico_mock import MockIndicoServer
+
+
+class FakeResponse:
+    status = 200
+    headers = {}
+    will_close = False
+
+    def read(self):
+        return b"{}"
+
+
+class FakeConnection:
+    def __init__(self, fail):
+        self.fail = fail
+        self.closed = False
+
+    def request(self, method, url, headers):
+        if self.fail:
+            raise ConnectionResetError("connection reset")
+
+    def getresponse(self):
+        return FakeResponse()
+
+    def close(self):
+        self.closed = True
+
+
+def pool_with(connections):
+    pool = ConnectionPool("http://indico.example")
+    created = iter(connections)
+    pool._connect = lambda: next(created)
+    return pool
+
+
+def test_stale_idle_connection_is_retried_on_new_one():
+    stale, fresh = FakeConnection(fail=True), FakeConnection(fail=False)
+    pool = pool_with([fresh])
+    pool._idle.put(stale)
+
+    status, _, body = pool.request("/export", {})
+
+    assert (status, body) == (200, b"{}")
+    assert stale.closed and not fresh.closed
+    assert pool._idle.get_nowait() is fresh
+
+
+def test_failed_retry_closes_new_connection():
+    stale, fresh = FakeConnection(fail=True), FakeConnection(fail=True)
+    pool = pool_with([fresh])
+    pool._idle.put(stale)
+
+    with pytest.raises(ConnectionResetError):
+        pool.request("/export", {})
+
+    assert stale.closed and fresh.closed
+    assert pool._idle.empty()
+
+
+def test_failed_new_connection_is_not_retried():
+    connection = FakeConnection(fail=True)
+    pool = pool_with([connection])
+
+    with pytest.raises(ConnectionResetError):
+        pool.request("/export", {})
+
+    assert connection.closed
+    assert pool._idle.empty()
+
+
+def test_http_error_on_stale_connection_is_retried():
+    class BrokenResponse(FakeConnection):
+        def getresponse(self):
+            raise http.client.RemoteDisconnected("closed")
+
+    stale, fresh = BrokenResponse(fail=False), FakeConnection(fail=False)
+    pool = pool_with([fresh])
+    pool._idle.put(stale)
+
+    assert pool.request("/export", {})[0] == 200
+    assert stale.closed
+
+
+def contributions(count, start=0):
+    return [{"id": i, "title": f"Доклад {i}"} for i in range(start, start + count)]
+
+
+@pytest.fixture
+def mock():
+    with MockIndicoServer(contributions(450), [{"id": 1, "state": {"name": "accepted"}}], event_id=77) as server:
+        yield server
+
+
+def client_for(mock, **kwargs):
+    kwargs.setdefault("page_size", 100)
+    kwargs.setdefault("workers", 2)
+    return IndicoClient(mock.url, **kwargs)
+
+
+def ids(items):
+    return [item["id"] for item in items]
+
+
+def test_pages_are_fetched_by_offset_and_limit(mock):
+    with client_for(mock) as client:
+        items, changed = client.fetch_contributions(77)
+    assert ids(items) == list(range(450))
+    assert changed
+    # Пачки по два запроса: 0 и 100, 200 и 300, 400 (неполная) и 500
+    assert mock.requests == 6
+
+
+def test_page_size_multiple_stops_on_empty_page(mock):
+    mock.set_data(contributions(400))
+    with client_for(mock) as client:
+        items, _ = client.fetch_contributions(77)
+    assert ids(items) == list(range(400))
+    assert mock.requests == 6
+
+
+def test_items_repeated_across_pages_are_dropped(mock):
+    # Доклад, добавленный во время постраничной загрузки, сдвигает следующие страницы
+    mock.set_data(contributions(100) + contributions(150, start=99))
+    with client_for(mock) as client:
+        items, _ = client.fetch_contributions(77)
+    assert ids(items) == list(range(249))
+
+
+def test_unchanged_data_is_not_downloaded_again(mock, tmp_path):
+    output = tmp_path / "contributions.json"
+    cache_dir = str(tmp_path / "cache")
+    with client_for(mock, cache_dir=cache_dir) as client:
+        assert client.download_contributions(77, str(output))
+    assert mock.not_modified == 0
+    first = output.read_bytes()
+    output.touch()
+    mtime = output.stat().st_mtime_ns
+
+    # Кеш ответов сохраняется на диск, поэтому новый клиент тоже отправляет условные запросы
+    with client_for(mock, cache_dir=cache_dir) as client:
+        assert not client.download_contributions(77, str(output))
+    assert mock.not_modified == 6
+    assert output.read_bytes() == first and output.stat().st_mtime_ns == mtime
+
+    mock.set_data(contributions(450)[:-1] + [{"id": 449, "title": "Изменённый доклад"}])
+    with client_for(mock, cache_dir=cache_dir) as client:
+        assert client.download_contributions(77, str(output))
+    assert json.loads(output.read_text(encoding="utf-8"))[-1]["title"] == "Изменённый доклад"
+
+
+def test_without_cache_every_request_is_full(mock, tmp_path):
+    output = tmp_path / "contributions.json"
+    for _ in range(2):
+        with client_for(mock) as client:
+            assert client.download_contributions(77, str(output))
+    assert mock.not_modified == 0
+
+
+def test_token_is_sent_in_authorization_header(mock, monkeypatch):
+    mock.token = "secret"
+    with client_for(mock, token="secret") as client:
+        assert len(client.fetch_contributions(77)[0]) == 450
+    with client_for(mock, token="wrong") as client:
+        with pytest.raises(IndicoError, match="код 401"):
+            client.fetch_contributions(77)
+
+    monkeypatch.setenv(TOKEN_ENV, "secret")
+    with client_for(mock) as client:
+        assert len(client.fetch_contributions(77)[0]) == 450
+
+
+def test_connections_are_reused(mock):
+    with client_for(mock, page_size=10) as client:
+        items, _ = client.fetch_contributions(77)
+        assert len(items) == 450
+        assert mock.requests == 46
+        # Не больше одного соединения на поток загрузки
+        assert mock.connections == client.pool.opened <= 2
+
+
+def test_papers_path_is_configurable(tmp_path):
+    papers = [{"id": i, "state": {"name": "accepted"}} for i in range(3)]
+    with MockIndicoServer(papers=papers, event_id=77, papers_path="/api/events/{event_id}/papers") as mock:
+        with client_for(mock) as client:
+            with pytest.raises(IndicoError, match="код 404"):
+                client.fetch_papers(77)
+        with client_for(mock, papers_path="/api/events/{event_id}/papers") as client:
+            output = tmp_path / "papers.json"
+            assert client.download_papers(77, str(output))
+    assert json.loads(output.read_text(encoding="utf-8")) == {"papers": papers}
@@ -0,0 +1,71 @@
+"""Бюджет пиковой памяти генераторов на синтетических выгрузках (см. benchmarks/memory_budget.py).
+
+Замеры выполняются с разборщиком JSON по умолчанию: measure_in_subprocess убирает
+INDOX_JSON_BACKEND из окружения замера, поэтому результат не зависит от окружения тестов.
+"""
+import pytest
+
+from benchmarks import synthetic
+from benchmarks.memory_budget import check_case, load_budgets, measure_in_subprocess
+import data_loader
+from data_loader import BACKEND_ENV
+
+SIZES = [1000, 10000, pytest.param(100000, marks=pytest.mark.slow)]
+
+CASES = [
+    ("program", False),
+    ("program", True),
+    ("report", False),
+    ("report", True),
+    ("papers_list", False),
+]
+
+
+@pytest.fixture(scope="session")
+def export_path(tmp_path_factory):
+    """Путь к синтетической выгрузке; каждая создаётся один раз на весь запуск тестов"""
+    directory = tmp_path_factory.mktemp("exports")
+
+    def get(generator, size):
+        kind = "papers" if generator == "papers_list" else "contributions"
+        path = directory / f"{kind}_{size}.json"
+        if not path.exists():
+            write = synthetic.write_papers if kind == "papers" else synthetic.write_contributions
+            write(str(path), size)
+        return str(path)
+
+    return get
+
+
+@pytest.mark.parametrize("size", SIZES)
+@pytest.mark.parametrize("generator, streaming", CASES)
+def test_peak_memory_within_budget(export_path, generator, streaming, size, monkeypatch):
+    # Разбор orjson целиком не должен включаться и через окружение тестов
+    monkeypatch.setenv(BACKEND_ENV, "orjson")
+    case = measure_in_subprocess(generator, size, export_path(generator, size), streaming, trace_memory=False)
+    assert case["streaming"] == (streaming and generator != "papers_list")
+    assert not case["whole_file_json"]
+    exceeded = check_case(case, load_budgets())
+    assert not exceeded, "; ".join(exceeded)
+
+
+def test_json_backend_is_chosen_explicitly(export_path):
+    case = measure_in_subprocess("papers_list", 1000, export_path("papers_list", 1000), False, trace_memory=False,
+                                 json_backend="orjson")
+    assert case["whole_file_json"] == (data_loader.orjson is not None)
+
+
+def test_check_case_reports_exceeded_budget():
+    budgets = {"report": {"rss": {"fixed_mb": 10, "per_item_kb": 1}}}
+    case = {"generator": "report", "size": 1024, "streaming": False, "whole_file_json": False, "rss": 12.5,
+            "traced": None}
+    assert check_case(case, budgets) == [
+        "RSS 12.5 МБ > 11.0 МБ (12.50 КБ на элемент, бюджет 10 МБ + 1 КБ на элемент)"
+    ]
+    assert check_case(dict(case, rss=10.5), budgets) == []
+
+
+def test_rss_budget_skipped_under_tracemalloc():
+    budgets = {"report": {"rss": {"fixed_mb": 1, "per_item_kb": 0}, "traced": {"fixed_mb": 100, "per_item_kb": 0}}}
+    case = {"generator": "report", "size": 1000, "streaming": False, "rss": 50.0, "traced": 20.0}
+    assert check_case(case, budgets) == []
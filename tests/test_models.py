@@ -0,0 +1,57 @@
+"""Индекс заседаний: порядок заседаний и докладов в программе и отчёте"""
+from datetime import datetime, timedelta, timezone
+
+from models import Contribution, build_session_index
+
+MSK = timezone(timedelta(hours=3))
+
+
+def talk(i, session, start=None):
+    return Contribution(session, start, "52-18", f"Докладчик {i}", "4317М", f"Доклад {i}", "магистр", id=i)
+
+
+def at(hour, minute=0, day=7, tz=MSK):
+    return datetime(2025, 4, day, hour, minute, tzinfo=tz)
+
+
+def order(index):
+    return [(session, [t.id for t in talks]) for session, talks in index]
+
+
+def test_out_of_order_input():
+    talks = [talk(1, "2", at(12)), talk(2, "1", at(11)), talk(3, "2", at(10)), talk(4, "3", at(9, day=8)),
+             talk(5, "1", at(9))]
+    # Заседания — по началу первого доклада, доклады — по времени
+    assert order(build_session_index(talks)) == [("1", [5, 2]), ("2", [3, 1]), ("3", [4])]
+
+
+def test_start_is_compared_as_moment_in_time():
+    talks = [talk(1, "1", at(10)), talk(2, "2", at(8, 30, tz=timezone.utc))]
+    # 08:30 UTC — это 11:30 по Москве
+    assert order(build_session_index(talks)) == [("1", [1]), ("2", [2])]
+
+
+def test_equal_start_times_keep_export_order():
+    talks = [talk(1, "1", at(10)), talk(2, "1", at(9)), talk(3, "1", at(10)), talk(4, "1", at(10))]
+    assert order(build_session_index(talks)) == [("1", [2, 1, 3, 4])]
+
+
+def test_sessions_starting_together_are_ordered_by_number():
+    talks = [talk(1, "10", at(10)), talk(2, "Б", at(10)), talk(3, "2", at(10)), talk(4, "А", at(10))]
+    # Числовые номера — по значению и раньше текстовых
+    assert order(build_session_index(talks)) == [("2", [3]), ("10", [1]), ("А", [4]), ("Б", [2])]
+
+
+def test_talks_and_sessions_without_time_go_last():
+    talks = [talk(1, "3"), talk(2, "1", at(11)), talk(3, "1"), talk(4, "2", at(9, day=9)), talk(5, "1", at(10)),
+             talk(6, "4")]
+    assert order(build_session_index(talks)) == [("1", [5, 2, 3]), ("2", [4]), ("3", [1]), ("4", [6])]
+
+
+def test_raw_export_items_are_normalized():
+    items = [
+        {"title": "Доклад", "start_dt": "2025-04-07T12:00:00+03:00", "session": {"friendly_id": 2}},
+        {"title": "Доклад", "start_dt": "2025-04-07T10:00:00+03:00", "session": {"friendly_id": 1}},
+    ]
+    assert [session for session, _ in build_session_index(items)] == ["1", "2"]
+    assert build_session_index([]) == []
@@ -0,0 +1,98 @@
+"""Создание нескольких документов: загрузка выгрузок, пул процессов и отмена"""
+import json
+import multiprocessing
+import time
+
+import pytest
+
+from pipeline import CHECK_EVERY, generate_all, load_inputs, run_jobs
+
+OPTIONS = {"number": "78-й", "head": "Иванов И.И.", "deputy": "Петров П.П.", "secretary": "Сидоров С.С.",
+           "leader_name": "Смирнов А.В.", "leader_email": "unids@example.org", "leader_phone": "+7 812 000-00-00"}
+
+
+class Cancelled(Exception):
+    pass
+
+
+def contribution(i):
+    return {
+        "id": i,
+        "title": f"Доклад {i}",
+        "start_dt": f"2025-04-07T{10 + i % 8}:00:00",
+        "room_name": "52-18",
+        "session": {"friendly_id": str(i % 3), "code": "43.1", "title": "Секция 43"},
+        "persons": [{"full_name": f"Иванов Иван {i}"}],
+        "custom_fields": [{"name": "Учебная группа", "value": "4317М"}],
+    }
+
+
+def paper(i):
+    return {
+        "state": {"name": "accepted"},
+        "contribution": {"id": i, "title": f"Работа {i}"},
+        "revisions": [{"submitter": {"full_name": f"Петров Пётр {i}"}}],
+    }
+
+
+@pytest.fixture
+def options(tmp_path):
+    contributions = tmp_path / "contributions.json"
+    contributions.write_text(json.dumps([contribution(i) for i in range(CHECK_EVERY * 2 + 1)]), encoding="utf-8")
+    papers = tmp_path / "papers.json"
+    papers.write_text(json.dumps({"papers": [paper(i) for i in range(10)]}), encoding="utf-8")
+    return dict(OPTIONS, contributions=str(contributions), papers=str(papers),
+                program=str(tmp_path / "program.docx"), report=str(tmp_path / "report.docx"),
+                papers_list=str(tmp_path / "papers.docx"))
+
+
+def cancel_on_call(number, calls):
+    def check():
+        calls.append(number)
+        if len(calls) == number:
+            raise Cancelled()
+    return check
+
+
+def wait_for_workers(timeout=30):
+    """Дожидается завершения процессов пула, дописывающих начатые документы"""
+    deadline = time.monotonic() + timeout
+    while multiprocessing.active_children() and time.monotonic() < deadline:
+        time.sleep(0.05)
+
+
+def test_load_checks_cancel_between_stages_and_while_parsing(options):
+    calls = []
+    contributions, papers = load_inputs(options, ["program", "papers_list"], check=lambda: calls.append(1))
+    assert len(contributions) == CHECK_EVERY * 2 + 1 and len(papers) == 10
+    # До загрузки, три раза при разборе докладов, после докладов, при разборе работ и после них
+    assert len(calls) == 7
+
+    calls = []
+    with pytest.raises(Cancelled):
+        load_inputs(options, ["program", "papers_list"], check=cancel_on_call(5, calls))
+
+
+def test_cancel_during_load_creates_no_documents(options, tmp_path):
+    with pytest.raises(Cancelled):
+        generate_all(options, workers=1, check=cancel_on_call(3, []))
+    wait_for_workers()
+    assert not list(tmp_path.glob("*.docx"))
+
+
+def test_cancel_while_waiting_drops_jobs_not_started(options, tmp_path):
+    contributions, _ = load_inputs(options, ["program"])
+    jobs = [("program", options, contributions, str(tmp_path / f"program_{i}.docx")) for i in range(6)]
+
+    with pytest.raises(Cancelled):
+        run_jobs(jobs, workers=1, check=cancel_on_call(1, []))
+    wait_for_workers()
+    # Пул успевает передать процессу не больше двух заданий
+    assert len(list(tmp_path.glob("program_*.docx"))) <= 2
+
+
+def test_generate_all_without_cancel(options):
+    results = generate_all(options, workers=2, check=lambda: None)
+    assert [(result["document"], result["status"]) for result in results] == [
+        ("program", "created"), ("report", "created"), ("papers_list", "created")
+    ]
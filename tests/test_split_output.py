@@ -0,0 +1,103 @@
+"""Деление программы и отчёта на части: состав частей, архив и оглавление"""
+import io
+import zipfile
+from datetime import datetime
+
+import pytest
+from docx import Document
+
+import generate_file1
+import generate_file2
+from models import Contribution, build_session_index
+from split_output import split_into_parts
+
+CONFERENCE = {"number": "78-й", "head": "Иванов И.И.", "deputy": "Петров П.П.", "secretary": "Сидоров С.С."}
+
+
+def talk(i, session, day=None, hour=10):
+    start = datetime(2025, 4, day, hour) if day else None
+    return Contribution(str(session), start, "52-18", f"Докладчик {i}", "4317М", f"Доклад {i}", "магистр", id=i)
+
+
+# Заседания 1 и 3 — 7 апреля, 2 — 8 апреля, у заседания 4 нет времени
+TALKS = [talk(1, 2, 8, 10), talk(2, 1, 7, 12), talk(3, 1, 7, 11), talk(4, 3, 7, 14), talk(5, 4), talk(6, 2, 8, 9)]
+
+
+def parts_of(talks, split_output):
+    return [(label, slug, [(session, [t.id for t in session_talks]) for session, session_talks in sessions])
+            for label, slug, sessions in split_into_parts(build_session_index(talks), split_output)]
+
+
+def test_parts_by_day():
+    assert parts_of(TALKS, "day") == [
+        ("7 апреля 2025 г.", "2025-04-07", [("1", [3, 2]), ("3", [4])]),
+        ("8 апреля 2025 г.", "2025-04-08", [("2", [6, 1])]),
+        ("Без даты", "без_даты", [("4", [5])]),
+    ]
+
+
+def test_parts_by_session():
+    assert parts_of(TALKS, "session") == [
+        ("Заседание 1", "заседание_1", [("1", [3, 2])]),
+        ("Заседание 3", "заседание_3", [("3", [4])]),
+        ("Заседание 2", "заседание_2", [("2", [6, 1])]),
+        ("Заседание 4", "заседание_4", [("4", [5])]),
+    ]
+
+
+def read_archive(data):
+    """Содержимое архива: имя части -> непустые абзацы и ячейки таблиц"""
+    result = {}
+    with zipfile.ZipFile(io.BytesIO(data)) as archive:
+        for name in archive.namelist():
+            document = Document(io.BytesIO(archive.read(name)))
+            texts = [p.text for p in document.paragraphs]
+            texts += [cell.text for table in document.tables for row in table.rows for cell in row.cells]
+            result[name] = [text for text in texts if text.strip()]
+    return result
+
+
+def speakers(texts):
+    return [text.split(",")[0].split(".")[0] for text in texts if text.startswith("Докладчик")]
+
+
+@pytest.mark.parametrize("generate, prefix", [
+    (generate_file1.generate_conference_program, "Программа"),
+    (generate_file2.generate_conference_report, "Отчет"),
+])
+def test_archive_by_day(generate, prefix):
+    output = io.BytesIO()
+    generate(CONFERENCE, TALKS, output, split_output="day")
+    archive = read_archive(output.getvalue())
+
+    assert list(archive) == [f"1_{prefix}_2025-04-07.docx", f"2_{prefix}_2025-04-08.docx",
+                             f"3_{prefix}_без_даты.docx", f"0_{prefix}_содержание.docx"]
+    parts = list(archive.values())
+    # Каждая часть — отдельный документ с шапкой и своими заседаниями в порядке времени
+    assert [speakers(texts) for texts in parts[:3]] == [
+        ["Докладчик 3", "Докладчик 2", "Докладчик 4"],
+        ["Докладчик 6", "Докладчик 1"],
+        ["Докладчик 5"],
+    ]
+    assert all(any("78-й" in text for text in texts) for texts in parts)
+    index = parts[3]
+    assert index[-3:] == [
+        f"7 апреля 2025 г. — 1_{prefix}_2025-04-07.docx (заседаний: 2, докладов: 3)",
+        f"8 апреля 2025 г. — 2_{prefix}_2025-04-08.docx (заседаний: 1, докладов: 2)",
+        f"Без даты — 3_{prefix}_без_даты.docx (заседаний: 1, докладов: 1)",
+    ]
+
+
+def test_archive_by_session_numbers_parts_in_order():
+    talks = [talk(i, i, 7 + i % 2, 9 + i // 2) for i in range(1, 13)]
+    output = io.BytesIO()
+    generate_file1.generate_conference_program(CONFERENCE, talks, output, split_output="session")
+    archive = read_archive(output.getvalue())
+
+    names = list(archive)
+    assert len(names) == 13 and names[-1] == "00_Программа_содержание.docx"
+    # Номер с ведущим нулём сохраняет порядок частей при сортировке по имени
+    assert names[:-1] == sorted(names[:-1])
+    assert names[0] == "01_Программа_заседание_2.docx"
+    assert all(len(speakers(texts)) == 1 for texts in list(archive.values())[:-1])
+    assert sum(len(speakers(texts)) for texts in archive.values()) == len(talks)
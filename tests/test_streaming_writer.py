@@ -0,0 +1,85 @@
+"""Потоковая запись .docx: документ появляется только целиком"""
+import io
+import zipfile
+
+import pytest
+from docx import Document
+
+from ooxml import DOCUMENT_PART, StreamingDocxWriter, new_document, package_template, paragraph_xml, run_xml
+from split_output import write_parts_archive
+
+
+def write_document(output, fail_after=None):
+    with StreamingDocxWriter(new_document(), output) as writer:
+        for i in range(3):
+            if i == fail_after:
+                raise RuntimeError("ошибка формирования")
+            writer.write(paragraph_xml(run_xml(f"Заседание {i}")))
+
+
+def test_complete_document(tmp_path):
+    path = tmp_path / "program.docx"
+    write_document(str(path))
+    texts = [p.text for p in Document(str(path)).paragraphs]
+    assert texts[-3:] == ["Заседание 0", "Заседание 1", "Заседание 2"]
+    assert not (tmp_path / "program.docx.tmp").exists()
+
+
+def test_template_gives_same_package(tmp_path):
+    doc = new_document()
+    template = package_template(doc, 6)
+    packages = []
+    for output in (io.BytesIO(), str(tmp_path / "program.docx")):
+        with StreamingDocxWriter(doc, output, 6, template) as writer:
+            writer.write(paragraph_xml(run_xml("Заседание 1")))
+        with zipfile.ZipFile(output) as package:
+            assert package.testzip() is None
+            packages.append({name: package.read(name) for name in package.namelist()})
+    expected = io.BytesIO()
+    with StreamingDocxWriter(doc, expected, 6) as writer:
+        writer.write(paragraph_xml(run_xml("Заседание 1")))
+    with zipfile.ZipFile(expected) as package:
+        expected = {name: package.read(name) for name in package.namelist()}
+    assert packages == [expected, expected]
+    assert list(expected)[-1] == DOCUMENT_PART
+    assert [p.text for p in Document(str(tmp_path / "program.docx")).paragraphs][-1] == "Заседание 1"
+
+
+def test_failure_keeps_previous_document(tmp_path):
+    path = tmp_path / "program.docx"
+    path.write_bytes(b"previous")
+    with pytest.raises(RuntimeError):
+        write_document(str(path), fail_after=1)
+    assert path.read_bytes() == b"previous"
+    assert list(tmp_path.iterdir()) == [path]
+
+
+def test_failure_creates_no_document(tmp_path):
+    path = tmp_path / "program.docx"
+    with pytest.raises(RuntimeError):
+        write_document(str(path), fail_after=0)
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_failure_leaves_document_part_unfinished_in_file_object():
+    buffer = io.BytesIO()
+    with pytest.raises(RuntimeError):
+        write_document(buffer, fail_after=1)
+    with zipfile.ZipFile(buffer) as package:
+        # Конец тела не дописан, поэтому такой документ не выдаётся за готовый
+        assert not package.read(DOCUMENT_PART).rstrip().endswith(b"</w:document>")
+
+
+def test_parts_archive_failure_keeps_previous_archive(tmp_path):
+    path = tmp_path / "program.zip"
+    path.write_bytes(b"previous")
+
+    def fragments():
+        yield paragraph_xml(run_xml("Заседание 1"))
+        raise RuntimeError("ошибка формирования")
+
+    parts = [("День 1", "day1", [(1, [])]), ("День 2", "day2", [(2, [])])]
+    with pytest.raises(RuntimeError):
+        write_parts_archive(str(path), new_document(), parts, fragments(), "Программа", "Части:")
+    assert path.read_bytes() == b"previous"
+    assert list(tmp_path.iterdir()) == [path]
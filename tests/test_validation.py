@@ -0,0 +1,165 @@
+"""Проверка выгрузок: правила схемы, пути полей в ошибках и поведение потока"""
+import pytest
+
+from models import GROUP_FIELD_NAME, Contribution
+from validation import (CONTRIBUTION_SCHEMA, PAPER_SCHEMA, SHOWN_PROBLEMS, ExportValidationError, compile_rule, rule,
+                        validate_contributions, validate_papers)
+
+validate_contribution = compile_rule(CONTRIBUTION_SCHEMA)
+validate_paper = compile_rule(PAPER_SCHEMA)
+
+
+def contribution(**fields):
+    item = {
+        "id": 1,
+        "title": "Доклад",
+        "start_dt": "2025-04-07T10:00:00+03:00",
+        "room_name": "52-18",
+        "session": {"friendly_id": 3, "code": "43.1", "title": "Секция 43"},
+        "track": {"code": "43"},
+        "persons": [{"full_name": "Иванов Иван"}, {"full_name": None}],
+        "custom_fields": [{"name": "Тема", "value": 5}, {"name": GROUP_FIELD_NAME, "value": "4317М"}],
+    }
+    item.update(fields)
+    return item
+
+
+def paper(state="accepted", **fields):
+    item = {
+        "state": {"name": state},
+        "contribution": {"title": "Работа", "id": 7, "track": "43"},
+        "revisions": [{"submitter": {"full_name": "Иванов Иван"}}],
+    }
+    item.update(fields)
+    return item
+
+
+def test_rule_checks_type():
+    validate = compile_rule(rule(int, str))
+    assert validate(1) is None and validate("1") is None
+    assert validate(1.5) == [("", "ожидалось: целое число или строка, получено: число")]
+    assert validate(None) == [("", "ожидалось: целое число или строка, получено: null")]
+    assert compile_rule(rule(int, nullable=True))(None) is None
+
+
+def test_bool_is_not_a_number():
+    assert compile_rule(rule(int))(True) == [("", "ожидалось: целое число, получено: логическое значение")]
+    assert compile_rule(rule(int, bool))(True) is None
+
+
+def test_rule_builds_paths_of_nested_fields():
+    validate = compile_rule(rule(dict, fields={
+        "name": rule(str, required=True),
+        "tags": rule(list, each=rule(str)),
+        "persons": rule(list, min_items=1, first=rule(dict, fields={"age": rule(int)})),
+        "code": rule(str, check=lambda value: None if value.isdigit() else f"не число: {value!r}"),
+    }))
+    assert validate({"name": "x", "tags": ["a"], "persons": [{"age": 1}, {"age": "не проверяется"}], "code": "1"}) is None
+    assert validate({"tags": ["a", 2, "c", None], "persons": [{"age": "1"}], "code": "1a"}) == [
+        (".name", "обязательное поле отсутствует"),
+        (".tags[1]", "ожидалось: строка, получено: целое число"),
+        (".tags[3]", "ожидалось: строка, получено: null"),
+        (".persons[0].age", "ожидалось: целое число, получено: строка"),
+        (".code", "не число: '1a'"),
+    ]
+    assert validate({"name": "x", "persons": []}) == [(".persons", "массив пуст")]
+
+
+def test_conditional_fields_are_checked_only_when_condition_holds():
+    validate = compile_rule(rule(dict, when=(lambda value: value.get("kind") == "a", {"a": rule(int, required=True)})))
+    assert validate({"kind": "b"}) is None
+    assert validate({"kind": "a"}) == [(".a", "обязательное поле отсутствует")]
+
+
+def test_valid_contribution():
+    assert validate_contribution(contribution()) is None
+    # Необязательные поля могут отсутствовать, а часть — быть null
+    assert validate_contribution({"id": None, "start_dt": None, "track": None}) is None
+
+
+def test_invalid_contribution_fields():
+    item = contribution(
+        id=1.5,
+        start_dt="07.04.2025 10:00",
+        session={"friendly_id": None, "title": 3},
+        persons=[{"full_name": ["Иванов"]}],
+        custom_fields=[{"name": "Тема", "value": [1]}, {"name": GROUP_FIELD_NAME, "value": 4317}],
+    )
+    assert validate_contribution(item) == [
+        (".id", "ожидалось: целое число или строка, получено: число"),
+        (".start_dt", "дата и время не в формате ISO 8601 (ГГГГ-ММ-ДДTЧЧ:ММ): '07.04.2025 10:00'"),
+        (".session.friendly_id", "ожидалось: строка или целое число, получено: null"),
+        (".session.title", "ожидалось: строка, получено: целое число"),
+        (".persons[0].full_name", "ожидалось: строка, получено: массив"),
+        (".custom_fields[1].value", "ожидалось: строка, получено: целое число"),
+    ]
+    assert validate_contribution(contribution(start_dt="2025-02-30T10:00")) == [
+        (".start_dt", "дата и время не в формате ISO 8601 (ГГГГ-ММ-ДДTЧЧ:ММ): '2025-02-30T10:00'")
+    ]
+    assert validate_contribution([]) == [("", "ожидалось: объект, получено: массив")]
+
+
+def test_valid_papers():
+    assert validate_paper(paper()) is None
+    # У непринятых работ остальные поля не читаются
+    assert validate_paper({"state": {"name": "rejected"}, "revisions": []}) is None
+
+
+def test_invalid_papers():
+    assert validate_paper({}) == [(".state", "обязательное поле отсутствует")]
+    assert validate_paper(paper(revisions=[])) == [(".revisions", "массив пуст")]
+    assert validate_paper(paper(contribution={"id": "7"}, revisions=[{"submitter": {"full_name": None}}])) == [
+        (".contribution.title", "обязательное поле отсутствует"),
+        (".revisions[0].submitter.full_name", "ожидалось: строка, получено: null"),
+    ]
+
+
+def test_error_reports_item_index_and_path():
+    items = [contribution(), contribution(title=None), contribution(), contribution(room_name=5, track=[])]
+    with pytest.raises(ExportValidationError) as info:
+        list(validate_contributions(items, "contributions.json"))
+    error = info.value
+    assert error.source == "contributions.json"
+    assert error.problems == [
+        (1, "[1].title", "ожидалось: строка, получено: null"),
+        (3, "[3].room_name", "ожидалось: строка, получено: целое число"),
+        (3, "[3].track", "ожидалось: объект или строка, получено: массив"),
+    ]
+    assert str(error).splitlines() == [
+        "Ошибки в выгрузке contributions.json (3):",
+        "[1].title: ожидалось: строка, получено: null",
+        "[3].room_name: ожидалось: строка, получено: целое число",
+        "[3].track: ожидалось: объект или строка, получено: массив",
+    ]
+
+
+def test_error_message_is_shortened():
+    with pytest.raises(ExportValidationError) as info:
+        list(validate_papers([{}] * (SHOWN_PROBLEMS + 5)))
+    assert len(info.value.problems) == SHOWN_PROBLEMS + 5
+    lines = str(info.value).splitlines()
+    assert len(lines) == SHOWN_PROBLEMS + 2
+    assert lines[-1] == "… и ещё 5"
+
+
+def test_error_is_raised_after_stream_is_exhausted():
+    read = []
+
+    def items():
+        for i, item in enumerate([contribution(id=0), contribution(id=1, title=5), contribution(id=2)]):
+            read.append(i)
+            yield item
+
+    stream = validate_contributions(items())
+    # Корректные элементы выдаются по ходу чтения, некорректные пропускаются
+    assert next(stream)["id"] == 0
+    assert next(stream)["id"] == 2
+    assert read == [0, 1, 2]
+    with pytest.raises(ExportValidationError) as info:
+        next(stream)
+    assert [index for index, _, _ in info.value.problems] == [1]
+
+
+def test_normalized_records_are_passed_through():
+    record = Contribution("1", None, "52-18", "Иванов Иван", "4317М", "Доклад", "магистр")
+    assert list(validate_contributions([record, contribution()])) == [record, contribution()]
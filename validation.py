@@ -0,0 +1,232 @@
+import re
+
+from models import GROUP_FIELD_NAME, AcceptedPaper, Contribution, parse_start_dt
+
+# Сколько ошибок показывать в тексте исключения; полный список — в ExportValidationError.problems
+SHOWN_PROBLEMS = 20
+
+# Время начала доклада: дата и время через «T» (или пробел), как в выгрузке Indico
+ISO_DATETIME = re.compile(r"\d{4}-\d{2}-\d{2}[T ]\d{2}:\d{2}")
+
+_MISSING = object()
+
+TYPE_NAMES = {
+    str: "строка",
+    int: "целое число",
+    float: "число",
+    bool: "логическое значение",
+    dict: "объект",
+    list: "массив",
+}
+
+
+class ExportValidationError(ValueError):
+    """В выгрузке есть некорректные элементы; problems — список (номер элемента, путь поля, описание)"""
+
+    def __init__(self, source, problems):
+        self.source = source
+        self.problems = problems
+        lines = [f"{path}: {message}" for _, path, message in problems[:SHOWN_PROBLEMS]]
+        if len(problems) > SHOWN_PROBLEMS:
+            lines.append(f"… и ещё {len(problems) - SHOWN_PROBLEMS}")
+        super().__init__(f"Ошибки в выгрузке {source} ({len(problems)}):\n" + "\n".join(lines))
+
+
+def rule(*types, required=False, nullable=False, fields=None, first=None, each=None, min_items=0, check=None,
+         when=None):
+    """Описание значения в схеме выгрузки.
+
+    fields — правила полей объекта, first — первого элемента массива,
+    each — каждого элемента, check(значение) возвращает текст ошибки или
+    None, when — пара (условие(объект), поля), проверяемые только при условии.
+    """
+    return {"types": types, "required": required, "nullable": nullable, "fields": fields or {}, "first": first,
+            "each": each, "min_items": min_items, "check": check, "when": when}
+
+
+def _type_name(value):
+    if value is None:
+        return "null"
+    return TYPE_NAMES.get(type(value), type(value).__name__)
+
+
+def _is_leaf(schema):
+    return not (schema["check"] or schema["fields"] or schema["first"] or schema["each"] or schema["when"]
+                or schema["min_items"])
+
+
+def _compile_fields(fields):
+    """Для каждого поля: (имя, обязательно, допустимые классы простого значения, проверка).
+
+    Простые поля (только тип) проверяются сравнением класса без вызова
+    функции; полная проверка нужна лишь для вложенных значений и ошибок.
+    """
+    compiled = []
+    for name, field in fields.items():
+        classes = frozenset(field["types"] + ((type(None),) if field["nullable"] else ())) if _is_leaf(field) else ()
+        compiled.append((name, field["required"], classes, compile_rule(field)))
+    return tuple(compiled)
+
+
+def _check_fields(value, field_checks, problems):
+    for name, required, classes, validate_field in field_checks:
+        field_value = value.get(name, _MISSING)
+        if field_value.__class__ in classes:
+            continue
+        if field_value is _MISSING:
+            if required:
+                problems.append((f".{name}", "обязательное поле отсутствует"))
+            continue
+        found = validate_field(field_value)
+        if found:
+            problems.extend((f".{name}{path}", message) for path, message in found)
+
+
+def compile_rule(schema):
+    """Превращает правило схемы в функцию validate(значение).
+
+    Схема разбирается один раз: для каждого элемента выгрузки выполняются
+    только готовые проверки. Функция возвращает None, если значение
+    корректно, иначе список (относительный путь, описание); пути строятся
+    только для найденных ошибок, поэтому проверка корректных данных дешёвая.
+    """
+    types = schema["types"]
+    nullable = schema["nullable"]
+    check = schema["check"]
+    min_items = schema["min_items"]
+    fields = _compile_fields(schema["fields"])
+    first = compile_rule(schema["first"]) if schema["first"] else None
+    each = compile_rule(schema["each"]) if schema["each"] else None
+    when = (schema["when"][0], _compile_fields(schema["when"][1])) if schema["when"] else None
+    expected = " или ".join(TYPE_NAMES[value_type] for value_type in types)
+    # bool — подкласс int, но логическое значение на месте числа — ошибка
+    allows_bool = bool in types
+
+    classes = frozenset(types)
+
+    def validate(value):
+        if value.__class__ not in classes:
+            if value is None:
+                return None if nullable else [("", f"ожидалось: {expected}, получено: null")]
+            if not isinstance(value, types) or (value.__class__ is bool and not allows_bool):
+                return [("", f"ожидалось: {expected}, получено: {_type_name(value)}")]
+
+        problems = []
+        if check is not None:
+            message = check(value)
+            if message:
+                problems.append(("", message))
+        if value.__class__ is dict:
+            _check_fields(value, fields, problems)
+            if when is not None and when[0](value):
+                _check_fields(value, when[1], problems)
+        elif value.__class__ is list:
+            if len(value) < min_items:
+                problems.append(("", "массив пуст"))
+            if first is not None and value:
+                found = first(value[0])
+                if found:
+                    problems.extend((f"[0]{path}", message) for path, message in found)
+            if each is not None:
+                for i, element in enumerate(value):
+                    found = each(element)
+                    if found:
+                        problems.extend((f"[{i}]{path}", message) for path, message in found)
+        return problems or None
+
+    return validate
+
+
+def _check_start(value):
+    if value and (not ISO_DATETIME.match(value) or parse_start_dt(value) is None):
+        return f"дата и время не в формате ISO 8601 (ГГГГ-ММ-ДДTЧЧ:ММ): {value!r}"
+    return None
+
+
+def _is_group_field(field):
+    return field.get("name") == GROUP_FIELD_NAME
+
+
+def _is_accepted(paper):
+    state = paper.get("state")
+    return isinstance(state, dict) and state.get("name") == "accepted"
+
+
+# Правила для значений полей записи доклада; ими же проверяются значения,
+# взятые по нестандартному соответствию полей (см. field_mapping)
+ID_RULE = rule(int, str, nullable=True)
+START_RULE = rule(str, nullable=True, check=_check_start)
+TRACK_RULE = rule(dict, str, nullable=True)
+# Значение, которое приводится к строке
+SCALAR_RULE = rule(str, int, float, nullable=True)
+
+# Поля доклада, которые читает models.normalize_contribution
+CONTRIBUTION_SCHEMA = rule(dict, fields={
+    "id": ID_RULE,
+    "title": rule(str),
+    "start_dt": START_RULE,
+    "room_name": rule(str),
+    "session": rule(dict, fields={
+        "friendly_id": rule(str, int),
+        "code": rule(str, nullable=True),
+        "title": rule(str),
+    }),
+    "track": TRACK_RULE,
+    "persons": rule(list, first=rule(dict, fields={"full_name": rule(str)})),
+    # Номер группы докладчика разбирается как строка
+    "custom_fields": rule(list, each=rule(dict, when=(_is_group_field, {"value": rule(str, nullable=True)}))),
+})
+
+# Поля публикации, которые читает models.iter_accepted_papers (для принятых работ)
+PAPER_SCHEMA = rule(dict, fields={
+    "state": rule(dict, required=True, fields={"name": rule(str, required=True)}),
+}, when=(_is_accepted, {
+    "contribution": rule(dict, required=True, fields={
+        "title": rule(str, required=True),
+        "id": ID_RULE,
+        "track": TRACK_RULE,
+    }),
+    "revisions": rule(list, required=True, min_items=1, first=rule(dict, fields={
+        "submitter": rule(dict, required=True, fields={"full_name": rule(str, required=True)}),
+    })),
+}))
+
+_validate_contribution = compile_rule(CONTRIBUTION_SCHEMA)
+_validate_paper = compile_rule(PAPER_SCHEMA)
+
+
+def _validate_items(items, validate, normalized, source):
+    problems = []
+    for index, item in enumerate(items):
+        # Нормализованные записи (например, из кеша выгрузок) уже проверены
+        if isinstance(item, normalized):
+            yield item
+            continue
+        found = validate(item)
+        if found:
+            problems.extend((index, f"[{index}]{path}", message) for path, message in found)
+        else:
+            yield item
+
+    if problems:
+        raise ExportValidationError(source, problems)
+
+
+def validate_contributions(items, source="докладов", mapping=None):
+    """Проверяет доклады выгрузки по ходу чтения и пропускает дальше только корректные.
+
+    С нестандартным соответствием полей mapping (см. field_mapping) проверяются
+    значения по его путям и дополнительным полям, а не поля выгрузки Indico.
+
+    Ошибки всех элементов собираются за один проход, а ExportValidationError
+    выбрасывается, только когда поток исчерпан. Поэтому поток нужно дочитать
+    до начала работы с документом: генераторы сначала группируют записи
+    (или собирают их в список) и лишь затем создают документ.
+    """
+    validate = _validate_contribution if mapping is None or mapping.is_default else mapping.validate
+    return _validate_items(items, validate, Contribution, source)
+
+
+def validate_papers(items, source="публикаций"):
+    """Проверяет публикации выгрузки по ходу чтения (см. validate_contributions)"""
+    return _validate_items(items, _validate_paper, AcceptedPaper, source)